@@ -0,0 +1,324 @@
+"""
+Estatísticas da frota a partir dos relatórios exam_security_report_*.json
+coletados das máquinas dos laboratórios.
+
+Percorre uma árvore de diretórios, resume cada relatório em um processo do
+pool (só o resumo, de poucos bytes, volta ao processo principal) e acumula:
+nomes de processos suspeitos mais comuns, distribuição do score de risco,
+incidência de múltiplos monitores e contagens por laboratório.
+
+É incremental: o arquivo de estado guarda os acumuladores e, para cada
+relatório já contabilizado, a assinatura (tamanho, mtime) e o resumo. Uma
+nova execução processa apenas os arquivos novos ou alterados; a
+contribuição anterior de um relatório regravado é descontada antes de
+somar a nova.
+
+Uso:
+    python aggregate_reports.py relatorios/
+    python aggregate_reports.py relatorios/ --state frota.json --top 30 --json resumo.json
+"""
+import argparse
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+REPORT_PREFIX = "exam_security_report_"
+REPORT_SUFFIX = ".json"
+HIGH_RISK_SCORE = 30  # mesmo limiar do "RISCO ALTO" em script_verification.main
+STATE_VERSION = 2
+
+
+def find_reports(root: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    Percorre a árvore e retorna (caminho relativo, tamanho, mtime_ns) de cada relatório
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.name.startswith(REPORT_PREFIX) and entry.name.endswith(REPORT_SUFFIX):
+                st = entry.stat()
+                yield os.path.relpath(entry.path, root), st.st_size, st.st_mtime_ns
+
+
+def lab_of(rel_path: str, hostname: Optional[str]) -> str:
+    """
+    Laboratório de um relatório: o primeiro diretório sob a raiz
+    (ex.: lab01/pc07/...) ou, com os relatórios todos na raiz, o prefixo do
+    nome da máquina (ex.: LAB01-PC07)
+    """
+    parts = rel_path.replace("\\", "/").split("/")
+    if len(parts) > 1:
+        return parts[0]
+    if hostname and "-" in hostname:
+        return hostname.split("-", 1)[0].upper()
+    return "desconhecido"
+
+
+def summarize_report(task: Tuple[str, str]) -> Optional[Dict]:
+    """
+    Lê um relatório (no processo do pool) e retorna apenas o resumo
+    necessário para as estatísticas, ou None se o arquivo for inválido
+    """
+    root, rel_path = task
+    try:
+        with open(os.path.join(root, rel_path), "r", encoding="utf-8") as f:
+            report = json.load(f)
+        security = report.get("security_analysis", {})
+        screens = report.get("screen_verification", {})
+        hostname = report.get("system_info", {}).get("hostname")
+        return {
+            "lab": lab_of(rel_path, hostname),
+            "risk_score": float(security.get("risk_score") or 0),
+            "monitors": int(screens.get("total_monitors") or 0),
+            "multi_monitor": bool(screens.get("has_secondary_screens")),
+            # Cada nome conta uma vez por relatório (incidência na frota)
+            "process_names": sorted({(p.get("name") or "").lower()
+                                     for p in security.get("suspicious_processes", [])} - {""}),
+            "ai_names": sorted({(p.get("name") or "").lower()
+                                for p in security.get("ai_applications", [])} - {""}),
+        }
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class FleetAggregate:
+    """
+    Acumuladores das estatísticas da frota, serializáveis no arquivo de estado
+    """
+
+    def __init__(self):
+        # caminho relativo -> [tamanho, mtime_ns, resumo (None se inválido)]
+        self.files: Dict[str, List] = {}
+        self.reports = 0
+        self.errors = 0
+        self.multi_monitor = 0
+        self.process_names = Counter()
+        self.ai_names = Counter()
+        # Histograma com um balde por ponto de score (0..100): permite
+        # percentis exatos ao inteiro sem guardar os scores individuais
+        self.risk_histogram = [0] * 101
+        self.monitors = Counter()
+        self.labs: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "FleetAggregate":
+        aggregate = cls()
+        if not path or not os.path.exists(path):
+            return aggregate
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION:
+            return aggregate
+        aggregate.files = state["files"]
+        aggregate.reports = state["reports"]
+        aggregate.errors = state["errors"]
+        aggregate.multi_monitor = state["multi_monitor"]
+        aggregate.process_names = Counter(state["process_names"])
+        aggregate.ai_names = Counter(state["ai_names"])
+        aggregate.risk_histogram = state["risk_histogram"]
+        aggregate.monitors = Counter(state["monitors"])
+        aggregate.labs = state["labs"]
+        return aggregate
+
+    def save(self, path: str):
+        """
+        Grava o estado de forma atômica (arquivo temporário + rename)
+        """
+        state = {
+            "version": STATE_VERSION,
+            "files": self.files,
+            "reports": self.reports,
+            "errors": self.errors,
+            "multi_monitor": self.multi_monitor,
+            "process_names": self.process_names,
+            "ai_names": self.ai_names,
+            "risk_histogram": self.risk_histogram,
+            "monitors": self.monitors,
+            "labs": self.labs,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def is_current(self, rel_path: str, signature: List[int]) -> bool:
+        known = self.files.get(rel_path)
+        return known is not None and known[:2] == signature
+
+    def fold(self, rel_path: str, signature: List[int], summary: Optional[Dict]):
+        previous = self.files.get(rel_path)
+        if previous is not None:
+            # Relatório regravado: desconta a contribuição anterior
+            self._apply(previous[2], -1)
+        self.files[rel_path] = list(signature) + [summary]
+        self._apply(summary, 1)
+
+    @staticmethod
+    def _count(counter: Counter, key: str, sign: int):
+        counter[key] += sign
+        if counter[key] <= 0:
+            del counter[key]
+
+    def _apply(self, summary: Optional[Dict], sign: int):
+        """
+        Soma (sign=1) ou desconta (sign=-1) o resumo de um relatório
+        """
+        if summary is None:
+            self.errors += sign
+            return
+        self.reports += sign
+        for name in summary["process_names"]:
+            self._count(self.process_names, name, sign)
+        for name in summary["ai_names"]:
+            self._count(self.ai_names, name, sign)
+        risk = summary["risk_score"]
+        self.risk_histogram[max(0, min(100, int(risk)))] += sign
+        self._count(self.monitors, str(summary["monitors"]), sign)
+        if summary["multi_monitor"]:
+            self.multi_monitor += sign
+
+        lab = self.labs.setdefault(summary["lab"], {
+            "reports": 0, "multi_monitor": 0, "high_risk": 0, "risk_sum": 0.0
+        })
+        lab["reports"] += sign
+        lab["risk_sum"] += sign * risk
+        if summary["multi_monitor"]:
+            lab["multi_monitor"] += sign
+        if risk > HIGH_RISK_SCORE:
+            lab["high_risk"] += sign
+        if lab["reports"] <= 0:
+            del self.labs[summary["lab"]]
+
+    def risk_percentile(self, fraction: float) -> Optional[int]:
+        if not self.reports:
+            return None
+        target = fraction * self.reports
+        seen = 0
+        for score, count in enumerate(self.risk_histogram):
+            seen += count
+            if seen >= target:
+                return score
+        return 100
+
+    def summary(self, top: int = 20) -> Dict:
+        reports = self.reports or 1
+        return {
+            "reports": self.reports,
+            "invalid_files": self.errors,
+            "top_suspicious_processes": self.process_names.most_common(top),
+            "top_ai_applications": self.ai_names.most_common(top),
+            "risk_score": {
+                "mean": round(sum(lab["risk_sum"] for lab in self.labs.values()) / reports, 2),
+                "p50": self.risk_percentile(0.50),
+                "p90": self.risk_percentile(0.90),
+                "p99": self.risk_percentile(0.99),
+                # Faixas de 10 pontos: "0-9", "10-19", ..., "90-100"
+                "distribution": {
+                    f"{low}-{low + 9 if low < 90 else 100}": sum(self.risk_histogram[low:low + 10 if low < 90 else 101])
+                    for low in range(0, 100, 10)
+                },
+                "high_risk_reports": sum(lab["high_risk"] for lab in self.labs.values()),
+            },
+            "multi_monitor": {
+                "reports": self.multi_monitor,
+                "rate": round(self.multi_monitor / reports, 4),
+                "monitors": dict(sorted(self.monitors.items(), key=lambda item: int(item[0]))),
+            },
+            "labs": {
+                name: {
+                    "reports": lab["reports"],
+                    "multi_monitor": lab["multi_monitor"],
+                    "high_risk": lab["high_risk"],
+                    "mean_risk": round(lab["risk_sum"] / max(1, lab["reports"]), 2),
+                }
+                for name, lab in sorted(self.labs.items())
+            },
+        }
+
+
+def aggregate(root: str, state_path: Optional[str] = None, workers: Optional[int] = None,
+              checkpoint_every: int = 10000) -> Tuple[FleetAggregate, int]:
+    """
+    Contabiliza os relatórios novos ou alterados sob `root` e retorna
+    (agregado, quantos foram processados)
+    """
+    fleet = FleetAggregate.load(state_path)
+    pending = [(rel_path, [size, mtime_ns]) for rel_path, size, mtime_ns in find_reports(root)
+               if not fleet.is_current(rel_path, [size, mtime_ns])]
+    if not pending:
+        return fleet, 0
+
+    tasks = ((root, rel_path) for rel_path, _ in pending)
+    # Lotes grandes amortizam o custo de IPC por arquivo
+    chunksize = max(1, min(256, len(pending) // ((workers or os.cpu_count() or 1) * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for done, ((rel_path, signature), summary) in enumerate(
+                zip(pending, executor.map(summarize_report, tasks, chunksize=chunksize)), 1):
+            fleet.fold(rel_path, signature, summary)
+            if state_path and done % checkpoint_every == 0:
+                fleet.save(state_path)
+    if state_path:
+        fleet.save(state_path)
+    return fleet, len(pending)
+
+
+def print_summary(summary: Dict, new_reports: int):
+    print("=" * 60)
+    print("📊 ESTATÍSTICAS DA FROTA")
+    print("=" * 60)
+    print(f"📄 Relatórios: {summary['reports']} ({new_reports} novo(s) ou alterado(s), {summary['invalid_files']} inválido(s))")
+
+    risk = summary["risk_score"]
+    print(f"📈 Score de risco: média {risk['mean']} | p50 {risk['p50']} | p90 {risk['p90']} | p99 {risk['p99']}")
+    print(f"🟡 Relatórios com risco alto (> {HIGH_RISK_SCORE}): {risk['high_risk_reports']}")
+    for band, count in risk["distribution"].items():
+        print(f"  {band:>7}: {count}")
+
+    multi = summary["multi_monitor"]
+    print(f"🖥️  Múltiplos monitores: {multi['reports']} ({multi['rate'] * 100:.2f}%)")
+
+    print("\n🚨 PROCESSOS SUSPEITOS MAIS COMUNS:")
+    for name, count in summary["top_suspicious_processes"]:
+        print(f"  • {name}: {count}")
+    print("\n🤖 APLICATIVOS DE IA MAIS COMUNS:")
+    for name, count in summary["top_ai_applications"]:
+        print(f"  • {name}: {count}")
+
+    print("\n🏫 POR LABORATÓRIO:")
+    for name, lab in summary["labs"].items():
+        print(f"  • {name}: {lab['reports']} relatórios | múltiplos monitores {lab['multi_monitor']} | "
+              f"risco alto {lab['high_risk']} | risco médio {lab['mean_risk']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estatísticas da frota a partir dos relatórios de verificação")
+    parser.add_argument("root", help="diretório com os relatórios (percorrido recursivamente)")
+    parser.add_argument("--state", default=None,
+                        help="arquivo de estado para execuções incrementais (padrão: <root>/.fleet_state.json)")
+    parser.add_argument("--workers", type=int, default=None, help="processos no pool (padrão: CPUs)")
+    parser.add_argument("--top", type=int, default=20, help="quantos nomes de processos listar")
+    parser.add_argument("--json", dest="json_out", help="grava o resumo em JSON")
+    args = parser.parse_args(argv)
+
+    state_path = args.state or os.path.join(args.root, ".fleet_state.json")
+    fleet, new_reports = aggregate(args.root, state_path, workers=args.workers)
+    summary = fleet.summary(args.top)
+    print_summary(summary, new_reports)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\nResumo salvo em: {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
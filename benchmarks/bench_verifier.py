@@ -0,0 +1,172 @@
+"""
+Benchmark do pipeline do ExamSecurityVerifier com tabelas sintéticas.
+
+Roda no Linux, sem pywin32: os módulos win32 são substituídos por versões
+falsas e o psutil passa a enumerar processos/serviços gerados de forma
+determinística. Cada fase de generate_report é cronometrada separadamente.
+
+Uso:
+    python benchmarks/bench_verifier.py
+    python benchmarks/bench_verifier.py --sizes 100 1000 20000 --repeat 5 --json atual.json
+    python benchmarks/bench_verifier.py --compare base.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import fixtures  # noqa: E402
+
+fixtures.install_fake_win32(monitors=2)
+
+import psutil  # noqa: E402
+import script_verification  # noqa: E402
+
+DEFAULT_SIZES = [100, 1000, 5000, 20000]
+
+
+def run_phases(processes, services, report_dir):
+    """
+    Executa as fases de generate_report, na mesma ordem, e retorna
+    {fase: segundos}. As fases "*_warm" repetem a operação no mesmo
+    verificador (re-verificação com cache); as demais partem do zero.
+    """
+    fixtures.install_fake_psutil(psutil, processes, services)
+    verifier = script_verification.ExamSecurityVerifier()
+    timings = {}
+
+    def timed(phase, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[phase] = time.perf_counter() - start
+        return result
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        timed("screens", verifier.detect_secondary_screens)
+        timed("screens_warm", verifier.detect_secondary_screens)
+        procs = timed("processes", verifier.get_running_processes)
+        procs = timed("processes_warm", verifier.get_running_processes)
+        svcs = timed("services", verifier.get_running_services)
+        timed("check_suspicious_processes", verifier.check_suspicious_processes, procs)
+        timed("check_suspicious_services", verifier.check_suspicious_services, svcs)
+        timed("check_ai_applications", verifier.check_ai_applications, procs)
+        verifier = script_verification.ExamSecurityVerifier()
+        timed("generate_report", verifier.generate_report)
+        report = timed("generate_report_warm", verifier.generate_report)
+        verifier = script_verification.ExamSecurityVerifier()
+        timed("generate_report_concurrent", lambda: verifier.generate_report(concurrent=True))
+        timed("save_report", verifier.save_report, report, os.path.join(report_dir, "report.json"))
+    return timings
+
+
+def measure_peak_memory(processes, services, report_dir):
+    """
+    Pico de memória alocada (tracemalloc) de um relatório completo e salvo
+    """
+    fixtures.install_fake_psutil(psutil, processes, services)
+    verifier = script_verification.ExamSecurityVerifier()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = verifier.generate_report()
+            verifier.save_report(report, os.path.join(report_dir, "report.json"))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_size(size, repeat, seed, report_dir):
+    processes = fixtures.make_process_table(size, seed=seed)
+    services = fixtures.make_service_table(seed=seed)
+    runs = [run_phases(processes, services, report_dir) for _ in range(repeat)]
+    phases = {
+        phase: {
+            "median_ms": round(statistics.median(run[phase] for run in runs) * 1000, 3),
+            "min_ms": round(min(run[phase] for run in runs) * 1000, 3),
+        }
+        for phase in runs[0]
+    }
+    total = phases["generate_report"]["median_ms"] / 1000
+    return {
+        "processes": size,
+        "services": len(services),
+        "phases": phases,
+        "throughput_procs_per_s": round(size / total, 1) if total else None,
+        "peak_memory_kb": round(measure_peak_memory(processes, services, report_dir) / 1024, 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    base_by_size = {}
+    if baseline:
+        base_by_size = {r["processes"]: r for r in baseline["results"]}
+    for result in results["results"]:
+        size = result["processes"]
+        base = base_by_size.get(size)
+        print(f"\n== {size} processos / {result['services']} serviços ==")
+        for phase, values in result["phases"].items():
+            line = f"  {phase:<28} {values['median_ms']:>10.3f} ms (min {values['min_ms']:.3f})"
+            if base and phase in base["phases"] and base["phases"][phase]["median_ms"]:
+                ratio = values["median_ms"] / base["phases"][phase]["median_ms"]
+                line += f"  x{ratio:.2f} vs base"
+            print(line)
+        print(f"  {'vazão':<28} {result['throughput_procs_per_s']:>10} processos/s")
+        print(f"  {'pico de memória':<28} {result['peak_memory_kb']:>10} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do ExamSecurityVerifier com dados sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="tamanhos da tabela de processos")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por tamanho (usa a mediana)")
+    parser.add_argument("--seed", type=int, default=1234, help="semente das fixtures")
+    parser.add_argument("--json", dest="json_out", help="grava os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        results = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "results": [bench_size(size, args.repeat, args.seed, report_dir) for size in args.sizes],
+        }
+
+    print_results(results, baseline)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados salvos em: {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,260 @@
+"""
+Fixtures sintéticas para o benchmark do ExamSecurityVerifier.
+
+Gera tabelas de processos e serviços realistas (cmdlines longas de
+Chrome/Electron, serviços do Windows) de forma determinística a partir de
+uma semente, e instala módulos win32 falsos para que script_verification
+possa ser importado no Linux, sem pywin32.
+"""
+import random
+import sys
+import types
+from contextlib import contextmanager
+
+# Processos comuns em uma máquina de laboratório (nome, caminho do executável)
+SYSTEM_PROCESSES = [
+    ("System", None),
+    ("Registry", None),
+    ("smss.exe", r"C:\Windows\System32\smss.exe"),
+    ("csrss.exe", r"C:\Windows\System32\csrss.exe"),
+    ("wininit.exe", r"C:\Windows\System32\wininit.exe"),
+    ("services.exe", r"C:\Windows\System32\services.exe"),
+    ("lsass.exe", r"C:\Windows\System32\lsass.exe"),
+    ("svchost.exe", r"C:\Windows\System32\svchost.exe"),
+    ("dwm.exe", r"C:\Windows\System32\dwm.exe"),
+    ("explorer.exe", r"C:\Windows\explorer.exe"),
+    ("RuntimeBroker.exe", r"C:\Windows\System32\RuntimeBroker.exe"),
+    ("SearchHost.exe", r"C:\Windows\SystemApps\MicrosoftWindows.Client.CBS_cw5n1h2txyewy\SearchHost.exe"),
+    ("conhost.exe", r"C:\Windows\System32\conhost.exe"),
+    ("MsMpEng.exe", r"C:\ProgramData\Microsoft\Windows Defender\Platform\4.18.24090.11-0\MsMpEng.exe"),
+    ("audiodg.exe", r"C:\Windows\System32\audiodg.exe"),
+    ("spoolsv.exe", r"C:\Windows\System32\spoolsv.exe"),
+]
+
+BROWSER_PROCESSES = [
+    ("chrome.exe", r"C:\Program Files\Google\Chrome\Application\chrome.exe"),
+    ("msedge.exe", r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe"),
+    ("Code.exe", r"C:\Users\aluno\AppData\Local\Programs\Microsoft VS Code\Code.exe"),
+    ("Teams.exe", r"C:\Users\aluno\AppData\Local\Microsoft\Teams\current\Teams.exe"),
+    ("Discord.exe", r"C:\Users\aluno\AppData\Local\Discord\app-1.0.9164\Discord.exe"),
+]
+
+SUSPICIOUS_PROCESSES = [
+    ("ChatGPT.exe", r"C:\Users\aluno\AppData\Local\Programs\ChatGPT\ChatGPT.exe"),
+    ("Claude.exe", r"C:\Users\aluno\AppData\Local\AnthropicClaude\Claude.exe"),
+    ("TeamViewer.exe", r"C:\Program Files\TeamViewer\TeamViewer.exe"),
+    ("AnyDesk.exe", r"C:\Program Files (x86)\AnyDesk\AnyDesk.exe"),
+    ("obs64.exe", r"C:\Program Files\obs-studio\bin\64bit\obs64.exe"),
+]
+
+RENDERER_FLAGS = [
+    "--type=renderer", "--type=gpu-process", "--type=utility",
+    "--utility-sub-type=network.mojom.NetworkService", "--lang=pt-BR",
+    "--service-sandbox-type=none", "--enable-features=WebRtcHideLocalIpsWithMdns",
+    "--disable-features=SpareRendererForSitePerProcess", "--device-scale-factor=1",
+    "--num-raster-threads=4", "--enable-main-frame-before-activation",
+    "--variations-seed-version=20241017-010101.000000", "/prefetch:1",
+]
+
+SERVICES = [
+    ("AudioSrv", "Windows Audio"), ("BITS", "Background Intelligent Transfer Service"),
+    ("Dhcp", "DHCP Client"), ("Dnscache", "DNS Client"), ("EventLog", "Windows Event Log"),
+    ("LanmanWorkstation", "Workstation"), ("mpssvc", "Windows Defender Firewall"),
+    ("Spooler", "Print Spooler"), ("Themes", "Themes"), ("W32Time", "Windows Time"),
+    ("WinDefend", "Microsoft Defender Antivirus Service"), ("Wcmsvc", "Windows Connection Manager"),
+    ("WSearch", "Windows Search"), ("OneSyncSvc", "Sync Host"),
+    ("TeamViewer", "TeamViewer"), ("Steam Client Service", "Steam Client Service"),
+    ("NVDisplay.ContainerLocalSystem", "NVIDIA Display Container LS"),
+]
+
+
+class FakeMemoryInfo:
+    __slots__ = ("rss", "vms")
+
+    def __init__(self, rss):
+        self.rss = rss
+        self.vms = rss * 2
+
+
+class FakeProcess:
+    """
+    Imita a parte de psutil.Process usada pelo verificador
+    """
+
+    def __init__(self, pid, name, exe, cmdline, rss, create_time):
+        self.pid = pid
+        self._name = name
+        self._exe = exe
+        self._cmdline = cmdline
+        self._rss = rss
+        self._create_time = create_time
+        self.info = {}
+
+    def name(self):
+        return self._name
+
+    def exe(self):
+        return self._exe
+
+    def cmdline(self):
+        return list(self._cmdline)
+
+    def memory_info(self):
+        return FakeMemoryInfo(self._rss)
+
+    def create_time(self):
+        return self._create_time
+
+    @contextmanager
+    def oneshot(self):
+        yield
+
+    def as_dict(self, attrs=None):
+        return {attr: self._get(attr) for attr in attrs or ("pid", "name", "exe", "cmdline")}
+
+    def _get(self, attr):
+        if attr == "pid":
+            return self.pid
+        return getattr(self, attr)()
+
+
+class FakeService:
+    def __init__(self, name, display_name, status, start_type):
+        self._info = {
+            "name": name,
+            "display_name": display_name,
+            "status": status,
+            "start_type": start_type,
+        }
+
+    def name(self):
+        return self._info["name"]
+
+    def as_dict(self):
+        return dict(self._info)
+
+
+def make_process_table(size, seed=1234, suspicious_ratio=0.03):
+    """
+    Gera `size` processos com a distribuição típica de um laboratório:
+    muitos processos do sistema, vários renderizadores de navegador/Electron
+    com cmdlines longas e uma pequena fração de processos suspeitos.
+    """
+    rng = random.Random(seed)
+    processes = []
+    for index in range(size):
+        pid = 4 + index * 4
+        roll = rng.random()
+        if roll < suspicious_ratio:
+            name, exe = rng.choice(SUSPICIOUS_PROCESSES)
+            cmdline = [exe]
+        elif roll < 0.45:
+            name, exe = rng.choice(BROWSER_PROCESSES)
+            flags = rng.sample(RENDERER_FLAGS, k=rng.randint(6, len(RENDERER_FLAGS)))
+            flags.append(f"--renderer-client-id={rng.randint(5, 9999)}")
+            flags.append(f"--field-trial-handle={rng.randint(1000, 9999)},i,"
+                         f"{rng.getrandbits(64)},{rng.getrandbits(64)},262144")
+            flags.append(f"--mojo-platform-channel-handle={rng.randint(1000, 99999)}")
+            flags.append("--user-data-dir=C:\\Users\\aluno\\AppData\\Local\\" + name.split(".")[0])
+            cmdline = [exe] + flags
+        else:
+            name, exe = rng.choice(SYSTEM_PROCESSES)
+            cmdline = [exe, "-k", rng.choice(["netsvcs", "LocalService", "DcomLaunch", "RPCSS"]),
+                       "-p", "-s", rng.choice(["Schedule", "BITS", "Dnscache", "Themes"])] if exe else []
+        processes.append(FakeProcess(
+            pid=pid,
+            name=name,
+            exe=exe,
+            cmdline=cmdline,
+            rss=rng.randint(1, 800) * 1024 * 1024,
+            create_time=1700000000.0 + index,
+        ))
+    return processes
+
+
+def make_service_table(size=250, seed=1234):
+    rng = random.Random(seed)
+    services = []
+    for index in range(size):
+        name, display = SERVICES[index % len(SERVICES)]
+        suffix = "" if index < len(SERVICES) else f"_{index}"
+        services.append(FakeService(
+            name + suffix,
+            display,
+            "running" if rng.random() < 0.6 else "stopped",
+            rng.choice(["automatic", "manual", "disabled"]),
+        ))
+    return services
+
+
+class FakeDisplayDevice:
+    def __init__(self, index):
+        self.DeviceName = f"\\\\.\\DISPLAY{index + 1}"
+        self.DeviceString = "Intel(R) UHD Graphics 620"
+
+
+class FakeDisplaySettings:
+    def __init__(self, index):
+        self.Position_x = 1920 * index
+        self.Position_y = 0
+        self.PelsWidth = 1920
+        self.PelsHeight = 1080
+        self.BitsPerPel = 32
+        self.DisplayFrequency = 60
+
+
+def make_win32api(monitors=2):
+    """
+    Módulo win32api falso com `monitors` telas lado a lado em 1920x1080
+    """
+    module = types.ModuleType("win32api")
+    width = 1920 * monitors
+
+    def EnumDisplayDevices(device, index):
+        if index >= monitors:
+            raise Exception("Sem mais dispositivos")
+        return FakeDisplayDevice(index)
+
+    def EnumDisplaySettings(device_name, mode):
+        index = int(device_name.rsplit("DISPLAY", 1)[1]) - 1
+        return FakeDisplaySettings(index)
+
+    metrics = {0: 1920, 1: 1080, 76: 0, 77: 0, 78: width, 79: 1080, 80: monitors}
+
+    def GetSystemMetrics(index):
+        return metrics.get(index, 0)
+
+    module.EnumDisplayDevices = EnumDisplayDevices
+    module.EnumDisplaySettings = EnumDisplaySettings
+    module.GetSystemMetrics = GetSystemMetrics
+    return module
+
+
+def install_fake_win32(monitors=2):
+    """
+    Registra win32api/win32con/win32gui/win32process falsos em sys.modules.
+    Deve ser chamado antes de importar script_verification.
+    """
+    win32con = types.ModuleType("win32con")
+    win32con.ENUM_CURRENT_SETTINGS = -1
+    sys.modules["win32api"] = make_win32api(monitors)
+    sys.modules["win32con"] = win32con
+    sys.modules.setdefault("win32gui", types.ModuleType("win32gui"))
+    sys.modules.setdefault("win32process", types.ModuleType("win32process"))
+
+
+def install_fake_psutil(psutil_module, processes, services):
+    """
+    Substitui process_iter/win_service_iter do psutil pelas tabelas sintéticas
+    """
+    def process_iter(attrs=None, ad_value=None):
+        for proc in processes:
+            if attrs:
+                proc.info = {attr: proc._get(attr) for attr in attrs}
+            yield proc
+
+    def win_service_iter():
+        return iter(services)
+
+    psutil_module.process_iter = process_iter
+    psutil_module.win_service_iter = win_service_iter
@@ -0,0 +1,449 @@
+"""
+Simulador de carga do servidor de alertas com N alunos virtuais (asyncio).
+
+Cada aluno virtual reproduz o comportamento de client/monitor.py: heartbeat
+periódico, violações esporádicas (POST /alerta) e, para uma fração dos
+alunos, "flapping" (foco alternando rapidamente entre a prova e outra
+janela). Opcionalmente, uma "tempestade de reconexão" faz todos os alunos
+reenviarem ao mesmo tempo o spool acumulado (POST /alertas em lote) e um
+heartbeat, como quando a rede do laboratório volta.
+
+Sem dependências além da biblioteca padrão: HTTP/1.1 direto sobre
+asyncio.open_connection, uma conexão por aluno (como os clientes reais).
+Com --compact, os lotes usam o formato compacto de client/alert_wire.py.
+
+Uso:
+    python benchmarks/load_server.py --spawn --students 2000 --duration 60
+    python benchmarks/load_server.py --url http://10.0.0.5:5000 --students 500 --storm-at 30
+    python benchmarks/load_server.py --spawn --server-env ALERT_RATE_BURST=100 --json carga.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+SERVER_DIR = os.path.join(ROOT, "server")
+# Codificação do formato compacto: a mesma do monitor
+sys.path.insert(0, os.path.join(ROOT, "client"))
+
+from alert_wire import CONTENT_TYPE as BATCH_CONTENT_TYPE, encode_batch  # noqa: E402
+
+CLASS_SIZE = 40
+REASONS = ("left_exam_context", "secondary_screen_detected")
+
+
+def now_iso():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class HttpConnection:
+    """
+    Cliente HTTP/1.1 mínimo com keep-alive, uma requisição por vez. Se o
+    servidor fechar a conexão (HTTP/1.0 ou "Connection: close"), ou após
+    reconnect(), a próxima requisição abre uma conexão nova.
+    """
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self._reconnect = False
+        self._lock = asyncio.Lock()
+
+    def reconnect(self):
+        # Não fecha agora: pode haver uma requisição em andamento
+        self._reconnect = True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None, extra_headers=""):
+        """
+        Retorna (status, cabeçalhos, corpo, bytes enviados). `payload` é
+        serializado em JSON, exceto se já for bytes (nesse caso
+        `extra_headers` traz o Content-Type)
+        """
+        async with self._lock:
+            if self._reconnect:
+                self._reconnect = False
+                self.close()
+            return await asyncio.wait_for(self._request(method, path, payload, extra_headers), self.timeout)
+
+    async def _request(self, method, path, payload, extra_headers):
+        if isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            extra_headers = "Content-Type: application/json\r\n" + extra_headers
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"{extra_headers}Content-Length: {len(body)}\r\n\r\n").encode("ascii")
+        sent = len(head) + len(body)
+        # Uma conexão reaproveitada pode ter sido fechada pelo servidor: tenta de novo uma vez
+        for _ in range(2):
+            fresh = self.writer is None
+            if fresh:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(head + body)
+                await self.writer.drain()
+                return (*await self._read_response(), sent)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if fresh:
+                    raise
+        raise ConnectionError("conexão recusada")
+
+    async def _read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("conexão fechada pelo servidor")
+        version, status = status_line.split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        close = version == b"HTTP/1.0" or headers.get("connection", "").lower() == "close"
+        if "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            close = True
+        if close:
+            self.close()
+        return int(status), headers, body
+
+
+class LoadStats:
+    """
+    Latências e status por endpoint, e requisições concluídas por segundo
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.per_second = Counter()
+        self.alerts_sent = 0
+        self.alerts_accepted = 0
+        self.alert_bytes = 0  # bytes enviados (cabeçalhos + corpo) nas requisições de alerta
+        self.started = time.monotonic()
+
+    def record(self, endpoint, seconds, status):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        self.per_second[int(time.monotonic() - self.started)] += 1
+
+    def summary(self, duration, ramp=0.0):
+        endpoints = {}
+        total = errors = limited = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            values.sort()
+            statuses = self.statuses[endpoint]
+            count = len(values)
+            failed = sum(n for status, n in statuses.items() if status == "error" or status >= 500)
+            total += count
+            errors += failed
+            limited += statuses.get(429, 0)
+            endpoints[endpoint] = {
+                "requests": count,
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+                "error_rate": round(failed / count, 4),
+                "statuses": {str(status): n for status, n in sorted(statuses.items(), key=str)},
+            }
+        # Pior segundo em regime: depois da entrada dos alunos e sem o último
+        # segundo incompleto
+        first = min(int(ramp) + 1, max(0, int(duration) - 1))
+        seconds = [self.per_second.get(s, 0) for s in range(first, max(first + 1, int(duration)))]
+        return {
+            "requests": total,
+            "error_rate": round(errors / total, 4) if total else None,
+            "rate_limited": limited,
+            "throughput_rps": round(total / duration, 1) if duration else None,
+            "worst_second_rps": min(seconds) if seconds else None,
+            "alerts_sent": self.alerts_sent,
+            "alerts_accepted": self.alerts_accepted,
+            "bytes_per_alert": round(self.alert_bytes / self.alerts_sent, 1) if self.alerts_sent else None,
+            "endpoints": endpoints,
+        }
+
+
+class VirtualStudent:
+    """
+    Um monitor de aluno simulado. Como no monitor real (HeartbeatSender e
+    AlertOutbox têm cada um sua sessão), heartbeats e alertas usam conexões
+    separadas.
+    """
+
+    def __init__(self, index, args, stats, host, port, rng):
+        self.student_id = f"aluno{index:05d}"
+        self.class_id = f"turma{index // CLASS_SIZE:03d}"
+        self.args = args
+        self.stats = stats
+        self.rng = rng
+        self.flapper = rng.random() < args.flap_fraction
+        self.conn = HttpConnection(host, port, args.timeout)
+        self.heartbeat_conn = HttpConnection(host, port, args.timeout)
+
+    def alert(self, reason="left_exam_context"):
+        return {
+            "student_id": self.student_id,
+            "class_id": self.class_id,
+            "timestamp": now_iso(),
+            "reason": reason,
+            "extra": {"proc": "chrome.exe", "active_title": "Nova guia - Google Chrome",
+                      "url": "https://www.google.com/"},
+        }
+
+    async def send(self, endpoint, method, path, payload=None, extra_headers="", conn=None):
+        conn = conn or self.conn
+        started = time.perf_counter()
+        try:
+            status, _, body, sent = await conn.request(method, path, payload, extra_headers)
+        except (OSError, asyncio.TimeoutError, ValueError):
+            conn.close()
+            self.stats.record(endpoint, time.perf_counter() - started, "error")
+            return None, None, 0
+        self.stats.record(endpoint, time.perf_counter() - started, status)
+        return status, body, sent
+
+    async def send_alerts(self, alerts):
+        self.stats.alerts_sent += len(alerts)
+        if len(alerts) == 1:
+            status, body, sent = await self.send("POST /alerta", "POST", "/alerta", alerts[0])
+        elif self.args.compact:
+            status, body, sent = await self.send(
+                "POST /alertas", "POST", "/alertas", encode_batch(alerts),
+                f"Content-Type: {BATCH_CONTENT_TYPE}\r\nContent-Encoding: gzip\r\n")
+        else:
+            status, body, sent = await self.send("POST /alertas", "POST", "/alertas", alerts)
+        self.stats.alert_bytes += sent
+        if status is not None and body:
+            try:
+                self.stats.alerts_accepted += int(json.loads(body).get("accepted", 0))
+            except (ValueError, AttributeError):
+                pass
+
+    async def heartbeat_loop(self, deadline):
+        await asyncio.sleep(self.rng.uniform(0, self.args.heartbeat_interval))
+        while time.monotonic() < deadline:
+            await self.send("POST /heartbeat", "POST", "/heartbeat", {
+                "student_id": self.student_id, "class_id": self.class_id, "status": "ok"},
+                conn=self.heartbeat_conn)
+            await asyncio.sleep(self.args.heartbeat_interval)
+
+    async def violation_loop(self, deadline):
+        rate = self.args.rate / 60.0  # violações por segundo por aluno
+        while True:
+            await asyncio.sleep(self.rng.expovariate(rate) if rate > 0 else self.args.duration)
+            if time.monotonic() >= deadline:
+                return
+            if self.flapper:
+                # Alt-tab repetido: uma transição para fora a cada ida e volta
+                for _ in range(self.rng.randint(3, 10)):
+                    await self.send_alerts([self.alert()])
+                    await asyncio.sleep(self.rng.uniform(0.2, 0.6))
+            elif self.rng.random() < self.args.burst_fraction:
+                # Rajada: a caixa de saída descarrega vários alertas em lote
+                await self.send_alerts([self.alert(self.rng.choice(REASONS))
+                                        for _ in range(self.rng.randint(2, self.args.batch_size))])
+            else:
+                await self.send_alerts([self.alert()])
+
+    async def storm(self, at):
+        # Todos voltam ao mesmo tempo, com pouca dispersão (a rede voltou)
+        await asyncio.sleep(at + self.rng.uniform(0, 0.5))
+        self.conn.reconnect()
+        self.heartbeat_conn.reconnect()
+        batch = [self.alert() for _ in range(self.rng.randint(1, self.args.batch_size))]
+        await asyncio.gather(
+            self.send_alerts(batch),
+            self.send("POST /heartbeat", "POST", "/heartbeat", {
+                "student_id": self.student_id, "class_id": self.class_id, "status": "violation"},
+                conn=self.heartbeat_conn))
+
+    async def run(self, deadline):
+        # Entrada escalonada ao longo de --ramp segundos
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp))
+        tasks = [self.heartbeat_loop(deadline), self.violation_loop(deadline)]
+        if self.args.storm_at is not None:
+            tasks.append(self.storm(self.args.storm_at))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self.conn.close()
+            self.heartbeat_conn.close()
+
+
+async def run_load(args, host, port):
+    raise_fd_limit()
+    stats = LoadStats()
+    rng = random.Random(args.seed)
+    students = [VirtualStudent(i, args, stats, host, port, random.Random(rng.random()))
+                for i in range(args.students)]
+    deadline = time.monotonic() + args.duration
+    tasks = [asyncio.ensure_future(student.run(deadline)) for student in students]
+    try:
+        # Requisições ainda em voo no fim da duração são descartadas
+        await asyncio.wait(tasks, timeout=args.duration + args.timeout)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats, time.monotonic() - stats.started
+
+
+def raise_fd_limit():
+    """
+    Dois sockets por aluno: 2.000 alunos passam do limite padrão de 1.024 descritores
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(port, db_path, overrides):
+    """
+    Sobe server/server.py em um subprocesso, com banco temporário
+    """
+    env = dict(os.environ, ALERT_DB_PATH=db_path)
+    env.update(overrides)
+    code = f"import server; server.app.run(host='127.0.0.1', port={port}, threaded=True)"
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=SERVER_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    started = time.monotonic()
+    while time.monotonic() - started < 15:
+        if proc.poll() is not None:
+            raise RuntimeError("o servidor encerrou durante a inicialização")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("o servidor não respondeu em 15 s")
+
+
+def print_results(results):
+    summary = results["summary"]
+    print(f"\n== {results['students']} alunos / {results['duration_s']} s ==")
+    for endpoint, values in summary["endpoints"].items():
+        print(f"  {endpoint:<16} n={values['requests']:<7} p50={values['p50_ms']:>8.2f} ms "
+              f"p95={values['p95_ms']:>8.2f} ms p99={values['p99_ms']:>8.2f} ms "
+              f"max={values['max_ms']:>8.2f} ms erros={values['error_rate']:.2%} {values['statuses']}")
+    print(f"  {'vazão':<16} {summary['throughput_rps']} req/s (pior segundo: {summary['worst_second_rps']} req/s)")
+    print(f"  {'taxa de erros':<16} {summary['error_rate']:.2%} (5xx e falhas de conexão; "
+          f"{summary['rate_limited']} respostas 429)")
+    print(f"  {'alertas':<16} {summary['alerts_accepted']} aceitos de {summary['alerts_sent']} enviados "
+          f"({summary['bytes_per_alert']} bytes/alerta)")
+
+
+def parse_server_env(values):
+    overrides = {}
+    for item in values or []:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--server-env espera NOME=VALOR: {item}")
+        overrides[name] = value
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de carga do servidor de alertas")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="servidor alvo (ignorado com --spawn)")
+    parser.add_argument("--spawn", action="store_true",
+                        help="sobe uma instância local de server/server.py com banco temporário")
+    parser.add_argument("--server-env", action="append", metavar="NOME=VALOR",
+                        help="variável de ambiente da instância criada com --spawn (repetível)")
+    parser.add_argument("--students", type=int, default=200, help="alunos virtuais")
+    parser.add_argument("--duration", type=float, default=30.0, help="duração da carga (s)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="janela (s) de entrada dos alunos")
+    parser.add_argument("--rate", type=float, default=2.0, help="violações por aluno por minuto")
+    parser.add_argument("--flap-fraction", type=float, default=0.1,
+                        help="fração de alunos com foco alternando rapidamente")
+    parser.add_argument("--burst-fraction", type=float, default=0.1,
+                        help="fração das violações enviadas como lote (POST /alertas)")
+    parser.add_argument("--batch-size", type=int, default=50, help="tamanho máximo de um lote")
+    parser.add_argument("--compact", action="store_true",
+                        help="envia os lotes no formato compacto (client/alert_wire.py)")
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0, help="intervalo dos heartbeats (s)")
+    parser.add_argument("--storm-at", type=float, help="segundo da tempestade de reconexão (opcional)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="timeout por requisição (s)")
+    parser.add_argument("--seed", type=int, default=1234, help="semente dos alunos virtuais")
+    parser.add_argument("--json", dest="json_out", help="grava os resultados em JSON")
+    args = parser.parse_args()
+    overrides = parse_server_env(args.server_env)
+
+    proc = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.spawn:
+            host, port = "127.0.0.1", free_port()
+            proc = spawn_server(port, os.path.join(tmp, "alerts.db"), overrides)
+        else:
+            parts = urlsplit(args.url)
+            host, port = parts.hostname, parts.port or 80
+        try:
+            stats, elapsed = asyncio.run(run_load(args, host, port))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "target": "spawn" if args.spawn else args.url,
+        "server_env": overrides,
+        "students": args.students,
+        "duration_s": args.duration,
+        "options": {k: getattr(args, k) for k in ("ramp", "rate", "flap_fraction", "burst_fraction",
+                                                   "batch_size", "compact", "heartbeat_interval", "storm_at", "seed")},
+        "summary": stats.summary(min(elapsed, args.duration), args.ramp),
+    }
+    print_results(results)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados salvos em: {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import posixpath
+import time
+from urllib.parse import urlsplit, unquote
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """
+    Decompõe e normaliza uma URL em (esquema, host, porta, caminho).
+    Retorna None para URLs sem host (about:blank, data:, etc.).
+    Usa o host real da URL, de modo que "https://ava.anchieta.br@evil.com/"
+    resulta em evil.com e não em ava.anchieta.br.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        host = parts.hostname
+        port = parts.port
+    except (ValueError, AttributeError):
+        return None
+    if not host:
+        return None
+    scheme = parts.scheme.lower()
+    host = host.rstrip(".")
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    if port is None:
+        port = DEFAULT_PORTS.get(scheme)
+
+    path = unquote(parts.path or "/")
+    trailing = path.endswith("/")
+    path = posixpath.normpath(path)
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/")
+    if trailing and path != "/":
+        path += "/"
+    return scheme, host, port, path
+
+
+class _HostNode:
+    __slots__ = ("children", "exact", "subdomains")
+
+    def __init__(self):
+        self.children = {}
+        self.exact = None       # {(esquema, porta): {prefixos}} para o próprio host
+        self.subdomains = None  # idem, para entradas "*.host"
+
+
+class ExamAllowList:
+    """
+    Lista de URLs permitidas compilada a partir de `exam_domains`.
+
+    Cada entrada vira (esquema, host, porta, prefixo de caminho). Os hosts
+    ficam em uma trie por rótulos invertidos (br -> anchieta -> ava), então
+    "https://ava.anchieta.br.evil.com" não casa com "https://ava.anchieta.br/".
+    Entradas "https://*.dominio/" permitem também subdomínios. Os prefixos de
+    caminho casam em limite de segmento ("/prova" aceita "/prova" e
+    "/prova/x", mas não "/provas"). O custo da consulta depende do número de
+    rótulos do host e de segmentos do caminho, não do tamanho da lista.
+    """
+
+    def __init__(self, prefixes=()):
+        self.config_path = None
+        self.key = "exam_domains"
+        self._config_mtime = None
+        self._next_reload_check = 0.0
+        self.reload_check_interval = 5.0
+        self.compile(prefixes)
+
+    @classmethod
+    def from_config(cls, path, key="exam_domains"):
+        allow_list = cls()
+        allow_list.config_path = path
+        allow_list.key = key
+        allow_list.reload_if_changed(force=True)
+        return allow_list
+
+    def compile(self, prefixes):
+        root = _HostNode()
+        markers = []
+        for prefix in prefixes:
+            wildcard = "://*." in prefix
+            parsed = normalize_url(prefix.replace("://*.", "://", 1))
+            if parsed is None:
+                logging.warning(f"Entrada inválida em exam_domains: {prefix}")
+                continue
+            scheme, host, port, path = parsed
+            node = root
+            for label in reversed(host.split(".")):
+                node = node.children.setdefault(label, _HostNode())
+            table_name = "subdomains" if wildcard else "exact"
+            table = getattr(node, table_name)
+            if table is None:
+                table = {}
+                setattr(node, table_name, table)
+            paths = table.setdefault((scheme, port), set())
+            paths.add(path.rstrip("/") if path != "/" else "/")
+            markers.append(host)
+        # Troca atômica: consultas em andamento continuam com a versão antiga
+        self._root = root
+        self.prefixes = list(prefixes)
+        self.title_markers = [m.lower() for m in dict.fromkeys(markers)]
+
+    @staticmethod
+    def _path_candidates(path):
+        """
+        Prefixos do caminho em limite de segmento: "/a/b" -> "/", "/a", "/a/b"
+        """
+        yield "/"
+        end = path.find("/", 1)
+        while end != -1:
+            yield path[:end]
+            end = path.find("/", end + 1)
+        if path != "/":
+            yield path.rstrip("/")
+
+    @classmethod
+    def _path_allowed(cls, table, scheme, port, path):
+        if not table:
+            return False
+        paths = table.get((scheme, port))
+        if not paths:
+            return False
+        return any(candidate in paths for candidate in cls._path_candidates(path))
+
+    def url_is_allowed(self, url):
+        if not url:
+            return False
+        parsed = normalize_url(url)
+        if parsed is None:
+            return False
+        scheme, host, port, path = parsed
+        labels = host.split(".")
+        node = self._root
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.children.get(label)
+            if node is None:
+                return False
+            # "*.dominio" vale apenas para subdomínios estritos
+            if depth < len(labels) and self._path_allowed(node.subdomains, scheme, port, path):
+                return True
+        return self._path_allowed(node.exact, scheme, port, path)
+
+    def title_is_allowed(self, title):
+        """
+        Fallback por título: o título contém o host de alguma entrada
+        """
+        if not title:
+            return False
+        title = title.lower()
+        return any(marker in title for marker in self.title_markers)
+
+    def reload_if_changed(self, force=False):
+        """
+        Recarrega a lista do arquivo de configuração quando ele muda.
+        A verificação (um stat) é limitada a uma vez a cada
+        reload_check_interval segundos.
+        """
+        if not self.config_path:
+            return False
+        now = time.monotonic()
+        if not force and now < self._next_reload_check:
+            return False
+        self._next_reload_check = now + self.reload_check_interval
+        try:
+            stat = os.stat(self.config_path)
+            mtime = (stat.st_mtime_ns, stat.st_size)
+            if not force and mtime == self._config_mtime:
+                return False
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                prefixes = json.load(f)[self.key]
+        except (OSError, ValueError, KeyError) as e:
+            # Mantém a lista atual se o arquivo estiver sendo editado/inválido
+            logging.error(f"Falha ao recarregar {self.config_path}: {e}")
+            return False
+        self._config_mtime = mtime
+        if prefixes != self.prefixes or force:
+            self.compile(prefixes)
+            if not force:
+                logging.info(f"Lista de URLs permitidas recarregada ({len(prefixes)} entradas)")
+        return True
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+
+import psutil
+
+
+class ProcessNameCache:
+    """
+    Cache pid -> (create_time, nome) para a janela ativa.
+
+    Ler o nome de um processo no Windows consulta o caminho da imagem e é a
+    parte cara de get_active_window_info. Como a janela em primeiro plano
+    quase nunca muda de processo, o nome é reaproveitado; a identidade
+    (pid, create_time) é conferida de novo ao mudar de janela ou a cada
+    `revalidate_interval` segundos, o que detecta um pid reaproveitado.
+    """
+
+    def __init__(self, max_entries=256, revalidate_interval=5.0):
+        self.max_entries = max_entries
+        self.revalidate_interval = revalidate_interval
+        # pid -> [create_time, nome, hwnd, próxima conferência]
+        self._entries = OrderedDict()
+
+    def name(self, pid, hwnd=None):
+        now = time.monotonic()
+        entry = self._entries.get(pid)
+        if entry is not None and entry[2] == hwnd and now < entry[3]:
+            self._entries.move_to_end(pid)
+            return entry[1]
+
+        proc = psutil.Process(pid)
+        create_time = proc.create_time()
+        if entry is not None and entry[0] == create_time:
+            name = entry[1]
+        else:
+            name = proc.name()
+        self._entries[pid] = [create_time, name, hwnd, now + self.revalidate_interval]
+        self._entries.move_to_end(pid)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return name
+
+    def clear(self):
+        self._entries.clear()
+
+
+class VerdictCache:
+    """
+    LRU pequeno com as decisões do monitor, chaveado por (modo, hwnd,
+    processo, título, URLs). Uma janela ativa que não mudou desde a última
+    iteração custa uma consulta em dicionário em vez de refazer a
+    normalização e a validação das URLs.
+
+    As entradas expiram após `ttl` segundos, para que a reavaliação
+    periódica ainda refaça o caminho completo (no modo selenium a URL não
+    faz parte da chave), e o cache é limpo quando a lista de URLs muda.
+    """
+
+    def __init__(self, max_entries=64, ttl=5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # chave -> (expira_em, veredito)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, verdict):
+        self._entries[key] = (time.monotonic() + self.ttl, verdict)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
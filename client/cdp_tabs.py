@@ -0,0 +1,141 @@
+import json
+import logging
+import threading
+
+# Sufixos que o navegador acrescenta ao título da janela
+WINDOW_TITLE_SUFFIXES = (
+    " - Google Chrome",
+    " - Microsoft\u200b Edge",  # o Edge usa um espaço de largura zero
+    " - Microsoft Edge",
+)
+
+
+def strip_browser_suffix(title):
+    title = (title or "").strip()
+    for suffix in WINDOW_TITLE_SUFFIXES:
+        if title.endswith(suffix):
+            return title[: -len(suffix)].strip()
+    return title
+
+
+class CdpTabTracker:
+    """
+    Mantém um índice em memória das abas abertas do Chrome a partir do
+    websocket do DevTools (CDP), sem passar pelo WebDriver.
+
+    Após Target.setDiscoverTargets, o Chrome envia Target.targetCreated para
+    cada alvo existente e depois targetInfoChanged/targetDestroyed a cada
+    mudança. Uma thread leitora aplica esses eventos ao índice; resolver a
+    aba ativa vira uma consulta em dicionário (título -> URLs) e não altera
+    a aba ativa do navegador.
+    """
+
+    def __init__(self, debug_addr, timeout=5.0):
+        self.debug_addr = debug_addr
+        self.timeout = timeout
+        self._ws = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._targets = {}   # targetId -> (título, url)
+        self._by_title = {}  # título -> {targetId: url}
+        self._next_id = 0
+        self.connected = False
+
+    def _browser_ws_url(self):
+        import urllib.request  # adiado: só é preciso ao conectar
+
+        with urllib.request.urlopen(f"http://{self.debug_addr}/json/version", timeout=self.timeout) as resp:
+            return json.load(resp)["webSocketDebuggerUrl"]
+
+    def connect(self):
+        if self.connected:
+            return
+        import websocket  # só carregado quando há Chrome para conectar
+
+        # suppress_origin: o Chrome recusa websockets com Origin não autorizado
+        self._ws = websocket.create_connection(
+            self._browser_ws_url(), timeout=self.timeout, suppress_origin=True
+        )
+        try:
+            self._ws.settimeout(None)
+            with self._lock:
+                self._targets.clear()
+                self._by_title.clear()
+            self._send("Target.setDiscoverTargets", {"discover": True})
+        except Exception:
+            # Só fica conectado com a descoberta de abas ativa
+            self.close()
+            raise
+        self.connected = True
+        self._thread = threading.Thread(target=self._read_loop, name="cdp-tabs", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.connected = False
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+            self._ws = None
+
+    def _send(self, method, params=None):
+        self._next_id += 1
+        self._ws.send(json.dumps({"id": self._next_id, "method": method, "params": params or {}}))
+
+    def _read_loop(self):
+        ws = self._ws
+        try:
+            while self.connected:
+                message = json.loads(ws.recv())
+                method = message.get("method")
+                if method in ("Target.targetCreated", "Target.targetInfoChanged"):
+                    self._upsert(message["params"]["targetInfo"])
+                elif method == "Target.targetDestroyed":
+                    self._remove(message["params"]["targetId"])
+        except Exception as e:
+            if self.connected:
+                logging.warning(f"Conexão CDP encerrada: {e}")
+        finally:
+            self.connected = False
+
+    # ------------- Índice de abas -------------
+    def _upsert(self, info):
+        if info.get("type") != "page":
+            return
+        target_id = info["targetId"]
+        title = (info.get("title") or "").strip()
+        url = info.get("url") or ""
+        with self._lock:
+            self._remove_locked(target_id)
+            self._targets[target_id] = (title, url)
+            self._by_title.setdefault(title, {})[target_id] = url
+
+    def _remove(self, target_id):
+        with self._lock:
+            self._remove_locked(target_id)
+
+    def _remove_locked(self, target_id):
+        old = self._targets.pop(target_id, None)
+        if old is None:
+            return
+        tabs = self._by_title.get(old[0])
+        if tabs is not None:
+            tabs.pop(target_id, None)
+            if not tabs:
+                del self._by_title[old[0]]
+
+    def tab_count(self):
+        return len(self._targets)
+
+    def find_urls(self, window_title):
+        """
+        Retorna as URLs das abas cujo título corresponde ao da janela ativa.
+        Mais de uma URL indica abas diferentes com o mesmo título.
+        """
+        with self._lock:
+            for title in (strip_browser_suffix(window_title), (window_title or "").strip()):
+                tabs = self._by_title.get(title)
+                if tabs:
+                    return list(tabs.values())
+        return []
@@ -0,0 +1,179 @@
+"""
+Topologia de telas com detecção barata de mudanças.
+
+Enumerar os monitores (EnumDisplayDevices + EnumDisplaySettings em cada
+dispositivo) é lento demais para rodar a cada iteração do monitor do aluno.
+Por isso a topologia guarda uma "impressão digital" barata — métricas da
+tela virtual, da tela primária e o número de monitores, obtidas com
+GetSystemMetrics — e só refaz a enumeração completa quando ela muda.
+
+Usado por client/monitor.py e por script_verification.py. Fica em client/
+porque o monitor é implantado sozinho nas máquinas dos alunos; o
+verificador, que roda da raiz do projeto, o importa daqui. A fonte dos
+dados é trocável: FakeDisplaySource permite simular monitores conectados e
+desconectados fora do Windows.
+"""
+from typing import Dict, List, Optional, Tuple
+
+# Índices de GetSystemMetrics
+SM_CXSCREEN = 0
+SM_CYSCREEN = 1
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+SM_CMONITORS = 80
+
+FINGERPRINT_METRICS = (SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN,
+                       SM_CYVIRTUALSCREEN, SM_CMONITORS, SM_CXSCREEN, SM_CYSCREEN)
+
+
+class Win32DisplaySource:
+    """
+    Fonte real, via pywin32
+    """
+
+    def __init__(self, win32api_module=None):
+        if win32api_module is None:
+            import win32api as win32api_module
+        self.win32api = win32api_module
+
+    def fingerprint(self) -> Tuple[int, ...]:
+        get = self.win32api.GetSystemMetrics
+        return tuple(get(index) for index in FINGERPRINT_METRICS)
+
+    def enumerate(self) -> List[Dict]:
+        """
+        Passagem completa pelos dispositivos de vídeo
+        """
+        import win32con
+
+        monitors = []
+        device_index = 0
+        while True:
+            try:
+                device = self.win32api.EnumDisplayDevices(None, device_index)
+            except Exception:
+                break  # sem mais dispositivos
+            if not device:
+                break
+            try:
+                settings = self.win32api.EnumDisplaySettings(device.DeviceName, win32con.ENUM_CURRENT_SETTINGS)
+            except Exception:
+                settings = None
+            if settings:
+                monitors.append({
+                    "device_name": device.DeviceName,
+                    "device_string": device.DeviceString,
+                    "left": settings.Position_x,
+                    "top": settings.Position_y,
+                    "width": settings.PelsWidth,
+                    "height": settings.PelsHeight,
+                    "bits_per_pixel": settings.BitsPerPel,
+                    "frequency": settings.DisplayFrequency,
+                    "is_primary": settings.Position_x == 0 and settings.Position_y == 0
+                })
+            else:
+                # Se não conseguir obter settings, adiciona informação básica
+                monitors.append({
+                    "device_name": device.DeviceName,
+                    "device_string": device.DeviceString,
+                    "info": "Active display device detected"
+                })
+            device_index += 1
+        return monitors
+
+
+class FakeDisplaySource:
+    """
+    Fonte simulada: monitores lado a lado em 1920x1080. set_monitors()
+    "conecta" ou "desconecta" telas. `enumerations` conta as passagens completas.
+    """
+
+    def __init__(self, monitors: int = 1, width: int = 1920, height: int = 1080):
+        self.width = width
+        self.height = height
+        self.monitors = monitors
+        self.enumerations = 0
+
+    def set_monitors(self, monitors: int):
+        self.monitors = monitors
+
+    def fingerprint(self) -> Tuple[int, ...]:
+        return (0, 0, self.width * self.monitors, self.height, self.monitors, self.width, self.height)
+
+    def enumerate(self) -> List[Dict]:
+        self.enumerations += 1
+        return [{
+            "device_name": f"\\\\.\\DISPLAY{index + 1}",
+            "device_string": "Simulated Display",
+            "left": self.width * index,
+            "top": 0,
+            "width": self.width,
+            "height": self.height,
+            "bits_per_pixel": 32,
+            "frequency": 60,
+            "is_primary": index == 0
+        } for index in range(self.monitors)]
+
+
+class DisplaySnapshot:
+    """
+    Estado imutável da topologia em um instante
+    """
+
+    __slots__ = ("fingerprint", "monitors", "total_monitors", "has_secondary_screens")
+
+    def __init__(self, fingerprint: Tuple[int, ...], monitors: List[Dict]):
+        self.fingerprint = fingerprint
+        self.monitors = tuple(monitors)
+        # Dispositivos desconectados aparecem sem largura; SM_CMONITORS
+        # cobre adaptadores que a enumeração não descreve (inclusive quando
+        # ela não traz nenhum dispositivo ativo)
+        active = sum(1 for m in monitors if m.get("width", 0) > 0)
+        self.total_monitors = max(active, fingerprint[4])
+        self.has_secondary_screens = self.total_monitors > 1
+
+    @property
+    def primary_resolution(self) -> Tuple[int, int]:
+        return self.fingerprint[5], self.fingerprint[6]
+
+    @property
+    def virtual_screen(self) -> Dict:
+        x, y, width, height = self.fingerprint[:4]
+        return {"x": x, "y": y, "width": width, "height": height}
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_monitors": self.total_monitors,
+            "has_secondary_screens": self.has_secondary_screens,
+            "primary_resolution": "{}x{}".format(*self.primary_resolution),
+            "virtual_screen_info": self.virtual_screen,
+        }
+
+
+class DisplayTopology:
+    """
+    Mantém o último DisplaySnapshot. refresh() consulta só a impressão
+    digital e refaz a enumeração completa apenas quando ela mudou.
+    """
+
+    def __init__(self, source=None):
+        self.source = source if source is not None else Win32DisplaySource()
+        self.snapshot: Optional[DisplaySnapshot] = None
+        self.enumerations = 0
+
+    def refresh(self, force: bool = False) -> Tuple[DisplaySnapshot, bool]:
+        """
+        Retorna (snapshot atual, mudou desde a chamada anterior)
+        """
+        fingerprint = self.source.fingerprint()
+        if not force and self.snapshot is not None and fingerprint == self.snapshot.fingerprint:
+            return self.snapshot, False
+        self.enumerations += 1
+        previous = self.snapshot
+        self.snapshot = DisplaySnapshot(fingerprint, self.source.enumerate())
+        changed = previous is not None and (
+            previous.fingerprint != fingerprint or previous.monitors != self.snapshot.monitors
+        )
+        return self.snapshot, changed
@@ -0,0 +1,192 @@
+import ctypes
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+# Constantes de SetWinEventHook (winuser.h)
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+WM_QUIT = 0x0012
+
+
+class ForegroundSource:
+    """
+    Interface das fontes de mudança de janela em primeiro plano.
+
+    O loop do monitor chama wait(timeout), que retorna True quando algo mudou
+    (janela ativa ou título) e False quando o tempo esgotou sem mudanças; em
+    ambos os casos current() devolve (hwnd, nome_do_processo, título).
+    """
+
+    running = True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.running = False
+
+    def wait(self, timeout):
+        raise NotImplementedError
+
+    def current(self):
+        raise NotImplementedError
+
+
+class PollingForegroundSource(ForegroundSource):
+    """
+    Fonte por amostragem: acorda a cada `interval` segundos (comportamento antigo)
+    """
+
+    def __init__(self, probe, interval):
+        self.probe = probe
+        self.interval = interval
+
+    def wait(self, timeout):
+        time.sleep(min(self.interval, timeout))
+        return True
+
+    def current(self):
+        return self.probe()
+
+
+class WinEventForegroundSource(ForegroundSource):
+    """
+    Fonte orientada a eventos no Windows, via SetWinEventHook.
+
+    Uma thread dedicada registra ganchos para EVENT_SYSTEM_FOREGROUND (troca
+    de janela ativa) e EVENT_OBJECT_NAMECHANGE (mudança de título, filtrada
+    para a janela em primeiro plano) e roda o laço de mensagens exigido pelos
+    ganchos fora de contexto. O callback apenas sinaliza um Event; a consulta
+    da janela é feita pelo loop do monitor, que fica parado (sem consumo de
+    CPU) até a próxima mudança.
+    """
+
+    def __init__(self, probe):
+        if sys.platform != "win32":
+            raise RuntimeError("WinEvent hooks só estão disponíveis no Windows")
+        self.probe = probe
+        self._changed = threading.Event()
+        self._ready = threading.Event()
+        self._thread = None
+        self._thread_id = None
+        self._error = None
+        self._callback = None  # referência mantida para o ctypes não liberar
+
+    def start(self):
+        self._thread = threading.Thread(target=self._hook_loop, name="winevent-hook", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        if self._error is not None:
+            raise RuntimeError(f"Falha ao registrar WinEvent hook: {self._error}")
+
+    def stop(self):
+        self.running = False
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self._changed.set()
+
+    def wait(self, timeout):
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+    def current(self):
+        return self.probe()
+
+    def _hook_loop(self):
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD,
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.GetForegroundWindow.restype = wintypes.HWND
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, event_time):
+            if event == EVENT_SYSTEM_FOREGROUND:
+                self._changed.set()
+            elif id_object == OBJID_WINDOW and hwnd and hwnd == user32.GetForegroundWindow():
+                self._changed.set()
+
+        self._callback = WinEventProc(on_event)
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND,
+                                   0, self._callback, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE,
+                                   0, self._callback, 0, 0, flags),
+        ]
+        if not all(hooks):
+            self._error = ctypes.WinError()
+            self._ready.set()
+            return
+
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        self._ready.set()
+        msg = wintypes.MSG()
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in hooks:
+                user32.UnhookWinEvent(hook)
+
+
+class ScriptedForegroundSource(ForegroundSource):
+    """
+    Fonte falsa para testes fora do Windows.
+
+    Reproduz um roteiro de (atraso_em_segundos, hwnd, processo, título): cada
+    entrada vira a janela ativa depois do seu atraso. O tempo é simulado pela
+    função `sleep` (use lambda s: None para rodar instantaneamente). Quando o
+    roteiro termina, `running` passa a False e o loop do monitor encerra.
+    """
+
+    def __init__(self, script, sleep=time.sleep):
+        self._script = deque(script)
+        self._sleep = sleep
+        self._current = (None, None, None)
+
+    def wait(self, timeout):
+        if not self._script:
+            self.running = False
+            return False
+        delay = self._script[0][0]
+        if delay > timeout:
+            # Nada muda dentro do timeout: apenas a re-checagem periódica
+            self._sleep(timeout)
+            head = self._script.popleft()
+            self._script.appendleft((delay - timeout,) + tuple(head[1:]))
+            return False
+        self._sleep(delay)
+        _, hwnd, proc_name, title = self._script.popleft()
+        self._current = (hwnd, proc_name, title)
+        return True
+
+    def current(self):
+        return self._current
+
+
+def create_foreground_source(kind, probe, poll_interval):
+    """
+    Cria a fonte configurada; sem suporte a ganchos, recai na amostragem
+    """
+    if kind == "winevent":
+        try:
+            source = WinEventForegroundSource(probe)
+            source.start()
+            return source
+        except Exception as e:
+            logging.warning(f"WinEvent hook indisponível, usando amostragem. Detalhe: {e}")
+    source = PollingForegroundSource(probe, poll_interval)
+    source.start()
+    return source
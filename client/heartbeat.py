@@ -0,0 +1,69 @@
+import logging
+import threading
+
+
+def heartbeat_url_for(server_url):
+    """
+    Deriva a URL de heartbeat (/heartbeat) a partir da URL de alerta
+    """
+    stripped = server_url.rstrip("/")
+    for suffix in ("/alertas", "/alerta"):
+        if stripped.endswith(suffix):
+            return stripped[:-len(suffix)] + "/heartbeat"
+    return stripped + "/heartbeat"
+
+
+class HeartbeatSender:
+    """
+    Envia um sinal de vida ao servidor a cada `interval` segundos, com o
+    estado atual do monitor ("ok" ou "violation"). Permite ao servidor
+    distinguir um aluno em conformidade de um monitor encerrado.
+
+    Heartbeats não vão para o spool: um sinal perdido é substituído pelo
+    próximo, e o servidor só marca o aluno offline após vários intervalos.
+    """
+
+    def __init__(self, server_url, student_id, status_fn, class_id=None,
+                 interval=5.0, timeout=3.0):
+        self.url = heartbeat_url_for(server_url)
+        self.student_id = student_id
+        self.class_id = class_id
+        self.status_fn = status_fn
+        self.interval = interval
+        self.timeout = timeout
+        self._failures = 0
+        self._stop = threading.Event()
+        self._session = None
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def send(self):
+        payload = {
+            "student_id": self.student_id,
+            "class_id": self.class_id,
+            "status": self.status_fn(),
+        }
+        if self._session is None:
+            import requests  # carregado na thread de heartbeat, não na inicialização
+            self._session = requests.Session()
+        resp = self._session.post(self.url, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.send()
+                if self._failures:
+                    logging.info(f"Heartbeat restabelecido após {self._failures} falha(s)")
+                self._failures = 0
+            except Exception as e:
+                self._failures += 1
+                # Registra só a primeira falha de uma sequência para não inundar o log
+                if self._failures == 1:
+                    logging.warning(f"Falha ao enviar heartbeat: {e}")
+            self._stop.wait(self.interval)
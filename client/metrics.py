@@ -0,0 +1,167 @@
+import bisect
+import json
+import logging
+import threading
+import time
+
+# Limites superiores (ms) dos baldes dos histogramas; o último é "acima disso"
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências com baldes fixos: registrar é um bisect e um
+    incremento, sem guardar as amostras. Percentis são estimados pelo limite
+    superior do balde.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total_ms", "max_ms")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, fraction: float):
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                (f"le_{bound:g}" if index < len(self.bounds) else "inf"): count
+                for index, (bound, count) in enumerate(zip(self.bounds + (None,), self.counts))
+            },
+        }
+
+
+class _StageTimer:
+    """
+    Cronômetro reutilizável de uma etapa (um por etapa, sem alocação por uso)
+    """
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe((time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class LoopMetrics:
+    """
+    Instrumentação do loop de monitoramento: um histograma por etapa,
+    duração total de cada iteração e contagem de prazos perdidos (iterações
+    mais longas que `deadline` segundos, o poll_interval_sec).
+
+    Feito para o caminho quente: a thread do loop só faz perf_counter(),
+    bisect e incrementos. Leituras (resumo no log, endpoint JSON) são
+    cópias aproximadas, sem lock.
+    """
+
+    STAGES = ("window_info", "tab_match", "url_check", "screens", "send_alert")
+
+    def __init__(self, deadline: float, summary_interval: float = 60.0):
+        self.deadline = deadline
+        self.summary_interval = summary_interval
+        self.started_at = time.time()
+        self.iterations = 0
+        self.missed_deadlines = 0
+        self.iteration = LatencyHistogram()
+        self.stages = {name: LatencyHistogram() for name in self.STAGES}
+        self._timers = {name: _StageTimer(hist) for name, hist in self.stages.items()}
+        self._next_summary = time.monotonic() + summary_interval
+
+    def stage(self, name: str) -> _StageTimer:
+        return self._timers[name]
+
+    def finish_iteration(self, seconds: float):
+        self.iterations += 1
+        self.iteration.observe(seconds * 1000)
+        if seconds > self.deadline:
+            self.missed_deadlines += 1
+
+    def summary_due(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_summary:
+            return False
+        self._next_summary = now + self.summary_interval
+        return True
+
+    def summary_line(self) -> str:
+        parts = [f"[MÉTRICAS] iterações={self.iterations} prazos_perdidos={self.missed_deadlines} "
+                 f"(> {self.deadline * 1000:g} ms)"]
+        for name, hist in (("iteração", self.iteration),) + tuple(self.stages.items()):
+            if hist.count:
+                parts.append(f"{name}: p50={hist.percentile(0.5):g} p95={hist.percentile(0.95):g} "
+                             f"max={hist.max_ms:.1f} ms n={hist.count}")
+        return " | ".join(parts)
+
+    def snapshot(self):
+        return {
+            "started_at": self.started_at,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "deadline_ms": self.deadline * 1000,
+            "iterations": self.iterations,
+            "missed_deadlines": self.missed_deadlines,
+            "iteration": self.iteration.to_dict(),
+            "stages": {name: hist.to_dict() for name, hist in self.stages.items()},
+        }
+
+
+def serve_metrics(metrics: LoopMetrics, port: int, host: str = "127.0.0.1"):
+    """
+    Endpoint JSON local (GET /metrics) com o snapshot das métricas, em uma
+    thread de fundo. Escuta apenas em localhost por padrão.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # não polui o monitor.log a cada consulta
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info(f"Métricas do loop em http://{host}:{port}/metrics")
+    return server
@@ -1,24 +1,33 @@
 import json
+import random
+import threading
 import time
 import logging
 import os
 import sys
 from datetime import datetime
 
-import psutil
-import requests
+from allowlist import ExamAllowList
+from caches import ProcessNameCache, VerdictCache
+from cdp_tabs import CdpTabTracker
+from display_topology import DisplayTopology
+from foreground import create_foreground_source
+from heartbeat import HeartbeatSender
+from metrics import LoopMetrics, serve_metrics
+from outbox import AlertOutbox
 
 # --- Windows APIs ---
-import win32gui
-import win32process
-
-# --- Selenium attach ao Chrome com DevTools ---
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.common.exceptions import WebDriverException
+try:
+    import win32gui
+    import win32process
+except ImportError:
+    # Fora do Windows o loop ainda pode rodar com uma fonte roteirizada
+    win32gui = win32process = None
 
 # ------------- Util -------------
-def load_config(path="config.json"):
+CONFIG_PATH = "config.json"
+
+def load_config(path=CONFIG_PATH):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -34,6 +43,9 @@ def now_iso():
     return datetime.utcnow().isoformat() + "Z"
 
 # ------------- Janela ativa -------------
+# Nome do processo por pid, reaproveitado enquanto a janela ativa não muda
+process_names = ProcessNameCache()
+
 def get_active_window_info():
     hwnd = win32gui.GetForegroundWindow()
     if not hwnd:
@@ -41,8 +53,7 @@ def get_active_window_info():
     title = win32gui.GetWindowText(hwnd)
     try:
         _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        proc = psutil.Process(pid)
-        pname = proc.name()
+        pname = process_names.name(pid, hwnd)
     except Exception:
         pname = None
         pid = None
@@ -50,13 +61,41 @@ def get_active_window_info():
 
 # ------------- Selenium/CDP -------------
 class ChromeAttach:
-    def __init__(self, debug_addr):
+    """
+    Acesso às abas do Chrome. Dois modos:
+      - "selenium": WebDriver anexado à instância com DevTools; a aba ativa é
+        encontrada trocando de aba até o título bater (lento com muitas abas)
+      - "cdp": websocket do DevTools com índice de abas mantido por eventos;
+        resolver a aba ativa é uma consulta em dicionário
+    """
+    def __init__(self, debug_addr, mode="selenium"):
         self.debug_addr = debug_addr
+        self.mode = mode
         self.driver = None
+        self.tracker = CdpTabTracker(debug_addr) if mode == "cdp" else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def connected(self):
+        if self.tracker is not None:
+            return self.tracker.connected
+        return self.driver is not None
 
     def connect(self):
+        if self.tracker is not None:
+            try:
+                self.tracker.connect()
+            except Exception as e:
+                raise RuntimeError(f"Falha ao conectar ao DevTools do Chrome: {e}")
+            return
         if self.driver:
             return
+        # Importado só aqui: o selenium é pesado e o modo cdp não precisa dele
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        from selenium.common.exceptions import WebDriverException
+
         opts = ChromeOptions()
         # Conecta em uma instância existente do Chrome com DevTools
         opts.debugger_address = self.debug_addr
@@ -65,6 +104,66 @@ class ChromeAttach:
         except WebDriverException as e:
             raise RuntimeError(f"Falha ao anexar ao Chrome: {e}")
 
+    def disconnect(self):
+        """
+        Descarta a conexão atual; a thread de conexão tenta de novo
+        """
+        if self.tracker is not None:
+            self.tracker.close()
+            return
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def start_background(self, initial_backoff=1.0, max_backoff=60.0, check_interval=2.0):
+        """
+        Conecta ao Chrome em uma thread de fundo, sem atrasar o início do
+        monitoramento: enquanto não houver conexão, o monitor usa a validação
+        por título. Falhas são repetidas com backoff exponencial e, se a
+        conexão cair no meio da prova, ela é refeita.
+        """
+        self._thread = threading.Thread(
+            target=self._attach_loop, args=(initial_backoff, max_backoff, check_interval),
+            name="chrome-attach", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.disconnect()
+
+    def _attach_loop(self, initial_backoff, max_backoff, check_interval):
+        backoff = initial_backoff
+        failures = 0
+        was_connected = False
+        while not self._stop.is_set():
+            if self.connected:
+                self._stop.wait(check_interval)
+                continue
+            if was_connected:
+                logging.warning("Conexão com o Chrome perdida; validação por título até reconectar")
+                self.disconnect()
+                was_connected = False
+            try:
+                self.connect()
+            except Exception as e:
+                failures += 1
+                delay = backoff * random.uniform(0.5, 1.0)
+                # Só a primeira falha de uma sequência vai como aviso
+                log = logging.warning if failures == 1 else logging.debug
+                log(f"Chrome indisponível ({e}); nova tentativa em {delay:.1f}s")
+                backoff = min(backoff * 2, max_backoff)
+                self._stop.wait(delay)
+                continue
+            logging.info(f"Conectado ao Chrome em {self.debug_addr} (modo {self.mode})"
+                         + (f" após {failures} tentativa(s)" if failures else ""))
+            was_connected = True
+            failures = 0
+            backoff = initial_backoff
+
     def get_tabs(self):
         if not self.driver:
             return []
@@ -89,112 +188,172 @@ class ChromeAttach:
     def switch_to(self, handle):
         self.driver.switch_to.window(handle)
 
+    def resolve_active_tab(self, active_title):
+        """
+        Retorna (encontrou, urls) da aba correspondente ao título da janela ativa
+        """
+        if self.tracker is not None:
+            urls = self.tracker.find_urls(active_title)
+            return bool(urls), urls
+
+        # Modo selenium: tenta achar a aba do Chrome que corresponde ao título ativo
+        try:
+            handles = self.get_tabs()
+        except Exception as e:
+            # O driver não responde (Chrome fechado ou reiniciado): a thread
+            # de conexão reanexa em segundo plano
+            logging.warning(f"Erro ao iterar abas: {e}")
+            self.disconnect()
+            return False, []
+        for h in handles:
+            try:
+                self.switch_to(h)
+                t = self.get_tab_title()
+                # Se o título da janela ativa bate com o da aba, assumimos que é a aba focada
+                if t and active_title and t.strip() == active_title.strip():
+                    return True, [self.get_tab_url()]
+            except Exception:
+                continue
+        return False, []
+
 # ------------- Lógica principal -------------
-def url_is_allowed(url, allowed_prefixes):
-    if not url:
-        return False
-    url_lower = url.lower()
-    for p in allowed_prefixes:
-        if url_lower.startswith(p.lower()):
-            return True
-    return False
-
-def title_is_allowed(title, browsers_allowed_markers):
-    if not title:
-        return False
-    # Estratégia simples: permitir quando o título aparenta ser da plataforma (fallback)
-    return any(marker.lower() in title.lower() for marker in browsers_allowed_markers)
-
-def send_alert(server_url, student_id, reason, extra=None):
+def send_alert(outbox, student_id, reason, extra=None, class_id=None):
     payload = {
         "student_id": student_id,
         "timestamp": now_iso(),
         "reason": reason,
         "extra": extra or {}
     }
-    try:
-        resp = requests.post(server_url, json=payload, timeout=5)
-        logging.info(f"Alerta enviado: {payload} | resp={resp.status_code}")
-    except Exception as e:
-        logging.error(f"Falha ao enviar alerta: {e}")
+    if class_id:
+        # Permite aos painéis filtrarem os alertas por turma
+        payload["class_id"] = class_id
+    # Apenas enfileira: o envio acontece na thread da caixa de saída
+    outbox.enqueue(payload)
+    logging.info(f"Alerta enfileirado: {payload}")
 
-def main():
-    cfg = load_config()
-    setup_logging(cfg.get("log_file", "monitor.log"))
+class ExamMonitor:
+    """
+    Avalia a janela em primeiro plano e dispara alertas nas transições
+    de "dentro do exame" para "fora do exame". Com `display` (uma
+    DisplayTopology), também alerta quando uma tela secundária é conectada.
+    """
+    def __init__(self, cfg, chrome, outbox, allow_list=None, metrics=None, display=None):
+        self.student_id = cfg["student_id"]
+        self.class_id = cfg.get("class_id")
+        # Lista de URLs permitidas, compilada uma vez (e recarregável)
+        self.allow_list = allow_list or ExamAllowList(cfg["exam_domains"])
+        self.browsers_allowed = [x.lower() for x in cfg.get("browsers_allowed", ["chrome.exe", "msedge.exe"])]
+        self.recheck_interval = float(cfg.get("recheck_interval_sec", 5.0))
+        self.chrome = chrome
+        self.outbox = outbox
+        # Tempo por etapa e prazos perdidos (iteração > poll_interval_sec)
+        self.metrics = metrics or LoopMetrics(
+            deadline=float(cfg.get("poll_interval_sec", 1.0)),
+            summary_interval=float(cfg.get("metrics_log_interval_sec", 60.0)),
+        )
 
-    student_id = cfg["student_id"]
-    allowed_domains = cfg["exam_domains"]
-    poll = float(cfg.get("poll_interval_sec", 1.0))
-    server_url = cfg["server_url"]
-    browsers_allowed = [x.lower() for x in cfg.get("browsers_allowed", ["chrome.exe", "msedge.exe"])]
-    chrome_debug_addr = cfg.get("chrome_debug_address", "127.0.0.1:9222")
+        # Decisões recentes por (modo, janela, processo, título, URLs)
+        self.verdicts = VerdictCache(ttl=self.recheck_interval)
 
-    # Para fallback por título (quando não der pra pegar URL real),
-    # considere adicionar um marcador do domínio no título (se aplicável).
-    title_markers = [u.replace("https://", "").replace("http://", "").split("/")[0] for u in allowed_domains]
+        self.last_state_ok = None  # pra evitar alertar em loop quando estado não muda
 
-    # Tenta conectar ao Chrome (URL real)
-    chrome = ChromeAttach(chrome_debug_addr)
-    cdp_ok = True
-    try:
-        chrome.connect()
-        logging.info(f"Conectado ao Chrome em {chrome_debug_addr}")
-    except Exception as e:
-        logging.warning(f"CDP indisponível, usando fallback por título. Detalhe: {e}")
-        cdp_ok = False
-
-    last_state_ok = None  # pra evitar alertar em loop quando estado não muda
+        # No modo cdp o título da janela pode mudar (WinEvent) antes de o CDP
+        # atualizar o índice de abas: uma janela do Chrome sem aba correspondente
+        # só vira violação se continuar assim por cdp_settle_sec
+        self.cdp_settle = float(cfg.get("cdp_settle_sec", 0.5))
+        self._cdp_miss_since = None
 
-    while True:
-        _, proc_name, active_title = get_active_window_info()
-        proc_name = (proc_name or "").lower()
+        # Topologia de telas: consulta barata a cada iteração, enumeração
+        # completa só quando algo muda
+        self.display = display
+        self.screen_check_interval = float(cfg.get("screen_check_interval_sec", 1.0))
+        self.last_screens_ok = None
+        self._display_failures = 0
 
-        # Está em um navegador permitido?
-        in_browser = proc_name in browsers_allowed
+    @property
+    def in_violation(self):
+        return self.last_state_ok is False or self.last_screens_ok is False
 
-        state_ok = False
-        current_url = None
+    def _evaluate(self, mode, in_browser, active_title, urls):
+        """
+        Decide se a janela ativa está no contexto da prova.
+        Retorna (permitido, url ou lista de urls da aba).
+        """
+        chrome = self.chrome
+        allow_list = self.allow_list
+        metrics = self.metrics
 
-        if in_browser and cdp_ok:
-            # Tente achar a aba do Chrome que corresponde ao título ativo
-            matched = False
-            try:
-                handles = chrome.get_tabs()
-                for h in handles:
-                    try:
-                        chrome.switch_to(h)
-                        t = chrome.get_tab_title()
-                        # Se o título da janela ativa bate com o da aba, assumimos que é a aba focada
-                        if t and active_title and t.strip() == active_title.strip():
-                            current_url = chrome.get_tab_url()
-                            matched = True
-                            break
-                    except Exception:
-                        continue
-            except Exception as e:
-                logging.warning(f"Erro ao iterar abas: {e}")
-                matched = False
+        if mode == "cdp":
+            if not urls:
+                # No modo cdp não há "aba atual do driver" para consultar
+                return False, None
+            # Abas distintas com o mesmo título: só é permitido se todas forem
+            with metrics.stage("url_check"):
+                state_ok = all(allow_list.url_is_allowed(u) for u in urls)
+            return state_ok, urls[0] if len(urls) == 1 else list(urls)
 
+        if mode == "selenium":
+            with metrics.stage("tab_match"):
+                matched, found = chrome.resolve_active_tab(active_title)
             if matched:
-                state_ok = url_is_allowed(current_url, allowed_domains)
-            else:
-                # Se não achou a aba pelo título, último recurso: checa URL da aba atual do driver
-                try:
+                with metrics.stage("url_check"):
+                    return allow_list.url_is_allowed(found[0]), found[0]
+            # Se não achou a aba pelo título, último recurso: checa URL da aba atual do driver
+            try:
+                with metrics.stage("tab_match"):
                     current_url = chrome.get_tab_url()
-                    state_ok = url_is_allowed(current_url, allowed_domains)
-                except Exception:
-                    state_ok = False
+                with metrics.stage("url_check"):
+                    return allow_list.url_is_allowed(current_url), current_url
+            except Exception:
+                return False, None
+
+        # Fallback: não deu pra usar CDP/URL real, valida por título
+        # (menos seguro, mas melhor que nada). Os marcadores são os hosts
+        # das entradas de exam_domains.
+        return in_browser and allow_list.title_is_allowed(active_title), None
 
+    def check(self, window_info):
+        hwnd, proc_name, active_title = window_info
+        proc_name = (proc_name or "").lower()
+        chrome = self.chrome
+        metrics = self.metrics
+        if self.allow_list.reload_if_changed():
+            self.verdicts.clear()
+
+        # Está em um navegador permitido?
+        in_browser = proc_name in self.browsers_allowed
+
+        # Chave da decisão: no modo cdp a URL da aba sai de uma consulta em
+        # dicionário e entra na chave; nos demais só a janela e o título
+        urls = None
+        if in_browser and chrome is not None and chrome.connected:
+            mode = "cdp" if chrome.tracker is not None else "selenium"
+            if mode == "cdp":
+                with metrics.stage("tab_match"):
+                    _, urls = chrome.resolve_active_tab(active_title)
+                urls = tuple(urls)
         else:
-            # Fallback: não deu pra usar CDP/URL real, valida por título
-            # (menos seguro, mas melhor que nada)
-            if in_browser:
-                state_ok = any(marker in (active_title or "").lower() for marker in [m.lower() for m in title_markers])
-            else:
-                state_ok = False
+            mode = "title"
+
+        if mode == "cdp" and not urls:
+            now = time.monotonic()
+            if self._cdp_miss_since is None:
+                self._cdp_miss_since = now
+            if now - self._cdp_miss_since < self.cdp_settle:
+                # Ainda sem confirmação: mantém o estado anterior e reavalia em seguida
+                return self.last_state_ok
+        else:
+            self._cdp_miss_since = None
+        key = (mode, hwnd, proc_name, active_title, urls)
+
+        verdict = self.verdicts.get(key)
+        if verdict is None:
+            verdict = self._evaluate(mode, in_browser, active_title, urls)
+            self.verdicts.put(key, verdict)
+        state_ok, current_url = verdict
 
         # Dispara alerta se saiu do permitido
-        if state_ok is False and last_state_ok is not False:
+        if state_ok is False and self.last_state_ok is not False:
             reason = "left_exam_context"
             extra = {
                 "proc": proc_name,
@@ -202,10 +361,142 @@ def main():
                 "url": current_url
             }
             logging.warning(f"[VIOLAÇÃO] Saiu da aba/sistema: {extra}")
-            send_alert(server_url, student_id, reason, extra)
+            with metrics.stage("send_alert"):
+                send_alert(self.outbox, self.student_id, reason, extra, class_id=self.class_id)
+
+        self.last_state_ok = state_ok
+        return state_ok
+
+    def check_screens(self):
+        metrics = self.metrics
+        try:
+            with metrics.stage("screens"):
+                snapshot, changed = self.display.refresh()
+        except Exception as e:
+            self._display_failures += 1
+            # Registra só a primeira falha de uma sequência para não inundar o log
+            if self._display_failures == 1:
+                logging.warning(f"Falha ao consultar a topologia de telas: {e}")
+            return self.last_screens_ok
+        self._display_failures = 0
+        if changed:
+            logging.info(f"Topologia de telas mudou: {snapshot.total_monitors} monitor(es)")
+
+        screens_ok = not snapshot.has_secondary_screens
+        if screens_ok is False and self.last_screens_ok is not False:
+            extra = {
+                "total_monitors": snapshot.total_monitors,
+                "monitors": [m.get("device_name") for m in snapshot.monitors if m.get("width", 0) > 0],
+                "virtual_screen": snapshot.virtual_screen,
+            }
+            logging.warning(f"[VIOLAÇÃO] Tela secundária detectada: {extra}")
+            with metrics.stage("send_alert"):
+                send_alert(self.outbox, self.student_id, "secondary_screen_detected", extra,
+                           class_id=self.class_id)
+
+        self.last_screens_ok = screens_ok
+        return screens_ok
 
-        last_state_ok = state_ok
-        time.sleep(poll)
+    def next_timeout(self, timeout):
+        """
+        Espera até a próxima iteração: encurtada enquanto uma janela do
+        Chrome sem aba correspondente aguarda confirmação
+        """
+        if self._cdp_miss_since is None:
+            return timeout
+        remaining = self._cdp_miss_since + self.cdp_settle - time.monotonic()
+        return min(timeout, max(0.05, remaining))
+
+    def iterate(self, source):
+        """
+        Uma iteração do loop: consulta a janela ativa e a avalia (e as
+        telas, se configurado), registrando o tempo de cada etapa
+        """
+        metrics = self.metrics
+        started = time.perf_counter()
+        with metrics.stage("window_info"):
+            window_info = source.current()
+        state_ok = self.check(window_info)
+        if self.display is not None:
+            self.check_screens()
+        metrics.finish_iteration(time.perf_counter() - started)
+        if metrics.summary_due():
+            logging.info(metrics.summary_line())
+        return state_ok
+
+    def run(self, source):
+        """
+        Reavalia a cada mudança informada pela fonte e, na falta de eventos,
+        a cada recheck_interval segundos (rede de segurança). Com a detecção
+        de telas ativa, a espera máxima cai para screen_check_interval.
+        """
+        timeout = self.recheck_interval
+        if self.display is not None:
+            timeout = min(timeout, self.screen_check_interval)
+        self.iterate(source)
+        while source.running:
+            source.wait(self.next_timeout(timeout))
+            if not source.running:
+                break
+            self.iterate(source)
+
+def main():
+    cfg = load_config()
+    setup_logging(cfg.get("log_file", "monitor.log"))
+
+    poll = float(cfg.get("poll_interval_sec", 1.0))
+    server_url = cfg["server_url"]
+    chrome_debug_addr = cfg.get("chrome_debug_address", "127.0.0.1:9222")
+    chrome_attach_mode = cfg.get("chrome_attach_mode", "selenium")
+
+    # Envio de alertas em segundo plano, com spool em disco
+    outbox = AlertOutbox(
+        server_url,
+        spool_path=cfg.get("spool_file", "alert_spool.ndjson"),
+        batch_size=int(cfg.get("alert_batch_size", 50)),
+        compact=cfg.get("alert_wire_format", "compact") == "compact",
+    )
+    outbox.start()
+
+    # Conecta ao Chrome (URL real) em segundo plano; até lá, fallback por título
+    chrome = ChromeAttach(chrome_debug_addr, mode=chrome_attach_mode)
+    chrome.start_background(max_backoff=float(cfg.get("chrome_reconnect_max_sec", 60.0)))
+
+    # Fonte de eventos de janela ativa ("winevent" ou "poll")
+    source = create_foreground_source(cfg.get("foreground_source", "poll"), get_active_window_info, poll)
+
+    # exam_domains é recarregado de config.json sem reiniciar o monitor
+    allow_list = ExamAllowList.from_config(CONFIG_PATH)
+
+    # Monitores conectados durante a prova (requer pywin32)
+    display = None
+    if cfg.get("detect_secondary_screens", True):
+        try:
+            display = DisplayTopology()
+        except ImportError:
+            logging.warning("pywin32 indisponível: detecção de telas secundárias desativada")
+
+    monitor = ExamMonitor(cfg, chrome, outbox, allow_list=allow_list, display=display)
+    if cfg.get("metrics_port"):
+        # Endpoint JSON local opcional com os histogramas do loop
+        serve_metrics(monitor.metrics, int(cfg["metrics_port"]))
+
+    # Sinal de vida periódico: o servidor marca o aluno offline se parar
+    heartbeat = HeartbeatSender(
+        server_url,
+        cfg["student_id"],
+        lambda: "violation" if monitor.in_violation else "ok",
+        class_id=cfg.get("class_id"),
+        interval=float(cfg.get("heartbeat_interval_sec", 5.0)),
+    )
+    heartbeat.start()
+    try:
+        monitor.run(source)
+    finally:
+        heartbeat.stop()
+        chrome.stop()
+        source.stop()
+        outbox.stop()
 
 if __name__ == "__main__":
     main()
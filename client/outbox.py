@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+
+from alert_wire import CONTENT_TYPE as BATCH_CONTENT_TYPE, encode_batch
+
+
+def bulk_url_for(server_url):
+    """
+    Deriva a URL de envio em lote (/alertas) a partir da URL de alerta único
+    """
+    stripped = server_url.rstrip("/")
+    if stripped.endswith("/alerta"):
+        return stripped + "s"
+    return None
+
+
+class AlertOutbox:
+    """
+    Caixa de saída de alertas com envio em segundo plano.
+
+    O loop de monitoramento apenas chama enqueue(), que grava o alerta no
+    spool em disco e retorna imediatamente. Uma thread de envio usa uma
+    requests.Session (conexão keep-alive) para despachar os alertas em lotes,
+    com backoff exponencial quando o servidor está indisponível.
+
+    O spool é um arquivo NDJSON só de acréscimo; um arquivo ".ack" guarda
+    quantos bytes do início do spool já foram confirmados pelo servidor.
+    Assim, alertas pendentes sobrevivem a reinícios do monitor sem
+    reescrever o spool a cada envio. Quando tudo é confirmado, os dois
+    arquivos são zerados. Uma última linha sem "\n" (queda no meio da
+    escrita) é cortada ao abrir o spool, para que o próximo alerta não seja
+    colado a ela.
+
+    Com `compact`, os lotes vão no formato compacto de alert_wire.py (NDJSON
+    com gzip, aluno e turma uma vez por lote). Se o servidor não o
+    aceitar (415, ou 400 antes do primeiro lote compacto aceito), o envio
+    volta a ser em JSON sem descartar o lote.
+
+    Um erro 4xx permanente recusa o lote inteiro por causa de um único
+    alerta inválido: o lote é dividido ao meio até isolá-lo, e só esse
+    alerta vai para a quarentena ("<spool>.rejected", NDJSON) em vez de ser
+    reenviado para sempre.
+    """
+
+    def __init__(self, server_url, spool_path="alert_spool.ndjson", batch_size=50,
+                 timeout=5.0, max_backoff=60.0, compact=True):
+        self.server_url = server_url
+        self.bulk_url = bulk_url_for(server_url)
+        self.spool_path = spool_path
+        self.ack_path = spool_path + ".ack"
+        self.rejected_path = spool_path + ".rejected"
+        self.batch_size = max(1, batch_size)
+        self._split_from = None  # batch_size antes de dividir um lote recusado
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.compact = compact
+        self._compact_confirmed = False
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._pending = deque()
+        self._pending_bytes = deque()  # bytes de cada pendente no spool (0 se não foi gravado)
+        self._acked = 0  # bytes do spool já confirmados
+        self._session = None  # criada na thread de envio (ver _http)
+        self._thread = threading.Thread(target=self._run, name="alert-outbox", daemon=True)
+
+        self._load_spool()
+
+    # ------------- Spool em disco -------------
+    def _read_ack(self):
+        try:
+            with open(self.ack_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _load_spool(self):
+        if not os.path.exists(self.spool_path):
+            return
+        with open(self.spool_path, "rb") as f:
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            # Última linha truncada por queda no meio da escrita
+            logging.warning("Linha incompleta removida do fim do spool de alertas")
+            with open(self.spool_path, "r+b") as f:
+                f.truncate(complete)
+            data = data[:complete]
+        self._acked = min(self._read_ack(), len(data))
+
+        carry = 0  # bytes de linhas inválidas, confirmados junto com o próximo alerta
+        position = self._acked
+        while position < len(data):
+            end = data.index(b"\n", position) + 1
+            line = data[position:end]
+            position = end
+            try:
+                payload = json.loads(line) if line.strip() else None
+            except ValueError:
+                logging.warning("Linha corrompida ignorada no spool de alertas")
+                payload = None
+            if payload is None:
+                carry += len(line)
+                continue
+            self._pending.append(payload)
+            self._pending_bytes.append(len(line) + carry)
+            carry = 0
+        if carry:
+            if self._pending_bytes:
+                self._pending_bytes[-1] += carry
+            else:
+                self._acked += carry
+        if self._pending:
+            logging.info(f"{len(self._pending)} alerta(s) pendente(s) recuperado(s) do spool")
+
+    def _append_spool(self, payload):
+        """
+        Acrescenta o alerta ao spool e retorna o número de bytes gravados
+        """
+        line = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.spool_path, "ab") as f:
+            position = f.tell()
+            try:
+                f.write(line)
+                f.flush()
+            except OSError:
+                # Não deixa meia linha para trás (ex.: disco cheio)
+                f.truncate(position)
+                raise
+        return len(line)
+
+    def _ack(self, count):
+        """
+        Marca os primeiros `count` alertas pendentes como entregues
+        """
+        with self._lock:
+            for _ in range(count):
+                self._pending.popleft()
+                self._acked += self._pending_bytes.popleft()
+            if not self._pending:
+                # Tudo entregue: zera o offset antes do spool, para que uma
+                # queda entre as duas escritas cause reenvio, nunca perda
+                self._acked = 0
+            with open(self.ack_path, "w", encoding="utf-8") as f:
+                f.write(str(self._acked))
+            if not self._pending:
+                open(self.spool_path, "w").close()
+
+    # ------------- API pública -------------
+    def start(self):
+        self._thread.start()
+        if self._pending:
+            self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def enqueue(self, payload):
+        """
+        Registra um alerta para envio. Nunca acessa a rede.
+        """
+        with self._lock:
+            try:
+                written = self._append_spool(payload)
+            except OSError as e:
+                # Sem spool o alerta ainda é enviado, só não sobrevive a reinício
+                logging.error(f"Falha ao gravar alerta no spool: {e}")
+                written = 0
+            self._pending.append(payload)
+            self._pending_bytes.append(written)
+        self._wakeup.set()
+
+    def _quarantine(self, payload, status_code):
+        logging.error(f"Alerta recusado pelo servidor ({status_code}), movido para "
+                      f"{self.rejected_path}: {payload}")
+        try:
+            with open(self.rejected_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logging.error(f"Falha ao gravar a quarentena de alertas: {e}")
+
+    # ------------- Envio -------------
+    def _http(self):
+        if self._session is None:
+            # requests é importado só na thread de envio, fora da inicialização do monitor
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def _send(self, batch):
+        """
+        Envia um lote e retorna (aceitos, segundos_para_nova_tentativa)
+        """
+        if self.bulk_url and len(batch) > 1:
+            if self.compact:
+                resp = self._http().post(self.bulk_url, data=encode_batch(batch), timeout=self.timeout,
+                                         headers={"Content-Type": BATCH_CONTENT_TYPE,
+                                                  "Content-Encoding": "gzip"})
+                if resp.status_code == 415 or (resp.status_code == 400 and not self._compact_confirmed):
+                    # Servidor sem o formato compacto: reenvia o mesmo lote em JSON
+                    logging.warning("Servidor sem suporte ao formato compacto; usando JSON")
+                    self.compact = False
+                    return 0, 0
+                if resp.ok:
+                    self._compact_confirmed = True
+            else:
+                resp = self._http().post(self.bulk_url, json=batch, timeout=self.timeout)
+            if resp.status_code in (404, 405):
+                # Servidor antigo sem /alertas: passa a enviar um por vez
+                logging.warning("Servidor sem envio em lote; usando /alerta")
+                self.bulk_url = None
+                return 0, 0
+        else:
+            batch = batch[:1]
+            resp = self._http().post(self.server_url, json=batch[0], timeout=self.timeout)
+
+        try:
+            accepted = int(resp.json().get("accepted", len(batch)))
+        except (ValueError, AttributeError):
+            accepted = len(batch) if resp.ok else 0
+        accepted = max(0, min(accepted, len(batch)))
+
+        if resp.ok:
+            return accepted, 0
+        if resp.status_code == 503 or resp.status_code == 429:
+            try:
+                retry_after = float(resp.headers.get("Retry-After", 1))
+            except ValueError:
+                retry_after = 1.0
+            return accepted, retry_after
+        if resp.status_code == 413 and len(batch) > 1:
+            self.batch_size = max(1, len(batch) // 2)
+            return 0, 0
+        if 400 <= resp.status_code < 500:
+            # Erro permanente: reenviar não adianta. Divide o lote até isolar
+            # o alerta recusado, e só ele vai para a quarentena
+            if len(batch) > 1:
+                if self._split_from is None:
+                    self._split_from = self.batch_size
+                self.batch_size = max(1, len(batch) // 2)
+                return 0, 0
+            self._quarantine(batch[0], resp.status_code)
+            if self._split_from is not None:
+                self.batch_size, self._split_from = self._split_from, None
+            return 1, 0
+        resp.raise_for_status()
+        raise IOError(f"HTTP {resp.status_code}")
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            if not self._pending:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            with self._lock:
+                batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+            try:
+                accepted, retry_after = self._send(batch)
+            except Exception as e:
+                delay = backoff * random.uniform(0.5, 1.0)
+                logging.error(f"Falha ao enviar alertas ({len(self._pending)} pendente(s)): {e}; "
+                              f"nova tentativa em {delay:.1f}s")
+                backoff = min(backoff * 2, self.max_backoff)
+                self._stop.wait(delay)
+                continue
+
+            backoff = 1.0
+            if accepted:
+                self._ack(accepted)
+                logging.info(f"{accepted} alerta(s) enviado(s) | pendentes={len(self._pending)}")
+            if retry_after:
+                self._stop.wait(retry_after)
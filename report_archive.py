@@ -0,0 +1,309 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+SEGMENT_PREFIX = "reports-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".idx"
+
+
+class ReportArchive:
+    """
+    Arquivo de relatórios particionado por dia e comprimido.
+
+    Cada dia tem um segmento "reports-AAAAMMDD.jsonl.gz" em que cada relatório
+    é um membro gzip independente, acrescentado ao final (a concatenação de
+    membros continua sendo um gzip válido). Ao lado fica um índice NDJSON
+    "reports-AAAAMMDD.idx" com (timestamp, machine, risk_score, offset,
+    length) de cada relatório, o que permite ler um único relatório sem
+    descomprimir o segmento inteiro.
+
+    compact() grava o dia em um segmento novo de outra geração
+    ("reports-AAAAMMDD.g2.jsonl.gz"); as entradas do índice apontam para ele
+    pelo campo "segment" (sem o campo, o segmento é o do dia).
+
+    Supõe um único processo escrevendo no diretório. Se o processo cair entre
+    a escrita do segmento e a do índice, o trecho sem índice é descartado
+    por compact().
+    """
+
+    def __init__(self, directory: str, compresslevel: int = 6):
+        self.directory = directory
+        self.compresslevel = compresslevel
+        os.makedirs(directory, exist_ok=True)
+
+    # ------------- Caminhos -------------
+    def _segment_path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{day}{SEGMENT_SUFFIX}")
+
+    def _index_path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{day}{INDEX_SUFFIX}")
+
+    def _entry_segment_path(self, entry: Dict) -> str:
+        segment = entry.get("segment")
+        if segment:
+            return os.path.join(self.directory, os.path.basename(segment))
+        return self._segment_path(entry["day"])
+
+    def _day_segments(self, day: str) -> List[str]:
+        """
+        Todos os segmentos do dia no disco: o do dia e os de cada geração
+        """
+        pattern = os.path.join(self.directory, f"{SEGMENT_PREFIX}{day}.g*{SEGMENT_SUFFIX}")
+        paths = glob.glob(pattern)
+        if os.path.exists(self._segment_path(day)):
+            paths.append(self._segment_path(day))
+        return paths
+
+    @staticmethod
+    def _generation(path: str) -> int:
+        name = os.path.basename(path)[:-len(SEGMENT_SUFFIX)]
+        _, _, generation = name.rpartition(".g")
+        return int(generation) if generation.isdigit() else 0
+
+    def days(self) -> List[str]:
+        """
+        Dias (AAAAMMDD) com índice no arquivo, em ordem
+        """
+        pattern = os.path.join(self.directory, f"{SEGMENT_PREFIX}*{INDEX_SUFFIX}")
+        return sorted(os.path.basename(p)[len(SEGMENT_PREFIX):-len(INDEX_SUFFIX)] for p in glob.glob(pattern))
+
+    # ------------- Escrita -------------
+    @staticmethod
+    def _day_of(report: Dict) -> str:
+        try:
+            return datetime.fromisoformat(report["timestamp"]).strftime("%Y%m%d")
+        except (KeyError, TypeError, ValueError):
+            return datetime.now().strftime("%Y%m%d")
+
+    def append(self, report: Dict) -> Dict:
+        """
+        Acrescenta um relatório ao segmento do seu dia e retorna a entrada do índice
+        """
+        day = self._day_of(report)
+        data = gzip.compress(
+            json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n",
+            compresslevel=self.compresslevel,
+        )
+        with open(self._segment_path(day), "ab") as f:
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(data)
+        entry = {
+            "timestamp": report.get("timestamp"),
+            "machine": report.get("system_info", {}).get("hostname"),
+            "risk_score": report.get("security_analysis", {}).get("risk_score"),
+            "day": day,
+            "offset": offset,
+            "length": len(data),
+        }
+        with open(self._index_path(day), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        return entry
+
+    def location(self, entry: Dict) -> str:
+        """
+        Referência legível de um relatório: "segmento#offset"
+        """
+        return f"{self._entry_segment_path(entry)}#{entry['offset']}"
+
+    def find(self, location: str) -> Optional[Dict]:
+        """
+        Entrada do índice a partir da referência de location(). O diretório
+        do segmento é opcional; o offset só vale dentro do segmento indicado
+        (os de gerações diferentes do mesmo dia se sobrepõem).
+        """
+        segment, _, offset = location.rpartition("#")
+        name = os.path.basename(segment)
+        if not name.startswith(SEGMENT_PREFIX) or not offset.isdigit():
+            raise ValueError(f"referência inválida (esperado segmento#offset): {location}")
+        day = name[len(SEGMENT_PREFIX):len(SEGMENT_PREFIX) + 8]
+        for entry in self.entries(day):
+            if entry["offset"] == int(offset) and os.path.basename(self._entry_segment_path(entry)) == name:
+                return entry
+        return None
+
+    # ------------- Leitura -------------
+    def entries(self, day: Optional[str] = None, machine: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Percorre o índice (sem abrir os segmentos), opcionalmente filtrando
+        por dia e máquina
+        """
+        for index_day in ([day] if day else self.days()):
+            path = self._index_path(index_day)
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # linha truncada
+                    if machine and entry.get("machine") != machine:
+                        continue
+                    yield entry
+
+    def read(self, entry: Dict) -> Dict:
+        """
+        Lê um único relatório a partir da sua entrada do índice
+        """
+        with open(self._entry_segment_path(entry), "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        return json.loads(gzip.decompress(data))
+
+    def iter_reports(self, day: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Percorre todos os relatórios indexados, em ordem de gravação
+        """
+        for entry in self.entries(day):
+            yield self.read(entry)
+
+    # ------------- Manutenção -------------
+    def apply_retention(self, keep_days: int, today: Optional[datetime] = None) -> List[str]:
+        """
+        Remove segmentos (e índices) com mais de `keep_days` dias
+        """
+        cutoff = ((today or datetime.now()) - timedelta(days=keep_days)).strftime("%Y%m%d")
+        removed = []
+        for day in self.days():
+            if day < cutoff:
+                # Índice primeiro: sem ele os segmentos que sobrarem são ignorados
+                os.remove(self._index_path(day))
+                for path in self._day_segments(day):
+                    os.remove(path)
+                removed.append(day)
+        return removed
+
+    def compact(self, day: str, compresslevel: int = 9) -> Dict:
+        """
+        Reescreve o segmento de um dia já encerrado: mantém apenas os
+        relatórios indexados (descarta trechos órfãos de escritas
+        interrompidas), em ordem de timestamp e com compressão máxima.
+
+        O resultado vai para um segmento de geração nova, que nenhum índice
+        referencia até a troca do índice (um único os.replace). Antes dela,
+        leitores veem índice e segmentos antigos intactos; depois, o índice
+        novo e seu segmento. Os segmentos antigos só são apagados depois.
+        """
+        entries = sorted(self.entries(day), key=lambda e: e.get("timestamp") or "")
+        index_path = self._index_path(day)
+        old_segments = self._day_segments(day)
+        before = sum(os.path.getsize(path) for path in old_segments)
+
+        generation = max((self._generation(path) for path in old_segments), default=0) + 1
+        segment_name = f"{SEGMENT_PREFIX}{day}.g{generation}{SEGMENT_SUFFIX}"
+        segment_path = os.path.join(self.directory, segment_name)
+        tmp_index = index_path + ".tmp"
+        sources = {}
+        try:
+            with open(segment_path, "wb") as seg, open(tmp_index, "w", encoding="utf-8") as idx:
+                for entry in entries:
+                    source_path = self._entry_segment_path(entry)
+                    src = sources.get(source_path)
+                    if src is None:
+                        src = sources[source_path] = open(source_path, "rb")
+                    src.seek(entry["offset"])
+                    raw = gzip.decompress(src.read(entry["length"]))
+                    data = gzip.compress(raw, compresslevel=compresslevel)
+                    entry = dict(entry, segment=segment_name, offset=seg.tell(), length=len(data))
+                    seg.write(data)
+                    idx.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        finally:
+            for src in sources.values():
+                src.close()
+        os.replace(tmp_index, index_path)
+        for path in old_segments:
+            os.remove(path)
+        return {"day": day, "reports": len(entries), "bytes_before": before,
+                "bytes_after": os.path.getsize(segment_path)}
+
+    def import_json_reports(self, directory: str, remove: bool = False) -> int:
+        """
+        Incorpora relatórios avulsos (exam_security_report_*.json) ao arquivo
+        """
+        count = 0
+        for path in sorted(glob.glob(os.path.join(directory, "exam_security_report_*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self.append(report)
+            count += 1
+            if remove:
+                os.remove(path)
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do arquivo de relatórios")
+    parser.add_argument("directory", help="diretório do arquivo (ex.: logs/archive)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = sub.add_parser("list", help="lista o índice")
+    list_cmd.add_argument("--day")
+    list_cmd.add_argument("--machine")
+
+    get_cmd = sub.add_parser("get", help="mostra um relatório")
+    get_cmd.add_argument("ref", help="segmento#offset, como mostrado por list (ou o dia, seguido do offset)")
+    get_cmd.add_argument("offset", type=int, nargs="?")
+
+    retention_cmd = sub.add_parser("retention", help="remove dias antigos")
+    retention_cmd.add_argument("keep_days", type=int)
+
+    compact_cmd = sub.add_parser("compact", help="compacta os dias encerrados")
+    compact_cmd.add_argument("--day", help="apenas este dia (padrão: todos antes de hoje)")
+
+    import_cmd = sub.add_parser("import", help="incorpora relatórios JSON avulsos")
+    import_cmd.add_argument("source")
+    import_cmd.add_argument("--remove", action="store_true", help="apaga os arquivos incorporados")
+
+    args = parser.parse_args(argv)
+    archive = ReportArchive(args.directory)
+
+    if args.command == "list":
+        for entry in archive.entries(args.day, args.machine):
+            print(f"{entry['day']} {os.path.basename(archive.location(entry))} {entry['timestamp']} "
+                  f"{entry.get('machine') or '-'} risco={entry.get('risk_score')}")
+    elif args.command == "get":
+        if args.offset is None:
+            try:
+                matches = [entry for entry in [archive.find(args.ref)] if entry]
+            except ValueError as e:
+                print(e)
+                return 2
+        else:
+            matches = [entry for entry in archive.entries(args.ref) if entry["offset"] == args.offset]
+        if not matches:
+            print("Relatório não encontrado")
+            return 1
+        if len(matches) > 1:
+            # Depois de compact, o segmento da geração e o do dia têm offsets em comum
+            print("Offset presente em mais de um segmento; use segmento#offset:")
+            for entry in matches:
+                print(f"  {os.path.basename(archive.location(entry))}")
+            return 1
+        print(json.dumps(archive.read(matches[0]), indent=2, ensure_ascii=False))
+    elif args.command == "retention":
+        removed = archive.apply_retention(args.keep_days)
+        print(f"Dias removidos: {', '.join(removed) or 'nenhum'}")
+    elif args.command == "compact":
+        today = datetime.now().strftime("%Y%m%d")
+        days = [args.day] if args.day else [d for d in archive.days() if d < today]
+        for day in days:
+            result = archive.compact(day)
+            print(f"{day}: {result['reports']} relatórios, {result['bytes_before']} -> {result['bytes_after']} bytes")
+    elif args.command == "import":
+        print(f"{archive.import_json_reports(args.source, remove=args.remove)} relatório(s) incorporado(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
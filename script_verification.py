@@ -2,15 +2,249 @@ import psutil
 import win32api
 import win32gui
 import win32process
+import argparse
 import json
+import ntpath
 import re
 import os
+import platform
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable
+
+from report_archive import ReportArchive
+
+# Topologia de telas: a mesma do monitor do aluno, implantado sozinho com client/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "client"))
+from display_topology import DisplayTopology, Win32DisplaySource  # noqa: E402
+
+
+class KeywordMatcher:
+    """
+    Casador de múltiplas palavras-chave compilado uma única vez.
+
+    As palavras são organizadas em uma trie e convertidas em uma única
+    expressão regular (ex.: ``c(?:hrome(?: remote desktop)?|laude)``), de modo
+    que cada campo é percorrido uma só vez, em vez de uma busca por substring
+    para cada palavra. Cada ocorrência encontrada é a palavra mais longa que
+    começa naquela posição; a busca recomeça na posição seguinte e acrescenta
+    as palavras contidas na ocorrência -- assim todas as palavras presentes
+    são reportadas, inclusive as sobrepostas ("chrome" e "remote desktop" em
+    "chrome remote desktop").
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = frozenset(k.lower() for k in keywords if k)
+        # Para cada palavra, as demais palavras que são substrings dela
+        self._contained = {
+            k: frozenset(o for o in self.keywords if o in k)
+            for k in self.keywords
+        }
+        if self.keywords:
+            self._regex = re.compile(self._build_pattern(self.keywords))
+        else:
+            self._regex = None
+
+    @staticmethod
+    def _build_pattern(keywords: Iterable[str]) -> str:
+        trie: Dict = {}
+        for word in keywords:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        def to_regex(node: Dict) -> str:
+            is_end = "" in node
+            branches = [re.escape(char) + to_regex(child)
+                        for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            if len(branches) == 1:
+                body = branches[0]
+                if is_end:
+                    # Quantificador guloso: prefere a palavra mais longa
+                    return "(?:%s)?" % body
+                return body
+            body = "(?:%s)" % "|".join(branches)
+            return body + "?" if is_end else body
+
+        return to_regex(trie)
+
+    def find_all(self, *texts: str) -> List[str]:
+        """
+        Retorna, em ordem alfabética, todas as palavras-chave presentes em
+        qualquer um dos textos informados
+        """
+        if self._regex is None:
+            return []
+        found = set()
+        search = self._regex.search
+        for text in texts:
+            if not text:
+                continue
+            text = text.lower()
+            match = search(text)
+            while match:
+                found |= self._contained[match.group()]
+                match = search(text, match.start() + 1)
+        return sorted(found)
+
+    def matches(self, *texts: str) -> bool:
+        """
+        Indica se ao menos uma palavra-chave aparece nos textos
+        """
+        if self._regex is None:
+            return False
+        return any(text and self._regex.search(text.lower()) for text in texts)
+
+
+_NOT_FETCHED = object()
+
+
+def _safe_call(getter):
+    try:
+        return getter()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+class ProcessRecord:
+    """
+    Registro compacto de um processo (__slots__) com atributos buscados em
+    camadas: pid, nome e create_time vêm da enumeração; exe e cmdline só
+    são lidos quando a classificação precisa deles (e ficam em cache); a
+    memória só é lida para os registros que entram no relatório.
+    
+    Aceita o acesso como dicionário (record['name'], {**record}), de modo
+    que pode ser usado onde antes havia o dict do processo.
+    """
+
+    __slots__ = ("pid", "name", "create_time", "classification", "_proc", "_exe", "_cmdline")
+
+    FIELDS = ("pid", "name", "exe", "cmdline", "memory_mb", "create_time")
+
+    def __init__(self, proc, pid: int, name: str, create_time: float):
+        self._proc = proc
+        self.pid = pid
+        self.name = name or ''
+        self.create_time = create_time
+        self.classification = None
+        self._exe = _NOT_FETCHED
+        self._cmdline = _NOT_FETCHED
+
+    @property
+    def exe(self):
+        if self._exe is _NOT_FETCHED:
+            self._exe = _safe_call(self._proc.exe)
+        return self._exe
+
+    @property
+    def cmdline(self) -> str:
+        if self._cmdline is _NOT_FETCHED:
+            self._cmdline = ' '.join(_safe_call(self._proc.cmdline) or [])
+        return self._cmdline
+
+    @property
+    def memory_mb(self):
+        memory_info = _safe_call(self._proc.memory_info)
+        return round(memory_info.rss / 1024 / 1024, 2) if memory_info else None
+
+    def keys(self):
+        return self.FIELDS
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class ProcessSnapshot:
+    """
+    Camada de snapshot da tabela de processos.
+
+    A tabela é enumerada uma única vez por relatório e cada processo vira um
+    ProcessRecord guardado sob a chave (pid, create_time), junto com sua
+    classificação. Em re-verificações sucessivas, apenas processos novos são
+    classificados; os demais reaproveitam o registro anterior. Processos
+    encerrados saem do cache na enumeração seguinte.
+    """
+
+    def __init__(self, classify):
+        self._classify = classify
+        self._entries: Dict[Tuple, ProcessRecord] = {}
+        self.processes: List[ProcessRecord] = []
+        self.stats = {"total": 0, "new": 0, "cached": 0}
+
+    def invalidate(self):
+        """
+        Descarta as classificações em cache (ex.: após mudar as listas)
+        """
+        self._entries = {}
+
+    def fork(self) -> "ProcessSnapshot":
+        """
+        Cópia independente que reaproveita as classificações atuais. Uma
+        fase que estoura o prazo continua rodando sobre a cópia, sem
+        alterar o snapshot do verificador.
+        """
+        snapshot = ProcessSnapshot(self._classify)
+        snapshot._entries = dict(self._entries)
+        return snapshot
+
+    def refresh(self) -> List[ProcessRecord]:
+        """
+        Enumera os processos e classifica apenas os que ainda não estão em cache
+        """
+        entries = {}
+        processes = []
+        new = 0
+        
+        for proc in psutil.process_iter(['pid', 'name', 'create_time']):
+            try:
+                pinfo = proc.info
+                key = (pinfo['pid'], pinfo['create_time'])
+                record = self._entries.get(key)
+                if record is None:
+                    record = ProcessRecord(proc, pinfo['pid'], pinfo['name'], pinfo['create_time'])
+                    record.classification = self._classify(record)
+                    new += 1
+                entries[key] = record
+                processes.append(record)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        
+        self._entries = entries
+        self.processes = processes
+        self.stats = {"total": len(processes), "new": new, "cached": len(processes) - new}
+        return processes
+
+    def classification(self, process) -> Dict:
+        """
+        Retorna a classificação de um processo, usando a já calculada quando
+        ele é um registro do snapshot
+        """
+        if isinstance(process, ProcessRecord) and process.classification is not None:
+            return process.classification
+        return self._classify(process)
 
 
 class ExamSecurityVerifier:
-    def __init__(self):
+    # Score mínimo de um relatório inconclusivo (alguma fase falhou ou
+    # estourou o prazo): o que não foi verificado não conta como seguro
+    INCONCLUSIVE_RISK_FLOOR = 50.0
+    
+    def __init__(self, archive_dir: str = None, display_source=None):
         # Lista de aplicativos de IA e ferramentas problemáticas para exames
         self.suspicious_processes = {
             # Assistentes de IA
@@ -58,211 +292,191 @@ class ExamSecurityVerifier:
             "dropbox", "onedrive", "google drive", "icloud"
         }
         
+        # Palavras-chave específicas de aplicativos de IA
+        self.ai_keywords = {
+            "chatgpt", "claude", "copilot", "tabnine", "codeium",
+            "openai", "anthropic", "bard", "gemini"
+        }
+        
         # Extensões de arquivos problemáticas
         self.suspicious_files = {
             ".exe", ".msi", ".bat", ".cmd", ".ps1", ".vbs", ".js"
         }
+        
+        # Processos do sistema que dispensam a leitura da linha de comando,
+        # desde que o executável esteja em %SystemRoot% (um binário renomeado
+        # para svchost.exe fora de lá é classificado normalmente)
+        self.trusted_process_names = {
+            "smss.exe", "csrss.exe", "wininit.exe", "winlogon.exe",
+            "services.exe", "lsass.exe", "lsaiso.exe", "svchost.exe", "fontdrvhost.exe",
+            "dwm.exe", "sihost.exe", "taskhostw.exe", "ctfmon.exe", "conhost.exe",
+            "dllhost.exe", "wmiprvse.exe", "spoolsv.exe", "audiodg.exe",
+            "searchindexer.exe", "securityhealthservice.exe"
+        }
+        system_root = os.environ.get("SystemRoot", r"C:\Windows")
+        self.trusted_process_dirs = {
+            ntpath.normcase(system_root),
+            ntpath.normcase(ntpath.join(system_root, "System32")),
+        }
+        
+        # Snapshot de processos com cache de classificação entre varreduras
+        self.process_snapshot = ProcessSnapshot(self._classify_process)
+        
+        # Arquivo comprimido de relatórios (opcional; o padrão é um JSON por relatório)
+        self.report_archive = ReportArchive(archive_dir) if archive_dir else None
+        
+        # Topologia de telas: só reenumera os monitores quando a impressão
+        # digital (métricas da tela virtual + número de monitores) muda
+        self.display_topology = DisplayTopology(display_source or Win32DisplaySource(win32api))
+        
+        # Casadores compilados uma vez por verificador. Se as listas acima
+        # (inclusive trusted_process_names) forem alteradas depois da
+        # criação, chame rebuild_matchers().
+        self.rebuild_matchers()
+
+    def rebuild_matchers(self):
+        """
+        (Re)compila os casadores de palavras-chave a partir das listas atuais
+        """
+        self.process_matcher = KeywordMatcher(self.suspicious_processes)
+        self.service_matcher = KeywordMatcher(self.suspicious_services)
+        self.ai_matcher = KeywordMatcher(self.ai_keywords)
+        self.process_snapshot.invalidate()
+
+    def _classify_process(self, process) -> Dict:
+        """
+        Classifica um processo contra as listas de suspeitos e de IA.
+        
+        Para um ProcessRecord, os atributos são lidos em camadas: se nome e
+        executável não casam com nada, só a linha de comando ainda pode
+        casar, e ela não é lida para os processos do sistema confiáveis
+        (nome e caminho do executável). Quando algo casa, o processo vai
+        para o relatório e a classificação completa (que lê exe e cmdline)
+        é feita de qualquer forma.
+        """
+        if isinstance(process, ProcessRecord):
+            name = process.name
+            if not (self.process_matcher.matches(name) or self.ai_matcher.matches(name)):
+                exe = process.exe
+                if not (self.process_matcher.matches(exe) or self.ai_matcher.matches(exe)):
+                    if self._is_trusted_system_process(name, exe):
+                        return {"suspicious": [], "ai": []}
+                    # A verificação de IA usa só nome e exe, que não casaram
+                    return {"suspicious": self.process_matcher.find_all(process.cmdline), "ai": []}
+        return {
+            "suspicious": self.process_matcher.find_all(
+                process['name'], process['exe'], process['cmdline']
+            ),
+            "ai": self.ai_matcher.find_all(process['name'], process['exe']),
+        }
+
+    def _is_trusted_system_process(self, name: str, exe: str) -> bool:
+        """
+        Processo do sistema: nome conhecido e executável com o mesmo nome
+        em %SystemRoot% ou %SystemRoot%\\System32
+        """
+        if not exe or name.lower() not in self.trusted_process_names:
+            return False
+        directory, filename = ntpath.split(ntpath.normcase(exe))
+        return filename == name.lower() and directory in self.trusted_process_dirs
 
     def detect_secondary_screens(self) -> Dict:
         """
-        Detecta telas secundárias no sistema usando múltiplas abordagens
+        Detecta telas secundárias no sistema usando múltiplas abordagens.
+        A enumeração completa dos dispositivos só é refeita quando a
+        topologia muda (ver client/display_topology.py).
         """
         try:
-            monitors = []
-            method_used = "unknown"
-            
-            # Método 1: Usar Win32 API para enumerar displays
-            try:
-                import win32con
-                
-                # Enumerar todos os dispositivos de display
-                device_index = 0
-                while True:
-                    try:
-                        device = win32api.EnumDisplayDevices(None, device_index)
-                        if device:
-                            # Obter informações do monitor
-                            try:
-                                settings = win32api.EnumDisplaySettings(device.DeviceName, win32con.ENUM_CURRENT_SETTINGS)
-                                if settings:
-                                    monitors.append({
-                                        "device_name": device.DeviceName,
-                                        "device_string": device.DeviceString,
-                                        "left": settings.Position_x,
-                                        "top": settings.Position_y,
-                                        "width": settings.PelsWidth,
-                                        "height": settings.PelsHeight,
-                                        "bits_per_pixel": settings.BitsPerPel,
-                                        "frequency": settings.DisplayFrequency,
-                                        "is_primary": settings.Position_x == 0 and settings.Position_y == 0
-                                    })
-                            except:
-                                # Se não conseguir obter settings, adiciona informação básica
-                                monitors.append({
-                                    "device_name": device.DeviceName,
-                                    "device_string": device.DeviceString,
-                                    "info": "Active display device detected"
-                                })
-                        else:
-                            break
-                        device_index += 1
-                    except:
-                        break
-                
-                method_used = "Win32API EnumDisplayDevices"
-                
-            except ImportError:
-                pass
+            snapshot, _ = self.display_topology.refresh()
+        except Exception as e:
+            return self._detect_screens_fallback(e)
+        
+        virtual_x, virtual_y, virtual_width, virtual_height, _, primary_width, primary_height = snapshot.fingerprint
+        
+        # Método 1: dispositivos enumerados pela Win32 API
+        monitors = [dict(m) for m in snapshot.monitors]
+        method_used = "Win32API EnumDisplayDevices"
+        total_monitors = snapshot.total_monitors
+        has_secondary = snapshot.has_secondary_screens
+        
+        # Método 2: métricas do sistema se a enumeração não retornou nada
+        if not monitors:
+            # Se a tela virtual é maior que a primária, há monitores secundários
+            has_secondary = (has_secondary or
+                             virtual_width > primary_width or
+                             virtual_height > primary_height or
+                             virtual_x != 0 or virtual_y != 0)
             
-            # Método 2: Usar métricas do sistema se o método 1 falhou
-            if not monitors:
-                try:
-                    # Obter informações do desktop virtual
-                    virtual_screen_x = win32api.GetSystemMetrics(76)  # SM_XVIRTUALSCREEN
-                    virtual_screen_y = win32api.GetSystemMetrics(77)  # SM_YVIRTUALSCREEN
-                    virtual_screen_width = win32api.GetSystemMetrics(78)  # SM_CXVIRTUALSCREEN
-                    virtual_screen_height = win32api.GetSystemMetrics(79)  # SM_CYVIRTUALSCREEN
-                    
-                    primary_width = win32api.GetSystemMetrics(0)  # SM_CXSCREEN
-                    primary_height = win32api.GetSystemMetrics(1)  # SM_CYSCREEN
-                    
-                    # Se a tela virtual é maior que a primária, há monitores secundários
-                    has_multiple = (virtual_screen_width > primary_width or 
-                                  virtual_screen_height > primary_height or
-                                  virtual_screen_x != 0 or virtual_screen_y != 0)
-                    
-                    monitors.append({
-                        "type": "primary",
-                        "width": primary_width,
-                        "height": primary_height,
-                        "left": 0,
-                        "top": 0
-                    })
-                    
-                    if has_multiple:
-                        monitors.append({
-                            "type": "virtual_screen_info",
-                            "virtual_left": virtual_screen_x,
-                            "virtual_top": virtual_screen_y,
-                            "virtual_width": virtual_screen_width,
-                            "virtual_height": virtual_screen_height,
-                            "indicates_multiple_monitors": True
-                        })
-                    
-                    method_used = "Win32API System Metrics"
-                    
-                except Exception as e:
-                    return {
-                        "error": f"Erro ao usar métricas do sistema: {str(e)}",
-                        "total_monitors": 0,
-                        "has_secondary_screens": False
-                    }
+            monitors.append({
+                "type": "primary",
+                "width": primary_width,
+                "height": primary_height,
+                "left": 0,
+                "top": 0
+            })
             
-            # Método 3: Fallback usando tkinter se disponível
-            if not monitors:
-                try:
-                    import tkinter as tk
-                    root = tk.Tk()
-                    
-                    screen_width = root.winfo_screenwidth()
-                    screen_height = root.winfo_screenheight()
-                    
-                    monitors.append({
-                        "type": "tkinter_screen",
-                        "width": screen_width,
-                        "height": screen_height,
-                        "method": "tkinter fallback"
-                    })
-                    
-                    root.destroy()
-                    method_used = "Tkinter fallback"
-                    
-                except Exception:
-                    pass
-            
-            # Determinar se há telas secundárias
-            has_secondary = False
-            total_monitors = 0
+            if has_secondary:
+                monitors.append({
+                    "type": "virtual_screen_info",
+                    "virtual_left": virtual_x,
+                    "virtual_top": virtual_y,
+                    "virtual_width": virtual_width,
+                    "virtual_height": virtual_height,
+                    "indicates_multiple_monitors": True
+                })
             
-            if method_used == "Win32API EnumDisplayDevices":
-                # Contar dispositivos ativos (não incluindo dispositivos desconectados)
-                active_monitors = [m for m in monitors if m.get("width", 0) > 0]
-                total_monitors = len(active_monitors)
-                has_secondary = total_monitors > 1
-                
-            elif method_used == "Win32API System Metrics":
-                # Verificar se há indicação de múltiplos monitores
-                has_secondary = any(m.get("indicates_multiple_monitors", False) for m in monitors)
-                total_monitors = 2 if has_secondary else 1
-                
-            else:
-                total_monitors = len(monitors)
-                has_secondary = False  # Método fallback não detecta múltiplos monitores
+            method_used = "Win32API System Metrics"
+            total_monitors = max(snapshot.fingerprint[4], 2 if has_secondary else 1)
+        
+        return {
+            "total_monitors": total_monitors,
+            "has_secondary_screens": has_secondary,
+            "primary_resolution": f"{primary_width}x{primary_height}",
+            "all_monitors": monitors,
+            "detection_method": method_used,
+            "warning": "TELAS MÚLTIPLAS DETECTADAS!" if has_secondary else "Apenas uma tela detectada",
+            "virtual_screen_info": snapshot.virtual_screen
+        }
+
+    @staticmethod
+    def _detect_screens_fallback(error: Exception) -> Dict:
+        """
+        Último recurso quando a Win32 API falha: tkinter só vê a tela primária
+        """
+        try:
+            import tkinter as tk
+            root = tk.Tk()
             
-            primary_monitor = win32api.GetSystemMetrics(0), win32api.GetSystemMetrics(1)
+            screen_width = root.winfo_screenwidth()
+            screen_height = root.winfo_screenheight()
             
-            result = {
-                "total_monitors": total_monitors,
-                "has_secondary_screens": has_secondary,
-                "primary_resolution": f"{primary_monitor[0]}x{primary_monitor[1]}",
-                "all_monitors": monitors,
-                "detection_method": method_used,
-                "warning": "TELAS MÚLTIPLAS DETECTADAS!" if has_secondary else "Apenas uma tela detectada",
-                "virtual_screen_info": {
-                    "x": win32api.GetSystemMetrics(76),
-                    "y": win32api.GetSystemMetrics(77), 
-                    "width": win32api.GetSystemMetrics(78),
-                    "height": win32api.GetSystemMetrics(79)
-                }
+            root.destroy()
+            return {
+                "error": f"Erro na detecção avançada: {str(error)}",
+                "total_monitors": 1,
+                "has_secondary_screens": False,  # Método fallback não detecta múltiplos monitores
+                "primary_resolution": f"{screen_width}x{screen_height}",
+                "all_monitors": [{
+                    "type": "tkinter_screen",
+                    "width": screen_width,
+                    "height": screen_height,
+                    "method": "tkinter fallback"
+                }],
+                "detection_method": "Tkinter fallback",
+                "warning": "Uma tela detectada"
+            }
+        except Exception:
+            return {
+                "error": f"Erro completo ao detectar telas: {str(error)}",
+                "total_monitors": 0,
+                "has_secondary_screens": False
             }
-            
-            return result
-            
-        except Exception as e:
-            # Último recurso: tentar detectar pelo menos informações básicas
-            try:
-                primary_width = win32api.GetSystemMetrics(0)
-                primary_height = win32api.GetSystemMetrics(1)
-                virtual_width = win32api.GetSystemMetrics(78)
-                virtual_height = win32api.GetSystemMetrics(79)
-                
-                has_multiple = virtual_width > primary_width or virtual_height > primary_height
-                
-                return {
-                    "error": f"Erro na detecção avançada: {str(e)}",
-                    "total_monitors": 2 if has_multiple else 1,
-                    "has_secondary_screens": has_multiple,
-                    "primary_resolution": f"{primary_width}x{primary_height}",
-                    "virtual_resolution": f"{virtual_width}x{virtual_height}",
-                    "method": "basic_fallback",
-                    "warning": "POSSÍVEL TELA MÚLTIPLA DETECTADA!" if has_multiple else "Uma tela detectada"
-                }
-            except:
-                return {
-                    "error": f"Erro completo ao detectar telas: {str(e)}",
-                    "total_monitors": 0,
-                    "has_secondary_screens": False
-                }
 
     def get_running_processes(self) -> List[Dict]:
         """
-        Obtém todos os processos em execução
+        Obtém todos os processos em execução (atualiza o snapshot compartilhado)
         """
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'exe', 'cmdline', 'memory_info']):
-            try:
-                pinfo = proc.info
-                processes.append({
-                    'pid': pinfo['pid'],
-                    'name': pinfo['name'],
-                    'exe': pinfo['exe'],
-                    'cmdline': ' '.join(pinfo['cmdline']) if pinfo['cmdline'] else '',
-                    'memory_mb': round(pinfo['memory_info'].rss / 1024 / 1024, 2)
-                })
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-        
-        return processes
+        return self.process_snapshot.refresh()
 
     def get_running_services(self) -> List[Dict]:
         """
@@ -291,21 +505,14 @@ class ExamSecurityVerifier:
         suspicious = []
         
         for process in processes:
-            process_name = process['name'].lower()
-            process_exe = (process['exe'] or '').lower()
-            process_cmdline = process['cmdline'].lower()
-            
-            for suspicious_name in self.suspicious_processes:
-                if (suspicious_name in process_name or 
-                    suspicious_name in process_exe or 
-                    suspicious_name in process_cmdline):
-                    
-                    suspicious.append({
-                        **process,
-                        'reason': f'Processo suspeito detectado: {suspicious_name}',
-                        'risk_level': self._get_risk_level(suspicious_name)
-                    })
-                    break
+            matched = self.process_snapshot.classification(process)["suspicious"]
+            if matched:
+                suspicious.append({
+                    **process,
+                    'reason': f'Processo suspeito detectado: {", ".join(matched)}',
+                    'matched_keywords': matched,
+                    'risk_level': self._get_highest_risk_level(matched)
+                })
         
         return suspicious
 
@@ -316,17 +523,14 @@ class ExamSecurityVerifier:
         suspicious = []
         
         for service in services:
-            service_name = service['name'].lower()
-            display_name = service['display_name'].lower()
-            
-            for suspicious_name in self.suspicious_services:
-                if suspicious_name in service_name or suspicious_name in display_name:
-                    suspicious.append({
-                        **service,
-                        'reason': f'Serviço suspeito: {suspicious_name}',
-                        'risk_level': self._get_risk_level(suspicious_name)
-                    })
-                    break
+            matched = self.service_matcher.find_all(service['name'], service['display_name'])
+            if matched:
+                suspicious.append({
+                    **service,
+                    'reason': f'Serviço suspeito: {", ".join(matched)}',
+                    'matched_keywords': matched,
+                    'risk_level': self._get_highest_risk_level(matched)
+                })
         
         return suspicious
 
@@ -346,71 +550,149 @@ class ExamSecurityVerifier:
         else:
             return "BAIXO"
 
-    def check_ai_applications(self) -> List[Dict]:
+    def _get_highest_risk_level(self, names: List[str]) -> str:
+        """
+        Retorna o maior nível de risco entre vários nomes casados
+        """
+        order = {"BAIXO": 0, "MÉDIO": 1, "ALTO": 2}
+        levels = [self._get_risk_level(name) for name in names] or ["BAIXO"]
+        return max(levels, key=order.__getitem__)
+
+    def check_ai_applications(self, processes: List[Dict] = None) -> List[Dict]:
         """
-        Verifica especificamente por aplicativos de IA
+        Verifica especificamente por aplicativos de IA.
+        Sem argumentos, enumera os processos através do snapshot compartilhado.
         """
         ai_apps = []
         
-        # Verificar processos em execução
-        for proc in psutil.process_iter(['pid', 'name', 'exe']):
-            try:
-                pinfo = proc.info
-                name = pinfo['name'].lower()
-                exe = (pinfo['exe'] or '').lower()
-                
-                ai_keywords = [
-                    "chatgpt", "claude", "copilot", "tabnine", "codeium",
-                    "openai", "anthropic", "bard", "gemini"
-                ]
-                
-                for keyword in ai_keywords:
-                    if keyword in name or keyword in exe:
-                        ai_apps.append({
-                            'pid': pinfo['pid'],
-                            'name': pinfo['name'],
-                            'exe': pinfo['exe'],
-                            'type': 'Aplicativo de IA',
-                            'risk_level': 'ALTO'
-                        })
-                        break
-                        
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
+        if processes is None:
+            processes = self.process_snapshot.refresh()
+        
+        for process in processes:
+            matched = self.process_snapshot.classification(process)["ai"]
+            if matched:
+                ai_apps.append({
+                    'pid': process['pid'],
+                    'name': process['name'],
+                    'exe': process['exe'],
+                    'type': 'Aplicativo de IA',
+                    'matched_keywords': matched,
+                    'risk_level': 'ALTO'
+                })
         
         return ai_apps
 
-    def generate_report(self) -> Dict:
+    def _timed(self, durations: Dict, phase: str, func, *args):
         """
-        Gera relatório completo de verificação
+        Executa uma fase registrando sua duração (ms) em `durations`
         """
-        print("🔍 Iniciando verificação de segurança para exame...")
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            durations[phase] = round((time.perf_counter() - start) * 1000, 2)
+
+    def _scan_processes(self, durations: Dict,
+                        snapshot: ProcessSnapshot = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        if snapshot is None:
+            processes = self._timed(durations, "processes", self.get_running_processes)
+        else:
+            processes = self._timed(durations, "processes", snapshot.refresh)
+        suspicious = self._timed(durations, "check_suspicious_processes",
+                                 self.check_suspicious_processes, processes)
+        ai_apps = self._timed(durations, "check_ai_applications",
+                              self.check_ai_applications, processes)
+        return processes, suspicious, ai_apps
+
+    def _scan_services(self, durations: Dict) -> Tuple[List[Dict], List[Dict]]:
+        services = self._timed(durations, "services", self.get_running_services)
+        suspicious = self._timed(durations, "check_suspicious_services",
+                                 self.check_suspicious_services, services)
+        return services, suspicious
+
+    @staticmethod
+    def _phase_result(future, deadline: float, phase: str, fallback, phase_errors: Dict):
+        """
+        Aguarda uma fase até o prazo; se estourar ou falhar, usa o valor de
+        fallback e registra o motivo em phase_errors
+        """
+        try:
+            return future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FuturesTimeoutError:
+            phase_errors[phase] = "Tempo limite excedido"
+        except Exception as e:
+            phase_errors[phase] = f"Erro: {e}"
+        return fallback
+
+    def generate_report(self, concurrent: bool = False, phase_timeout: float = 30.0) -> Dict:
+        """
+        Gera relatório completo de verificação.
         
-        # Detectar telas secundárias
-        print("📺 Verificando telas secundárias...")
-        screen_info = self.detect_secondary_screens()
+        Com concurrent=True, processos e serviços (cada um com suas
+        verificações) rodam em paralelo em um pool de threads enquanto as
+        telas são verificadas na thread principal (o fallback via tkinter
+        não pode rodar fora dela); a enumeração de serviços passa a maior
+        parte do tempo esperando o Service Control Manager. Cada fase tem até
+        phase_timeout segundos; uma fase que falha ou estoura o prazo é
+        listada em "phase_errors" e o relatório fica inconclusivo, com score
+        de risco de pelo menos INCONCLUSIVE_RISK_FLOOR.
+        """
+        print("🔍 Iniciando verificação de segurança para exame...")
+        durations = {}
+        phase_errors = {}
+        started = time.perf_counter()
         
-        # Obter processos e serviços
-        print("⚙️  Analisando processos em execução...")
-        processes = self.get_running_processes()
-        services = self.get_running_services()
+        if concurrent:
+            print("⚡ Verificando telas, processos e serviços em paralelo...")
+            # A fase de processos trabalha sobre uma cópia do snapshot, adotada
+            # só se terminar no prazo
+            snapshot = self.process_snapshot.fork()
+            executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="exam-phase")
+            try:
+                process_future = executor.submit(self._scan_processes, durations, snapshot)
+                service_future = executor.submit(self._scan_services, durations)
+                
+                screen_info = self._timed(durations, "screens", self.detect_secondary_screens)
+                
+                deadline = started + phase_timeout
+                processes, suspicious_processes, ai_apps = self._phase_result(
+                    process_future, deadline, "processes", ([], [], []), phase_errors)
+                if "processes" not in phase_errors:
+                    self.process_snapshot = snapshot
+                services, suspicious_services = self._phase_result(
+                    service_future, deadline, "services", ([], []), phase_errors)
+            finally:
+                # Não espera fases que estouraram o prazo
+                executor.shutdown(wait=False)
+        else:
+            # Detectar telas secundárias
+            print("📺 Verificando telas secundárias...")
+            screen_info = self._timed(durations, "screens", self.detect_secondary_screens)
+            
+            # Obter processos e serviços e verificar itens suspeitos
+            print("⚙️  Analisando processos em execução...")
+            processes, suspicious_processes, ai_apps = self._scan_processes(durations)
+            
+            print("🚨 Verificando serviços suspeitos...")
+            services, suspicious_services = self._scan_services(durations)
         
-        # Verificar itens suspeitos
-        print("🚨 Verificando aplicativos suspeitos...")
-        suspicious_processes = self.check_suspicious_processes(processes)
-        suspicious_services = self.check_suspicious_services(services)
-        ai_apps = self.check_ai_applications()
+        durations = dict(durations)
+        durations["total"] = round((time.perf_counter() - started) * 1000, 2)
         
         # Calcular scores de risco
         total_processes = len(processes)
         total_suspicious = len(suspicious_processes) + len(suspicious_services) + len(ai_apps)
         risk_score = min(100, (total_suspicious / max(1, total_processes)) * 100)
+        if phase_errors:
+            risk_score = max(risk_score, self.INCONCLUSIVE_RISK_FLOOR)
         
         report = {
             "timestamp": datetime.now().isoformat(),
             "system_info": {
+                "hostname": platform.node(),
                 "total_processes": total_processes,
-                "total_services": len(services)
+                "total_services": len(services),
+                "process_cache": dict(self.process_snapshot.stats)
             },
             "screen_verification": screen_info,
             "security_analysis": {
@@ -418,19 +700,31 @@ class ExamSecurityVerifier:
                 "suspicious_services": suspicious_services,
                 "ai_applications": ai_apps,
                 "total_suspicious_items": total_suspicious,
-                "risk_score": round(risk_score, 2)
+                "risk_score": round(risk_score, 2),
+                "inconclusive": bool(phase_errors)
             },
-            "recommendations": self._generate_recommendations(screen_info, total_suspicious)
+            "recommendations": self._generate_recommendations(screen_info, total_suspicious,
+                                                              inconclusive=bool(phase_errors)),
+            "execution": {
+                "mode": "concurrent" if concurrent else "sequential",
+                "phase_durations_ms": durations
+            }
         }
+        if phase_errors:
+            report["execution"]["phase_errors"] = phase_errors
         
         return report
 
-    def _generate_recommendations(self, screen_info: Dict, suspicious_count: int) -> List[str]:
+    def _generate_recommendations(self, screen_info: Dict, suspicious_count: int,
+                                  inconclusive: bool = False) -> List[str]:
         """
         Gera recomendações baseadas na análise
         """
         recommendations = []
         
+        if inconclusive:
+            recommendations.append("⚠️  Verificação incompleta: execute-a novamente antes do exame")
+        
         if screen_info.get("has_secondary_screens", False):
             recommendations.append("❌ CRÍTICO: Desconecte todas as telas secundárias antes do exame")
         
@@ -451,8 +745,18 @@ class ExamSecurityVerifier:
 
     def save_report(self, report: Dict, filename: str = None):
         """
-        Salva o relatório em arquivo JSON
+        Salva o relatório em arquivo JSON.
+        
+        Se o verificador foi criado com archive_dir e nenhum filename foi
+        informado, o relatório é acrescentado ao arquivo comprimido do dia
+        (ver ReportArchive) e o retorno é "segmento#offset".
         """
+        if not filename and self.report_archive is not None:
+            entry = self.report_archive.append(report)
+            location = self.report_archive.location(entry)
+            print(f"📦 Relatório arquivado em: {location}")
+            return location
+        
         if not filename:
             logs_path = os.path.join(os.path.dirname(__file__), "logs")
             if not os.path.exists(logs_path):
@@ -467,19 +771,332 @@ class ExamSecurityVerifier:
         return filename
 
 
-def main():
+def bulk_url_for(server_url: str) -> str:
+    """
+    URL de envio em lote (POST /alertas): aceita a URL do servidor, a de
+    alerta único (/alerta, a mesma do config.json do monitor) ou a própria
+    /alertas
+    """
+    stripped = server_url.rstrip("/")
+    if stripped.endswith("/alerta"):
+        return stripped + "s"
+    if stripped.endswith("/alertas"):
+        return stripped
+    if "/" not in stripped.split("://", 1)[-1]:
+        return stripped + "/alertas"
+    return server_url
+
+
+class ExamWatcher:
+    """
+    Modo contínuo: re-verifica a máquina a cada intervalo durante o exame e
+    emite apenas as diferenças em relação à verificação anterior:
+    processos suspeitos que surgiram ou encerraram, serviços suspeitos que
+    iniciaram ou pararam e mudanças na topologia de telas.
+
+    Os eventos são gravados em um log NDJSON compacto (uma linha por evento)
+    e, opcionalmente, enviados ao servidor de alertas (POST /alertas) por
+    uma thread de envio, sem atrasar a próxima verificação. Em 429/503 a
+    thread reenvia só o que o servidor não aceitou ("accepted"), após o
+    Retry-After; sem conexão, tenta de novo com backoff exponencial.
+    """
+
+    SEND_BATCH = 100      # eventos por POST /alertas
+    MAX_PENDING = 1000    # eventos retidos pela thread de envio (o resto espera na fila)
+    MAX_BACKOFF = 60.0
+
+    def __init__(self, verifier: ExamSecurityVerifier, event_log: str,
+                 server_url: str = None, student_id: str = None):
+        self.verifier = verifier
+        self.event_log = event_log
+        self.server_url = bulk_url_for(server_url) if server_url else None
+        self.student_id = student_id or platform.node()
+        self.state = None
+        self._session = None
+        self._send_queue = queue.Queue(maxsize=100)
+        self._sender = None
+        self._closing = threading.Event()
+
+    def scan(self) -> Dict:
+        """
+        Coleta o estado atual em formato comparável
+        """
+        verifier = self.verifier
+        screen_info = verifier.detect_secondary_screens()
+        monitors = sorted(
+            (m.get("device_name") or m.get("type") or "", m.get("left"), m.get("top"),
+             m.get("width"), m.get("height"))
+            for m in screen_info.get("all_monitors", [])
+        )
+
+        processes = {}
+        for process in verifier.get_running_processes():
+            classification = verifier.process_snapshot.classification(process)
+            matched = sorted(set(classification["suspicious"]) | set(classification["ai"]))
+            if matched:
+                key = f"{process['pid']}:{process.get('create_time')}"
+                processes[key] = {
+                    "pid": process["pid"],
+                    "name": process["name"],
+                    "matched_keywords": matched,
+                    "risk_level": "ALTO" if classification["ai"] else verifier._get_highest_risk_level(matched),
+                }
+
+        services = {
+            service["name"]: {
+                "display_name": service["display_name"],
+                "matched_keywords": service["matched_keywords"],
+            }
+            for service in verifier.check_suspicious_services(verifier.get_running_services())
+        }
+
+        return {
+            "screens": {
+                "total_monitors": screen_info.get("total_monitors", 0),
+                "has_secondary_screens": screen_info.get("has_secondary_screens", False),
+                "monitors": monitors,
+            },
+            "processes": processes,
+            "services": services,
+        }
+
+    @staticmethod
+    def diff(old: Dict, new: Dict) -> List[Dict]:
+        """
+        Compara dois estados e retorna a lista de eventos
+        """
+        events = []
+        if old["screens"] != new["screens"]:
+            events.append({
+                "type": "screens_changed",
+                "before": {k: v for k, v in old["screens"].items() if k != "monitors"},
+                "after": {k: v for k, v in new["screens"].items() if k != "monitors"},
+                "monitors": new["screens"]["monitors"],
+            })
+        for key in new["processes"].keys() - old["processes"].keys():
+            events.append({"type": "process_started", **new["processes"][key]})
+        for key in old["processes"].keys() - new["processes"].keys():
+            events.append({"type": "process_exited", **old["processes"][key]})
+        for name in new["services"].keys() - old["services"].keys():
+            events.append({"type": "service_started", "name": name, **new["services"][name]})
+        for name in old["services"].keys() - new["services"].keys():
+            events.append({"type": "service_stopped", "name": name, **old["services"][name]})
+        return events
+
+    def check(self) -> List[Dict]:
+        """
+        Executa uma verificação e registra as diferenças. Na primeira chamada
+        registra um evento "baseline" com o estado inicial.
+        """
+        new_state = self.scan()
+        if self.state is None:
+            events = [{
+                "type": "baseline",
+                "screens": {k: v for k, v in new_state["screens"].items() if k != "monitors"},
+                "suspicious_processes": sorted(p["name"] for p in new_state["processes"].values()),
+                "suspicious_services": sorted(new_state["services"]),
+            }]
+        else:
+            events = self.diff(self.state, new_state)
+        self.state = new_state
+
+        if events:
+            timestamp = datetime.now().isoformat()
+            for event in events:
+                event["ts"] = timestamp
+            self._write(events)
+            if self.server_url:
+                self._send(events)
+        return events
+
+    def _write(self, events: List[Dict]):
+        directory = os.path.dirname(self.event_log)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.event_log, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def _send(self, events: List[Dict]):
+        """
+        Enfileira os eventos para a thread de envio (iniciada no primeiro uso)
+        """
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._send_loop, name="exam-watch-send", daemon=True)
+            self._sender.start()
+        alerts = [
+            {
+                "student_id": self.student_id,
+                "timestamp": event["ts"],
+                "reason": f"verification_{event['type']}",
+                "extra": event,
+            }
+            for event in events
+        ]
+        try:
+            self._send_queue.put_nowait(alerts)
+        except queue.Full:
+            # Servidor fora do ar há muito tempo: os eventos continuam no log NDJSON
+            print(f"⚠️  Fila de envio cheia; {len(alerts)} evento(s) só no log local")
+
+    def _post(self, alerts: List[Dict]) -> Tuple[int, float]:
+        """
+        Envia um lote e retorna (aceitos, segundos_para_nova_tentativa)
+        """
+        response = self._session.post(self.server_url, json=alerts, timeout=5)
+        status = response.status_code
+        try:
+            accepted = int(response.json().get("accepted", len(alerts)))
+        except (ValueError, TypeError, AttributeError):
+            accepted = len(alerts) if status < 400 else 0
+        accepted = max(0, min(accepted, len(alerts)))
+        if status < 400:
+            return accepted, 0.0
+        if status in (429, 503):
+            try:
+                retry_after = float(response.headers.get("Retry-After", 1))
+            except (TypeError, ValueError):
+                retry_after = 1.0
+            return accepted, max(retry_after, 0.1)
+        if status < 500:
+            # Erro permanente: reenviar não adianta; os eventos seguem no log local
+            print(f"⚠️  Servidor recusou os eventos: HTTP {status}")
+            return len(alerts), 0.0
+        raise IOError(f"HTTP {status}")
+
+    def _send_loop(self):
+        import requests  # só é necessário quando há servidor configurado
+        self._session = requests.Session()
+        pending = []
+        closing = False
+        backoff = 1.0
+        while True:
+            # Junta os lotes da fila aos pendentes; só bloqueia sem pendentes
+            while not closing and len(pending) < self.MAX_PENDING:
+                try:
+                    alerts = self._send_queue.get(block=not pending)
+                except queue.Empty:
+                    break
+                if alerts is None:
+                    closing = True
+                else:
+                    pending.extend(alerts)
+            if not pending:
+                return
+
+            try:
+                accepted, retry_after = self._post(pending[:self.SEND_BATCH])
+            except Exception as e:
+                retry_after, accepted = backoff, 0
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+                print(f"⚠️  Falha ao enviar eventos ao servidor: {e}")
+            else:
+                backoff = 1.0
+            del pending[:accepted]
+            if retry_after and pending and self._closing.wait(retry_after) and not accepted:
+                # Encerrando sem progresso: não segura a saída do programa
+                print(f"⚠️  {len(pending)} evento(s) não enviados; estão no log local")
+                return
+
+    def close(self, timeout: float = 10.0):
+        """
+        Aguarda (até `timeout` segundos) o envio dos eventos pendentes
+        """
+        if self._sender is None:
+            return
+        try:
+            self._send_queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._closing.set()
+        self._sender.join(timeout)
+
+    def run(self, interval: float, duration: float = None):
+        """
+        Re-verifica a cada `interval` segundos até `duration` segundos
+        (ou até Ctrl+C)
+        """
+        started = time.monotonic()
+        while True:
+            cycle_start = time.monotonic()
+            try:
+                events = self.check()
+            except Exception as e:
+                # Uma verificação que falhou não encerra o modo contínuo
+                print(f"⚠️  Falha na verificação: {e!r}; nova tentativa em {interval:g}s")
+                events = []
+            for event in events:
+                print(f"[{event['ts']}] {event['type']}: "
+                      f"{event.get('name') or event.get('after') or ''}")
+            if duration is not None and time.monotonic() - started >= duration:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - cycle_start)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verificador de segurança para exames supervisionados")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="executa telas, processos e serviços em paralelo")
+    parser.add_argument("--phase-timeout", type=float, default=30.0,
+                        help="tempo máximo (s) de cada fase no modo paralelo")
+    parser.add_argument("--watch", action="store_true",
+                        help="modo contínuo: re-verifica e registra apenas as diferenças")
+    parser.add_argument("--interval", type=float, default=180.0,
+                        help="intervalo (s) entre verificações no modo contínuo")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="duração total (s) do modo contínuo (padrão: até Ctrl+C)")
+    parser.add_argument("--event-log", default=None,
+                        help="arquivo NDJSON de eventos do modo contínuo")
+    parser.add_argument("--server-url", default=None,
+                        help="envia os eventos ao servidor de alertas (ex.: http://host:5000/alertas; "
+                             "/alerta e a URL do servidor também são aceitas)")
+    parser.add_argument("--student-id", default=None,
+                        help="identificação enviada ao servidor (padrão: nome da máquina)")
+    parser.add_argument("--archive", nargs="?", default=None,
+                        const=os.path.join(os.path.dirname(__file__), "logs", "archive"),
+                        help="acrescenta o relatório ao arquivo comprimido diário (padrão: logs/archive)")
+    return parser.parse_args(argv)
+
+
+def watch(args) -> int:
+    """
+    Executa o modo contínuo
+    """
+    verifier = ExamSecurityVerifier()
+    event_log = args.event_log
+    if not event_log:
+        logs_path = os.path.join(os.path.dirname(__file__), "logs")
+        event_log = os.path.join(logs_path, f"exam_watch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson")
+
+    print(f"👀 Modo contínuo: verificação a cada {args.interval:g}s | eventos em {event_log}")
+    watcher = ExamWatcher(verifier, event_log, server_url=args.server_url, student_id=args.student_id)
+    try:
+        watcher.run(args.interval, args.duration)
+    except KeyboardInterrupt:
+        print("\n⏹️  Modo contínuo encerrado")
+    finally:
+        watcher.close()
+    return 0
+
+
+def main(argv=None):
     """
     Função principal
     """
+    args = parse_args(argv)
+    
     print("=" * 60)
     print("🎓 VERIFICADOR DE SEGURANÇA PARA EXAMES SUPERVISIONADOS")
     print("=" * 60)
     
-    verifier = ExamSecurityVerifier()
+    if args.watch:
+        return watch(args)
+    
+    verifier = ExamSecurityVerifier(archive_dir=args.archive)
     
     try:
         # Gerar relatório completo
-        report = verifier.generate_report()
+        report = verifier.generate_report(concurrent=args.concurrent, phase_timeout=args.phase_timeout)
         
         # Exibir resumo
         print("\n" + "=" * 40)
@@ -495,6 +1112,10 @@ def main():
         print(f"⚙️  Serviços suspeitos: {len(security_info['suspicious_services'])}")
         print(f"🤖 Apps de IA: {len(security_info['ai_applications'])}")
         print(f"📈 Score de risco: {security_info['risk_score']}%")
+        print(f"⏱️  Tempo total: {report['execution']['phase_durations_ms']['total']} ms")
+        
+        for phase, error in report["execution"].get("phase_errors", {}).items():
+            print(f"⚠️  Fase '{phase}' incompleta: {error}")
         
         # Mostrar itens críticos
         if security_info['suspicious_processes']:
@@ -520,6 +1141,8 @@ def main():
         print("\n" + "=" * 40)
         if screen_info['has_secondary_screens']:
             print("🔴 STATUS: NÃO APROVADO PARA EXAME - Telas múltiplas detectadas")
+        elif security_info.get('inconclusive'):
+            print("⚪ STATUS: INCONCLUSIVO - Fases incompletas, repita a verificação")
         elif security_info['risk_score'] > 30:
             print("🟡 STATUS: RISCO ALTO - Revise aplicativos suspeitos")
         elif security_info['total_suspicious_items'] > 0:
@@ -0,0 +1,106 @@
+"""
+Formato compacto para lotes de alertas (monitor -> servidor).
+
+O lote é NDJSON comprimido com gzip, enviado a POST /alertas com
+Content-Type: application/x-alert-batch e Content-Encoding: gzip:
+
+    {"v":1,"common":{"student_id":"aluno123","class_id":"3A"}}
+    {"timestamp":"...","reason":"left_exam_context","extra":{"proc":"chrome.exe",...}}
+    ...
+
+A primeira linha é o cabeçalho: campos iguais em todos os alertas do lote
+(student_id, class_id) vão uma vez em "common". Os demais textos repetidos
+(processo, título, URL) ficam a cargo do gzip, que já os transmite como
+referências ao trecho anterior — uma tabela de textos explícita deixava o
+lote comprimido maior, não menor.
+
+Usado por client/outbox.py (codificação) e server/server.py (decodificação).
+Cliente e servidor são implantados separadamente, então o módulo tem duas
+cópias idênticas, client/alert_wire.py e server/alert_wire.py: altere as
+duas juntas (tests/test_vendored.py confere que não divergem).
+"""
+import gzip
+import json
+import zlib
+from typing import Dict, List, Optional
+
+CONTENT_TYPE = "application/x-alert-batch"
+VERSION = 1
+COMMON_FIELDS = ("student_id", "class_id")
+
+_MISSING = object()
+_SEPARATORS = (",", ":")
+
+
+class UnsupportedFormat(ValueError):
+    """
+    Versão ou Content-Encoding desconhecidos (o servidor responde 415)
+    """
+
+
+def encode_batch(alerts: List[Dict], compresslevel: int = 9) -> bytes:
+    """
+    Codifica um lote de alertas no formato compacto (já comprimido)
+    """
+    common = {}
+    for field in COMMON_FIELDS:
+        value = alerts[0].get(field, _MISSING) if alerts else _MISSING
+        if value is not _MISSING and all(a.get(field, _MISSING) == value for a in alerts):
+            common[field] = value
+
+    lines = [json.dumps({"v": VERSION, "common": common}, ensure_ascii=False, separators=_SEPARATORS)]
+    lines.extend(json.dumps({k: v for k, v in alert.items() if k not in common},
+                            ensure_ascii=False, separators=_SEPARATORS)
+                 for alert in alerts)
+    return gzip.compress("\n".join(lines).encode("utf-8"), compresslevel)
+
+
+def _gunzip(body: bytes, max_bytes: int) -> bytes:
+    # Limite do tamanho descomprimido: um lote pequeno não pode virar gigabytes
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, max_bytes + 1)
+    except zlib.error as e:
+        raise ValueError(f"gzip inválido: {e}")
+    if len(data) > max_bytes or decompressor.unconsumed_tail:
+        raise ValueError(f"lote maior que {max_bytes} bytes descomprimido")
+    return data
+
+
+def decode_batch(body: bytes, content_encoding: Optional[str] = None,
+                 max_bytes: int = 8 * 1024 * 1024) -> List[Dict]:
+    """
+    Decodifica um lote compacto. ValueError se o conteúdo for inválido;
+    UnsupportedFormat se a versão ou a compressão não forem suportadas.
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "gzip":
+        body = _gunzip(body, max_bytes)
+    elif encoding != "identity":
+        raise UnsupportedFormat(f"Content-Encoding não suportado: {content_encoding}")
+    elif len(body) > max_bytes:
+        raise ValueError(f"lote maior que {max_bytes} bytes")
+
+    lines = body.decode("utf-8").splitlines()
+    if not lines:
+        raise ValueError("lote vazio")
+    header = json.loads(lines[0])
+    if not isinstance(header, dict):
+        raise ValueError("cabeçalho do lote inválido")
+    if header.get("v") != VERSION:
+        raise UnsupportedFormat(f"versão do lote não suportada: {header.get('v')}")
+    common = header.get("common") or {}
+    if not isinstance(common, dict):
+        raise ValueError("cabeçalho do lote inválido")
+
+    alerts = []
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        alert = json.loads(line)
+        if not isinstance(alert, dict):
+            raise ValueError("cada linha do lote deve ser um objeto JSON")
+        merged = dict(common)
+        merged.update(alert)
+        alerts.append(merged)
+    return alerts
@@ -0,0 +1,107 @@
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class Subscriber:
+    """
+    Um painel conectado ao stream. Os alertas ficam em um buffer limitado:
+    quando ele enche, os mais antigos são descartados (e contados), de modo
+    que um navegador lento nunca segura a ingestão nem acumula memória.
+    """
+
+    def __init__(self, student_id: Optional[str] = None, class_id: Optional[str] = None,
+                 buffer_size: int = 256):
+        self.student_id = student_id
+        self.class_id = class_id
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._wakeup = threading.Event()
+
+    def matches(self, alert: Dict) -> bool:
+        if self.student_id and alert.get("student_id") != self.student_id:
+            return False
+        if self.class_id and alert.get("class_id") != self.class_id:
+            return False
+        return True
+
+    def push(self, item):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(item)  # deque com maxlen descarta o mais antigo
+        self._wakeup.set()
+
+    def drain(self, timeout: float):
+        """
+        Aguarda até `timeout` segundos e retorna (itens, descartados)
+        """
+        if not self.buffer:
+            self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        items = []
+        while True:
+            try:
+                items.append(self.buffer.popleft())
+            except IndexError:
+                break
+        dropped, self.dropped = self.dropped, 0
+        return items, dropped
+
+
+class AlertBroadcaster:
+    """
+    Distribui cada alerta aceito para os painéis inscritos (Server-Sent Events).
+    publish() roda no handler de ingestão: serializa cada alerta uma única vez
+    e apenas o acrescenta aos buffers, sem nunca esperar por um inscrito.
+    """
+
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        # Tupla imutável trocada a cada inscrição: publish() não precisa de lock
+        self._subscribers = ()
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, student_id: Optional[str] = None, class_id: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(student_id, class_id, self.buffer_size)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscriber,)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscriber)
+
+    def publish(self, alerts: List[Dict]):
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        for alert in alerts:
+            data = None
+            for subscriber in subscribers:
+                if subscriber.matches(alert):
+                    if data is None:
+                        data = json.dumps(alert, ensure_ascii=False)
+                    subscriber.push((alert.get("id"), data))
+
+    def stream(self, subscriber: Subscriber, keepalive: float = 15.0):
+        """
+        Gera o corpo text/event-stream para um inscrito até a desconexão
+        """
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                items, dropped = subscriber.drain(keepalive)
+                if dropped:
+                    yield f"event: dropped\ndata: {dropped}\n\n"
+                if not items:
+                    # Comentário SSE: mantém a conexão viva atrás de proxies
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(f"id: {alert_id}\nevent: alerta\ndata: {data}\n\n"
+                              for alert_id, data in items)
+        finally:
+            self.unsubscribe(subscriber)
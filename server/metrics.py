@@ -0,0 +1,221 @@
+import bisect
+import itertools
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Baldes (s) das latências de requisição e de gravação de lotes
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Limite de valores distintos de cada rótulo de uma métrica (ex.: reason,
+# que vem do cliente): o excedente é contado em "other" para a memória não
+# crescer sem limite, sem afetar os demais rótulos
+MAX_LABEL_VALUES = 100
+
+
+class _ShardOwner:
+    """
+    Dono do shard de uma thread, guardado em threading.local: é liberado
+    quando a thread termina, e o finalizador aposenta o shard
+    """
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self):
+        self.shard = {}
+
+
+class _Sharded:
+    """
+    Base das métricas sem lock: cada thread escreve no seu próprio shard
+    (guardado em threading.local) e a coleta soma os shards. Quando a
+    thread termina (o servidor cria uma por requisição), um finalizador
+    soma o shard a um acumulador e o descarta, de modo que só existem
+    shards das threads vivas, haja coleta ou não. Os shards têm chave
+    própria, não o id da thread, que pode ser reaproveitado.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 max_label_values: int = MAX_LABEL_VALUES):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.max_label_values = max_label_values
+        self._local = threading.local()
+        self._next_shard = itertools.count()
+        self._shards: Dict[int, Dict] = {}
+        self._retired: Dict = {}
+        # Só na coleta e no fim de cada thread, nunca no caminho quente
+        self._collect_lock = threading.RLock()
+        self._label_values = [set() for _ in labels]
+        self._keys: Dict[Tuple, Tuple] = {}
+
+    def _shard(self) -> Dict:
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _ShardOwner()
+            key = next(self._next_shard)
+            self._shards[key] = owner.shard
+            weakref.finalize(owner, self._retire, key)
+        return owner.shard
+
+    def _retire(self, key: int):
+        # Roda na thread que terminou, quando ela não escreve mais no shard
+        with self._collect_lock:
+            shard = self._shards.pop(key, None)
+            if shard:
+                self._merge(self._retired, shard)
+
+    def _key(self, values: Tuple) -> Tuple:
+        key = self._keys.get(values)
+        if key is not None:
+            return key
+        normalized = []
+        for seen, value in zip(self._label_values, values):
+            if value not in seen:
+                if len(seen) >= self.max_label_values:
+                    value = "other"
+                else:
+                    seen.add(value)
+            normalized.append(value)
+        key = tuple(normalized)
+        if key == values:
+            # Só as combinações dentro do limite: o cache também fica limitado
+            self._keys[values] = key
+        return key
+
+    def _merge(self, acc: Dict, shard: Dict):
+        raise NotImplementedError
+
+    def _collect(self) -> Dict:
+        with self._collect_lock:
+            totals = {}
+            self._merge(totals, self._retired)
+            for shard in list(self._shards.values()):
+                self._merge(totals, shard)
+            return totals
+
+    def _format_labels(self, values: Tuple, extra: str = "") -> str:
+        pairs = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        shard = self._shard()
+        key = self._key(label_values)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, acc: Dict, shard: Dict):
+        for key, value in list(shard.items()):
+            acc[key] = acc.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value:g}"
+                for key, value in sorted(self._collect().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS, max_label_values: int = MAX_LABEL_VALUES):
+        super().__init__(name, help_text, labels, max_label_values)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *label_values):
+        shard = self._shard()
+        key = self._key(label_values)
+        cell = shard.get(key)
+        if cell is None:
+            # [contagem por balde..., +Inf], soma
+            cell = shard[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        cell[0][bisect.bisect_left(self.buckets, value)] += 1
+        cell[1] += value
+
+    def _merge(self, acc: Dict, shard: Dict):
+        for key, (counts, total) in list(shard.items()):
+            cell = acc.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            for index, count in enumerate(counts):
+                cell[0][index] += count
+            cell[1] += total
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{self._format_labels(key, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total:.6f}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Valor lido no momento da coleta: a função retorna um número ou um
+    dicionário {valores dos rótulos: número}
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, func: Callable, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.func = func
+        self.labels = labels
+
+    def render(self) -> List[str]:
+        value = self.func()
+        if not isinstance(value, dict):
+            return [f"{self.name} {value:g}"]
+        lines = []
+        for key, item in sorted(value.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            labels = ",".join(f'{label}="{_escape(v)}"' for label, v in zip(self.labels, key))
+            lines.append(f"{self.name}{{{labels}}} {item:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas exposto em /metrics no formato texto do Prometheus
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                max_label_values: int = MAX_LABEL_VALUES) -> Counter:
+        return self.register(Counter(name, help_text, labels, max_label_values))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS,
+                  max_label_values: int = MAX_LABEL_VALUES) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets, max_label_values))
+
+    def gauge(self, name: str, help_text: str, func: Callable, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, func, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from sessions import is_violation
+
+
+class TokenBucketLimiter:
+    """
+    Limite de taxa por aluno (token bucket): cada alerta consome um token,
+    os tokens voltam a `rate` por segundo até o máximo de `burst`. Rajadas
+    curtas passam; um cliente em loop é contido sem afetar os demais.
+
+    Baldes cheios equivalem a baldes novos, então os que ficaram ociosos
+    tempo suficiente para encher são descartados (a memória acompanha só os
+    alunos ativos).
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 20):
+        self.rate = rate
+        self.burst = burst
+        self._refill_time = burst / rate if rate > 0 else float("inf")
+        self._lock = threading.Lock()
+        # student_id -> [tokens, último acesso], em ordem de acesso
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def _evict_idle(self, now: float):
+        while self._buckets:
+            key, (_, last) = next(iter(self._buckets.items()))
+            if now - last < self._refill_time:
+                break
+            del self._buckets[key]
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        """
+        Consome um token de `key`. Retorna (permitido, segundos até haver token)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            self._buckets[key] = bucket
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return True, 0.0
+            return False, (1.0 - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+
+    def refund(self, key: str):
+        """
+        Devolve o token de um alerta que não chegou a ser aceito
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(self.burst, bucket[0] + 1.0)
+
+    def tracked(self) -> int:
+        return len(self._buckets)
+
+
+class _Group:
+    __slots__ = ("original", "record", "opened")
+
+    def __init__(self, alert: Dict, opened: float):
+        self.original = alert
+        self.record = alert
+        self.opened = opened
+
+
+class AlertCoalescer:
+    """
+    Agrupa alertas repetidos (mesmo student_id e reason) recebidos dentro de
+    `window` segundos a partir do primeiro: em vez de um registro por
+    transição, o registro original é regravado (mesmo id) com "count",
+    "first_timestamp" e "last_timestamp", e com o "extra" do alerta mais
+    recente. "_received_at" continua o do primeiro, para a paginação por
+    received_at não ver o mesmo id mudar de posição.
+
+    O registro é entregue à gravação (enqueue) ainda sob a trava: assim o
+    id já está atribuído antes de qualquer agrupamento copiar o registro, e
+    as regravações entram na fila na ordem das contagens (com INSERT OR
+    REPLACE, a última gravada é a que fica).
+
+    Só violações são agrupadas: eventos informativos (sessions.is_violation)
+    com o mesmo reason descrevem coisas diferentes (ex.: processos
+    diferentes em verification_process_started) e cada um vira um registro.
+
+    O agrupamento não dispensa o limite por aluno: cada alerta agrupado
+    também consome um token (a regravação custa uma escrita como as demais).
+    """
+
+    def __init__(self, window: float = 30.0):
+        self.window = window
+        self._lock = threading.Lock()
+        # Em ordem de abertura: como a janela é fixa, os vencidos ficam no início
+        self._groups: "OrderedDict[Tuple, _Group]" = OrderedDict()
+
+    @staticmethod
+    def _key(alert: Dict) -> Tuple:
+        return alert.get("student_id"), alert.get("reason")
+
+    @staticmethod
+    def _timestamp(alert: Dict) -> Optional[str]:
+        return alert.get("timestamp") or alert.get("_received_at")
+
+    @classmethod
+    def _merge(cls, record: Dict, alert: Dict):
+        record["count"] = record.get("count", 1) + 1
+        record["last_timestamp"] = cls._timestamp(alert)
+        if "extra" in alert:
+            record["extra"] = alert["extra"]
+
+    def _evict_expired(self, now: float):
+        while self._groups:
+            key, group = next(iter(self._groups.items()))
+            if now - group.opened < self.window:
+                break
+            del self._groups[key]
+
+    def add(self, alert: Dict,
+            enqueue: Callable[[Dict, bool], bool]) -> Tuple[Optional[Dict], bool]:
+        """
+        Agrupa o alerta e entrega o registro resultante a enqueue(registro,
+        agrupado), que retorna se a gravação o aceitou. Retorna (registro
+        gravado, agrupado): se agrupado, o registro é uma cópia atualizada do
+        alerta original, com o mesmo id; senão é o próprio alerta, que abre
+        um novo grupo. Se enqueue recusar, o registro é None e o estado do
+        agrupamento fica como estava.
+        """
+        if self.window <= 0 or not is_violation(alert):
+            return (alert if enqueue(alert, False) else None), False
+        now = time.monotonic()
+        key = self._key(alert)
+        with self._lock:
+            self._evict_expired(now)
+            group = self._groups.get(key)
+            if group is None:
+                if not enqueue(alert, False):
+                    return None, False
+                self._groups[key] = _Group(alert, now)
+                return alert, False
+            record = dict(group.record)
+            record.setdefault("first_timestamp", self._timestamp(group.original))
+            self._merge(record, alert)
+            if not enqueue(dict(record), True):
+                return None, True
+            group.record = record
+            return dict(record), True
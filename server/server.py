@@ -1,15 +1,295 @@
-from flask import Flask, request, jsonify
+import atexit
+import logging
+import math
+import os
+import time
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from datetime import datetime
 
+from alert_wire import CONTENT_TYPE as BATCH_CONTENT_TYPE, UnsupportedFormat, decode_batch
+from live import AlertBroadcaster
+from metrics import MetricsRegistry
+from ratelimit import AlertCoalescer, TokenBucketLimiter
+from sessions import SessionTable
+from stats import AlertStatistics
+from storage import AlertStore, AlertIngestor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Configuração da ingestão (pode ser ajustada por variáveis de ambiente)
+DB_PATH = os.environ.get("ALERT_DB_PATH", os.path.join(BASE_DIR, "alerts.db"))
+QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", "10000"))
+FLUSH_SIZE = int(os.environ.get("ALERT_FLUSH_SIZE", "200"))
+FLUSH_INTERVAL = float(os.environ.get("ALERT_FLUSH_INTERVAL", "0.5"))
+MAX_BULK_ALERTS = int(os.environ.get("ALERT_MAX_BULK", "1000"))
+MAX_BATCH_BYTES = int(os.environ.get("ALERT_MAX_BATCH_BYTES", str(8 * 1024 * 1024)))
+MAX_QUERY_LIMIT = int(os.environ.get("ALERT_MAX_QUERY_LIMIT", "10000"))
+STREAM_BUFFER_SIZE = int(os.environ.get("ALERT_STREAM_BUFFER", "256"))
+RATE_PER_STUDENT = float(os.environ.get("ALERT_RATE_PER_STUDENT", "1"))
+RATE_BURST = int(os.environ.get("ALERT_RATE_BURST", "20"))
+COALESCE_WINDOW = float(os.environ.get("ALERT_COALESCE_WINDOW", "30"))
+HEARTBEAT_INTERVAL = float(os.environ.get("SESSION_HEARTBEAT_INTERVAL", "5"))
+MISSED_HEARTBEATS = int(os.environ.get("SESSION_MISSED_HEARTBEATS", "3"))
+STATS_WINDOW = float(os.environ.get("ALERT_STATS_WINDOW", "300"))
+STATS_MIN_Z = float(os.environ.get("ALERT_STATS_MIN_Z", "2"))
+BURST_MIN = int(os.environ.get("ALERT_BURST_MIN", "5"))
+BURST_FACTOR = float(os.environ.get("ALERT_BURST_FACTOR", "3"))
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
 app = Flask(__name__)
 
+# Métricas operacionais (GET /metrics, formato Prometheus)
+metrics = MetricsRegistry()
+http_requests = metrics.counter("alert_http_requests_total", "Requisições HTTP recebidas",
+                                ("endpoint", "method", "status"))
+http_latency = metrics.histogram("alert_http_request_duration_seconds", "Latência das requisições HTTP",
+                                 ("endpoint",))
+alerts_accepted = metrics.counter("alert_alerts_accepted_total", "Alertas aceitos para gravação", ("reason",))
+alerts_coalesced = metrics.counter("alert_alerts_coalesced_total", "Alertas agrupados a um registro existente")
+alerts_rejected = metrics.counter("alert_alerts_rejected_total", "Alertas recusados (o cliente reenvia)", ("cause",))
+alerts_written = metrics.counter("alert_alerts_written_total", "Alertas gravados no banco")
+alerts_dropped = metrics.counter("alert_alerts_dropped_total", "Alertas descartados na gravação por erro no registro")
+flush_latency = metrics.histogram("alert_flush_duration_seconds", "Tempo de gravação de cada lote")
+batches_received = metrics.counter("alert_batches_total", "Lotes recebidos em POST /alertas", ("format",))
+
+def record_flush(count, seconds):
+    alerts_written.inc(amount=count)
+    flush_latency.observe(seconds)
+
+store = AlertStore(DB_PATH)
+ingestor = AlertIngestor(store, queue_size=QUEUE_SIZE,
+                         flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL,
+                         on_flush=record_flush,
+                         on_drop=lambda count: alerts_dropped.inc(amount=count))
+ingestor.start()
+atexit.register(ingestor.stop)
+
+# Distribuição em tempo real para os painéis dos fiscais
+broadcaster = AlertBroadcaster(buffer_size=STREAM_BUFFER_SIZE)
+
+# Proteção contra clientes "piscando": limite por aluno e agrupamento de repetidos
+limiter = TokenBucketLimiter(rate=RATE_PER_STUDENT, burst=RATE_BURST)
+coalescer = AlertCoalescer(window=COALESCE_WINDOW)
+
+# Sessões dos alunos: heartbeats do monitor + alertas recebidos
+sessions = SessionTable(heartbeat_interval=HEARTBEAT_INTERVAL, missed_heartbeats=MISSED_HEARTBEATS)
+sessions.start()
+atexit.register(sessions.stop)
+
+# Estatísticas incrementais por aluno e turma (GET /stats/outliers)
+stats = AlertStatistics(window=STATS_WINDOW, min_z=STATS_MIN_Z,
+                        burst_min=BURST_MIN, burst_factor=BURST_FACTOR)
+
+metrics.gauge("alert_queue_depth", "Alertas aguardando gravação", ingestor.queue_depth)
+metrics.gauge("alert_queue_capacity", "Capacidade da fila de gravação", lambda: QUEUE_SIZE)
+metrics.gauge("alert_stream_subscribers", "Painéis conectados ao stream", broadcaster.subscriber_count)
+metrics.gauge("alert_students", "Alunos por estado da sessão", sessions.counts, ("status",))
+
+def now_iso():
+    return datetime.utcnow().isoformat() + "Z"
+
+def enqueue_record(record, merged):
+    """Entrega um registro à fila de gravação; chamado sob a trava do agrupamento."""
+    return ingestor.resubmit(record) if merged else ingestor.submit([record]) == 1
+
+def ingest(alerts):
+    """
+    Entrega os alertas à fila de ingestão e monta a resposta HTTP.
+
+    Cada alerta consome um token do balde do aluno, inclusive os
+    agrupados: repetidos (mesmo aluno e reason) dentro da janela de
+    agrupamento regravam o registro original com a contagem atualizada.
+    Os alertas são aceitos sempre em ordem, e "accepted" diz quantos dos
+    primeiros foram aceitos para o cliente reenviar o restante: 429 com
+    Retry-After quando o aluno estourou o limite, 503 quando a fila de
+    gravação está cheia.
+    """
+    received_at = now_iso()
+    accepted = []
+    status_code, retry_after = 200, 0.0
+    for alert in alerts:
+        alert["_received_at"] = received_at
+        key = str(alert.get("student_id") or "-")
+        allowed, wait = limiter.acquire(key)
+        if not allowed:
+            status_code, retry_after = 429, wait
+            break
+        record, merged = coalescer.add(alert, enqueue_record)
+        if record is None:
+            limiter.refund(key)
+            status_code, retry_after = 503, 1.0
+            break
+        accepted.append(record)
+        if merged:
+            alerts_coalesced.inc()
+        alerts_accepted.inc(str(alert.get("reason")))
+
+    if status_code != 200:
+        alerts_rejected.inc("rate_limited" if status_code == 429 else "busy",
+                            amount=len(alerts) - len(accepted))
+    broadcaster.publish(accepted)
+    sessions.record_alerts(accepted)
+    stats.record_alerts(accepted)
+    if status_code != 200:
+        resp = jsonify({
+            "status": "rate_limited" if status_code == 429 else "busy",
+            "accepted": len(accepted),
+            "retry_after": round(retry_after, 2),
+        })
+        resp.status_code = status_code
+        resp.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return resp
+    return jsonify({"status": "ok", "accepted": len(accepted)})
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_request(resp):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    http_requests.inc(endpoint, request.method, str(resp.status_code))
+    started = g.get("started")
+    if started is not None:
+        http_latency.observe(time.perf_counter() - started, endpoint)
+    return resp
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/alerta", methods=["POST"])
 def alerta():
     data = request.get_json(force=True, silent=True) or {}
-    data["_received_at"] = datetime.utcnow().isoformat() + "Z"
-    print(f"[ALERTA] {data}")
-    return jsonify({"status": "ok"})
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "error": "alerta deve ser um objeto JSON"}), 400
+    return ingest([data])
+
+@app.route("/alertas", methods=["GET"])
+def consultar_alertas():
+    """
+    Consulta de alertas para os fiscais, em NDJSON (uma linha por alerta).
+    Filtros: student_id, reason, since, until (ISO 8601). Paginação: limit
+    e cursor (valor de "_next_cursor" da página anterior).
+    """
+    args = request.args
+    try:
+        limit = int(args.get("limit", 1000))
+    except ValueError:
+        return jsonify({"status": "error", "error": "limit deve ser inteiro"}), 400
+    limit = max(1, min(limit, MAX_QUERY_LIMIT))
+
+    rows = store.query(
+        student_id=args.get("student_id"),
+        reason=args.get("reason"),
+        since=args.get("since"),
+        until=args.get("until"),
+        cursor=args.get("cursor"),
+        limit=limit,
+    )
+    try:
+        # Executa a consulta já aqui para devolver 400 em cursor inválido
+        first = next(rows, "")
+    except ValueError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    def generate():
+        yield first
+        yield from rows
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/alertas/stream", methods=["GET"])
+def stream_alertas():
+    """
+    Server-Sent Events com os novos alertas. Filtros opcionais: student_id
+    e class_id. Um evento "dropped" informa alertas descartados porque o
+    painel não acompanhou o ritmo.
+    """
+    subscriber = broadcaster.subscribe(
+        student_id=request.args.get("student_id"),
+        class_id=request.args.get("class_id"),
+    )
+    resp = Response(broadcaster.stream(subscriber), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+@app.route("/alertas", methods=["POST"])
+def alertas():
+    """
+    Recebe um lote de alertas: array JSON ou, com Content-Type
+    application/x-alert-batch, o formato compacto (ver alert_wire.py)
+    """
+    if request.mimetype == BATCH_CONTENT_TYPE:
+        batches_received.inc("compact")
+        try:
+            data = decode_batch(request.get_data(), request.headers.get("Content-Encoding"),
+                                max_bytes=MAX_BATCH_BYTES)
+        except UnsupportedFormat as e:
+            return jsonify({"status": "error", "error": str(e)}), 415
+        except ValueError as e:
+            return jsonify({"status": "error", "error": f"lote inválido: {e}"}), 400
+    elif request.headers.get("Content-Encoding", "identity").lower() != "identity":
+        return jsonify({"status": "error", "error": "Content-Encoding não suportado"}), 415
+    else:
+        batches_received.inc("json")
+        data = request.get_json(force=True, silent=True)
+    if isinstance(data, dict):
+        data = data.get("alerts")
+    if not isinstance(data, list) or not all(isinstance(a, dict) for a in data):
+        return jsonify({"status": "error", "error": "esperado um array de alertas"}), 400
+    if len(data) > MAX_BULK_ALERTS:
+        return jsonify({"status": "error", "error": f"máximo de {MAX_BULK_ALERTS} alertas por requisição"}), 413
+    return ingest(data)
+
+@app.route("/heartbeat", methods=["POST"])
+def heartbeat():
+    """
+    Sinal de vida do monitor: {"student_id": ..., "class_id": ..., "status": "ok" | "violation"}
+    """
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict) or not data.get("student_id"):
+        return jsonify({"status": "error", "error": "student_id obrigatório"}), 400
+    sessions.heartbeat(str(data["student_id"]), class_id=data.get("class_id"), status=data.get("status"))
+    stats.touch(str(data["student_id"]), class_id=data.get("class_id"))
+    return jsonify({"status": "ok", "interval": HEARTBEAT_INTERVAL})
+
+@app.route("/sessions", methods=["GET"])
+def consultar_sessoes():
+    """
+    Estado atual dos alunos. Filtros opcionais: status (online, violation,
+    offline) e class_id
+    """
+    return jsonify({
+        "counts": sessions.counts(),
+        "sessions": sessions.snapshot(status=request.args.get("status"),
+                                      class_id=request.args.get("class_id")),
+    })
+
+@app.route("/sessions/<student_id>", methods=["GET"])
+def consultar_sessao(student_id):
+    session = sessions.get(student_id)
+    if session is None:
+        return jsonify({"status": "error", "error": "aluno sem sessão"}), 404
+    return jsonify(session)
+
+@app.route("/stats/outliers", methods=["GET"])
+def consultar_outliers():
+    """
+    Alunos que se destacam da turma (taxa de alertas ou rajadas na janela),
+    calculados das estatísticas em memória. Parâmetros opcionais: class_id,
+    limit e min_z
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit", 20)), MAX_QUERY_LIMIT))
+        min_z = request.args.get("min_z")
+        min_z = float(min_z) if min_z is not None else None
+    except ValueError:
+        return jsonify({"status": "error", "error": "limit/min_z inválidos"}), 400
+    return jsonify(stats.outliers(class_id=request.args.get("class_id"), limit=limit, min_z=min_z))
 
 if __name__ == "__main__":
-    # Para testes locais
-    app.run(host="0.0.0.0", port=5000)
+    # Para testes locais (threaded: cada painel SSE ocupa uma thread)
+    app.run(host="0.0.0.0", port=5000, threaded=True)
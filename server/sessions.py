@@ -0,0 +1,208 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+STATUS_ONLINE = "online"
+STATUS_VIOLATION = "violation"
+STATUS_OFFLINE = "offline"
+
+# Motivos apenas informativos: eventos do modo contínuo do verificador
+# (baseline, processo encerrado, ...), que não são violações
+INFORMATIONAL_REASON_PREFIXES = ("verification_",)
+
+
+def now_iso():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def is_violation(alert: Dict) -> bool:
+    return not str(alert.get("reason") or "").startswith(INFORMATIONAL_REASON_PREFIXES)
+
+
+class StudentSession:
+    """
+    Estado atual de um aluno. Com __slots__: milhares de sessões ocupam pouca
+    memória e cada heartbeat só atualiza alguns atributos.
+    """
+
+    __slots__ = ("student_id", "class_id", "status", "last_heartbeat", "last_seen",
+                 "violations", "last_violation", "offline_since", "expires_tick")
+
+    def __init__(self, student_id: str, class_id: Optional[str] = None):
+        self.student_id = student_id
+        self.class_id = class_id
+        self.status = STATUS_ONLINE
+        self.last_heartbeat = None
+        self.last_seen = None
+        self.violations = 0
+        self.last_violation = None
+        self.offline_since = None
+        self.expires_tick = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "student_id": self.student_id,
+            "class_id": self.class_id,
+            "status": self.status,
+            "last_heartbeat": self.last_heartbeat,
+            "last_seen": self.last_seen,
+            "violations": self.violations,
+            "last_violation": self.last_violation,
+            "offline_since": self.offline_since,
+        }
+
+
+class SessionTable:
+    """
+    Tabela em memória com a sessão de cada aluno, alimentada pelos heartbeats
+    do monitor e pelos alertas recebidos.
+
+    A detecção de alunos offline usa uma roda de temporização (timer wheel):
+    o tempo é dividido em ticks e cada sessão fica no balde do tick em que
+    expira. Um heartbeat apenas move a sessão de balde (O(1)); a cada tick a
+    thread de varredura examina só o balde que venceu, sem percorrer todas
+    as sessões. Um aluno fica offline depois de `missed_heartbeats`
+    intervalos sem sinal.
+    """
+
+    def __init__(self, heartbeat_interval: float = 5.0, missed_heartbeats: int = 3,
+                 tick: float = 1.0, on_offline: Optional[Callable[[StudentSession], None]] = None):
+        self.heartbeat_interval = heartbeat_interval
+        self.timeout = heartbeat_interval * missed_heartbeats
+        self.tick = tick
+        self.on_offline = on_offline
+        self._timeout_ticks = max(1, math.ceil(self.timeout / tick))
+        # Balde extra: uma expiração nunca cai no balde que está sendo varrido
+        self._wheel = [set() for _ in range(self._timeout_ticks + 2)]
+        self._sessions: Dict[str, StudentSession] = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._current_tick = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-wheel", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # ------------- Roda de temporização -------------
+    def _now_tick(self) -> int:
+        return int((time.monotonic() - self._started) / self.tick)
+
+    def _schedule(self, session: StudentSession):
+        """
+        Move a sessão para o balde da sua nova expiração (chamar com o lock)
+        """
+        if session.expires_tick is not None:
+            self._wheel[session.expires_tick % len(self._wheel)].discard(session.student_id)
+        session.expires_tick = self._now_tick() + self._timeout_ticks
+        self._wheel[session.expires_tick % len(self._wheel)].add(session.student_id)
+
+    def advance(self) -> List[StudentSession]:
+        """
+        Processa os ticks vencidos desde a última chamada e retorna as
+        sessões que ficaram offline
+        """
+        expired = []
+        now_tick = self._now_tick()
+        with self._lock:
+            while self._current_tick < now_tick:
+                self._current_tick += 1
+                bucket = self._wheel[self._current_tick % len(self._wheel)]
+                for student_id in [s for s in bucket
+                                   if self._sessions[s].expires_tick <= self._current_tick]:
+                    bucket.discard(student_id)
+                    session = self._sessions[student_id]
+                    session.expires_tick = None
+                    session.status = STATUS_OFFLINE
+                    session.offline_since = now_iso()
+                    expired.append(session)
+        for session in expired:
+            logging.warning(f"[SESSÃO] {session.student_id} sem heartbeat há mais de {self.timeout:g}s: offline")
+            if self.on_offline:
+                self.on_offline(session)
+        return expired
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            try:
+                self.advance()
+            except Exception as e:
+                logging.error(f"Falha na varredura de sessões: {e}")
+
+    # ------------- Atualizações -------------
+    def _touch(self, student_id: str, class_id: Optional[str]) -> StudentSession:
+        session = self._sessions.get(student_id)
+        if session is None:
+            session = self._sessions[student_id] = StudentSession(student_id, class_id)
+        elif class_id:
+            session.class_id = class_id
+        if session.status == STATUS_OFFLINE:
+            logging.info(f"[SESSÃO] {student_id} voltou a enviar sinais")
+            session.status = STATUS_ONLINE
+            session.offline_since = None
+        session.last_seen = now_iso()
+        self._schedule(session)
+        return session
+
+    def heartbeat(self, student_id: str, class_id: Optional[str] = None,
+                  status: Optional[str] = None) -> StudentSession:
+        """
+        Registra um heartbeat. `status` é o estado informado pelo monitor:
+        "ok" (em conformidade) ou "violation" (fora do contexto da prova)
+        """
+        with self._lock:
+            session = self._touch(student_id, class_id)
+            session.last_heartbeat = session.last_seen
+            if status == "violation":
+                session.status = STATUS_VIOLATION
+            elif status == "ok":
+                session.status = STATUS_ONLINE
+            return session
+
+    def record_alerts(self, alerts: List[Dict]):
+        """
+        Conta as violações dos alertas aceitos; um alerta também é sinal de
+        vida (os informativos, ver is_violation, são apenas isso)
+        """
+        with self._lock:
+            for alert in alerts:
+                student_id = alert.get("student_id")
+                if not student_id:
+                    continue
+                session = self._touch(student_id, alert.get("class_id"))
+                if not is_violation(alert):
+                    continue
+                session.violations += 1
+                session.status = STATUS_VIOLATION
+                session.last_violation = {
+                    "id": alert.get("id"),
+                    "reason": alert.get("reason"),
+                    "timestamp": alert.get("last_timestamp") or alert.get("timestamp") or alert.get("_received_at"),
+                    "count": alert.get("count", 1),
+                }
+
+    # ------------- Consultas -------------
+    def get(self, student_id: str) -> Optional[Dict]:
+        with self._lock:
+            session = self._sessions.get(student_id)
+            return session.to_dict() if session else None
+
+    def snapshot(self, status: Optional[str] = None, class_id: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            return [s.to_dict() for s in self._sessions.values()
+                    if (not status or s.status == status) and (not class_id or s.class_id == class_id)]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {STATUS_ONLINE: 0, STATUS_VIOLATION: 0, STATUS_OFFLINE: 0}
+        with self._lock:
+            for session in self._sessions.values():
+                counts[session.status] += 1
+        return counts
@@ -0,0 +1,256 @@
+import heapq
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sessions import is_violation
+
+
+class SlidingWindowCounter:
+    """
+    Contagem de eventos nos últimos `window` segundos, em um ring buffer de
+    `buckets` baldes. Registrar é O(1): o balde da vez é zerado se pertencia
+    a uma volta anterior do anel. Consultar soma os baldes ainda na janela.
+    """
+
+    __slots__ = ("bucket_width", "counts", "epochs")
+
+    def __init__(self, window: float, buckets: int = 30):
+        self.bucket_width = window / buckets
+        self.counts = [0] * buckets
+        self.epochs = [-1] * buckets  # índice absoluto do balde guardado em cada posição
+
+    def add(self, now: float, amount: int = 1):
+        epoch = int(now // self.bucket_width)
+        index = epoch % len(self.counts)
+        if self.epochs[index] != epoch:
+            self.epochs[index] = epoch
+            self.counts[index] = 0
+        self.counts[index] += amount
+
+    def count(self, now: float) -> int:
+        oldest = int(now // self.bucket_width) - len(self.counts) + 1
+        return sum(count for count, epoch in zip(self.counts, self.epochs) if epoch >= oldest)
+
+
+class RunningStats:
+    """
+    Média e variância incrementais (método de Welford), com remoção: trocar
+    o valor de um aluno é remove() + add(), O(1), sem revisitar os demais.
+    """
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value: float):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = self.mean
+        self.n -= 1
+        self.mean = (old_mean * (self.n + 1) - value) / self.n
+        # Erros de arredondamento não podem deixar a soma dos quadrados negativa
+        self.m2 = max(0.0, self.m2 - (value - old_mean) * (value - self.mean))
+
+    def replace(self, old: float, new: float):
+        self.remove(old)
+        self.add(new)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class _StudentStats:
+    __slots__ = ("student_id", "class_id", "total", "window", "last_reason", "last_seen")
+
+    def __init__(self, student_id: str, class_id: Optional[str], window: float, buckets: int):
+        self.student_id = student_id
+        self.class_id = class_id
+        self.total = 0
+        self.window = SlidingWindowCounter(window, buckets)
+        self.last_reason = None
+        self.last_seen = None
+
+
+class _ClassStats:
+    __slots__ = ("class_id", "members", "totals", "window")
+
+    def __init__(self, class_id: Optional[str], window: float, buckets: int):
+        self.class_id = class_id
+        self.members = set()
+        self.totals = RunningStats()  # distribuição dos totais por aluno
+        self.window = SlidingWindowCounter(window, buckets)
+
+
+class AlertStatistics:
+    """
+    Estatísticas da prova em andamento, atualizadas em O(1) por alerta:
+
+      - por aluno: total de alertas e contagem na janela deslizante
+        (`window` segundos, ring buffer);
+      - por turma: média e desvio padrão dos totais dos alunos (Welford) e
+        contagem na janela da turma inteira.
+
+    Alunos que só enviaram heartbeats (ou só eventos informativos, ver
+    sessions.is_violation) entram com zero alertas, para a média da turma
+    refletir quem está em conformidade. outliers() percorre apenas os
+    alunos da turma consultada, sem reler o histórico do banco.
+
+    Limite das turmas pequenas: com o desvio padrão populacional, o maior
+    z-score possível em uma turma de n alunos é (n-1)/sqrt(n) (um aluno com
+    todos os alertas), e a maior razão de rajada é n. Turmas de até 5 alunos
+    nunca atingem z = 2, e uma de 2 alunos nunca atinge rajada de 3x; o
+    resumo de cada turma informa se cada critério é alcançável.
+    """
+
+    def __init__(self, window: float = 300.0, buckets: int = 30,
+                 min_z: float = 2.0, burst_min: int = 5, burst_factor: float = 3.0):
+        self.window = window
+        self.buckets = buckets
+        self.min_z = min_z
+        self.burst_min = burst_min
+        self.burst_factor = burst_factor
+        self._students: Dict[str, _StudentStats] = {}
+        self._classes: Dict[Optional[str], _ClassStats] = {}
+        self._lock = threading.Lock()
+
+    # ------------- Atualizações -------------
+    def _student(self, student_id: str, class_id: Optional[str]) -> _StudentStats:
+        student = self._students.get(student_id)
+        if student is None:
+            student = self._students[student_id] = _StudentStats(student_id, class_id, self.window, self.buckets)
+            self._class(class_id).members.add(student_id)
+            self._classes[class_id].totals.add(0)
+        elif class_id and student.class_id != class_id:
+            # Aluno mudou de turma (ex.: class_id configurado depois): leva o total junto
+            old = self._classes[student.class_id]
+            old.members.discard(student_id)
+            old.totals.remove(student.total)
+            new = self._class(class_id)
+            new.members.add(student_id)
+            new.totals.add(student.total)
+            student.class_id = class_id
+        return student
+
+    def _class(self, class_id: Optional[str]) -> _ClassStats:
+        stats = self._classes.get(class_id)
+        if stats is None:
+            stats = self._classes[class_id] = _ClassStats(class_id, self.window, self.buckets)
+        return stats
+
+    def touch(self, student_id: str, class_id: Optional[str] = None):
+        """
+        Registra um aluno presente (heartbeat) sem alertas
+        """
+        with self._lock:
+            self._student(student_id, class_id)
+
+    def record_alerts(self, alerts: List[Dict]):
+        now = time.monotonic()
+        with self._lock:
+            for alert in alerts:
+                student_id = alert.get("student_id")
+                if not student_id:
+                    continue
+                student = self._student(str(student_id), alert.get("class_id"))
+                if not is_violation(alert):
+                    continue
+                group = self._classes[student.class_id]
+                group.totals.replace(student.total, student.total + 1)
+                group.window.add(now)
+                student.total += 1
+                student.window.add(now)
+                student.last_reason = alert.get("reason")
+                student.last_seen = alert.get("last_timestamp") or alert.get("timestamp") or alert.get("_received_at")
+
+    # ------------- Consultas -------------
+    @staticmethod
+    def max_z_score(students: int) -> float:
+        """
+        Maior z-score (desvio populacional) possível em uma turma de `students` alunos
+        """
+        return (students - 1) / math.sqrt(students) if students > 0 else 0.0
+
+    def _class_summary(self, group: _ClassStats, now: float, min_z: float) -> Dict:
+        students = len(group.members)
+        return {
+            "class_id": group.class_id,
+            "students": students,
+            "mean_alerts": round(group.totals.mean, 3),
+            "stddev_alerts": round(group.totals.stddev, 3),
+            "window_alerts": group.window.count(now),
+            # False: a turma é pequena demais para o critério dar positivo
+            "rate_reachable": self.max_z_score(students) >= min_z,
+            "burst_reachable": students >= self.burst_factor,
+        }
+
+    def outliers(self, class_id: Optional[str] = None, limit: int = 20,
+                 min_z: Optional[float] = None) -> Dict:
+        """
+        Alunos que se destacam da turma, do mais para o menos discrepante:
+        z-score do total de alertas >= min_z, ou rajada (pelo menos
+        burst_min alertas na janela e burst_factor vezes a média da turma
+        na janela)
+        """
+        min_z = self.min_z if min_z is None else min_z
+        now = time.monotonic()
+        found = []
+        with self._lock:
+            if class_id is None or class_id == "":
+                # Sem filtro: todas as turmas, inclusive a dos alunos sem class_id
+                groups = list(self._classes.values())
+            else:
+                groups = [self._classes[class_id]] if class_id in self._classes else []
+            summaries = []
+            for group in groups:
+                summaries.append(self._class_summary(group, now, min_z))
+                mean, stddev = group.totals.mean, group.totals.stddev
+                window_mean = group.window.count(now) / max(1, len(group.members))
+                for student_id in group.members:
+                    student = self._students[student_id]
+                    z_score = (student.total - mean) / stddev if stddev > 0 else 0.0
+                    window_count = student.window.count(now)
+                    burst_ratio = window_count / window_mean if window_mean > 0 else 0.0
+                    flags = []
+                    if z_score >= min_z:
+                        flags.append("rate")
+                    if window_count >= self.burst_min and burst_ratio >= self.burst_factor:
+                        flags.append("burst")
+                    if flags:
+                        found.append({
+                            "student_id": student_id,
+                            "class_id": group.class_id,
+                            "total_alerts": student.total,
+                            "z_score": round(z_score, 2),
+                            "window_alerts": window_count,
+                            "burst_ratio": round(burst_ratio, 2),
+                            "flags": flags,
+                            "last_reason": student.last_reason,
+                            "last_seen": student.last_seen,
+                        })
+        ranked = heapq.nlargest(limit, found, key=lambda o: (o["z_score"], o["burst_ratio"]))
+        return {
+            "window_sec": self.window,
+            "min_z": min_z,
+            "classes": summaries,
+            "outliers": ranked,
+        }
+
+    def student_count(self) -> int:
+        return len(self._students)
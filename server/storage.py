@@ -0,0 +1,336 @@
+import base64
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Esquema do banco de alertas. O payload completo recebido do cliente é
+# guardado em JSON; as colunas extraídas servem para filtros e índices.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT,
+    reason TEXT,
+    timestamp TEXT,
+    received_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+-- Linha do tempo de um aluno e varreduras por horário de recebimento
+CREATE INDEX IF NOT EXISTS idx_alerts_student_ts ON alerts (student_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_received ON alerts (received_at, id);
+"""
+
+QUERY_CHUNK = 500
+
+
+def encode_cursor(sort_value, alert_id):
+    raw = json.dumps([sort_value, alert_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica o cursor opaco de paginação em (valor_de_ordenação, id)
+    """
+    try:
+        sort_value, alert_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(sort_value), int(alert_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("cursor inválido")
+
+
+def lock_writer(db_path: str):
+    """
+    Trava exclusiva (não bloqueante) em "<banco>.lock", liberada pelo
+    sistema quando o processo termina. Retorna o arquivo aberto, que deve
+    ficar aberto enquanto o processo grava; levanta RuntimeError se outro
+    processo já grava neste banco.
+    """
+    handle = open(db_path + ".lock", "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        raise RuntimeError(f"{db_path} já é gravado por outro processo do servidor de alertas")
+    return handle
+
+
+class AlertStore:
+    """
+    Armazenamento durável dos alertas em SQLite (modo WAL)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = self.connect()
+        try:
+            conn.executescript(SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Abre uma conexão nova. Cada thread deve usar a sua própria conexão;
+        com WAL, leitores não bloqueiam o escritor (e vice-versa).
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def max_id(self) -> int:
+        conn = self.connect()
+        try:
+            row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()
+            return row[0]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def write_batch(conn: sqlite3.Connection, alerts: List[Dict]):
+        """
+        Grava um lote de alertas em uma única transação
+        """
+        rows = [
+            (
+                alert["id"],
+                alert.get("student_id"),
+                alert.get("reason"),
+                # Sem timestamp do cliente, usa o de recebimento (mantém o índice útil)
+                alert.get("timestamp") or alert["_received_at"],
+                alert["_received_at"],
+                json.dumps(alert, ensure_ascii=False),
+            )
+            for alert in alerts
+        ]
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO alerts (id, student_id, reason, timestamp, received_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def query(self, student_id=None, reason=None, since=None, until=None,
+              cursor=None, limit=1000):
+        """
+        Consulta paginada por cursor, gerando linhas NDJSON sem montar o
+        resultado em memória.
+
+        Com student_id, a ordenação e o intervalo (since/until) usam o
+        timestamp do aluno, pelo índice (student_id, timestamp); sem ele,
+        usam o horário de recebimento, pelo índice (received_at). A última
+        linha traz {"_next_cursor": ...} quando há mais resultados.
+        """
+        sort_column = "timestamp" if student_id else "received_at"
+        where, params = [], []
+        if student_id:
+            where.append("student_id = ?")
+            params.append(student_id)
+        if reason:
+            where.append("reason = ?")
+            params.append(reason)
+        if since:
+            where.append(f"{sort_column} >= ?")
+            params.append(since)
+        if until:
+            where.append(f"{sort_column} < ?")
+            params.append(until)
+        if cursor:
+            where.append(f"({sort_column}, id) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        sql = f"SELECT {sort_column}, id, payload FROM alerts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {sort_column}, id LIMIT ?"
+        params.append(limit)
+
+        conn = self.connect()
+        try:
+            rows = conn.execute(sql, params)
+            count = 0
+            last = None
+            while True:
+                chunk = rows.fetchmany(QUERY_CHUNK)
+                if not chunk:
+                    break
+                for sort_value, alert_id, payload in chunk:
+                    yield payload + "\n"
+                count += len(chunk)
+                last = chunk[-1]
+            if count == limit and last is not None:
+                yield json.dumps({"_next_cursor": encode_cursor(last[0], last[1])}) + "\n"
+        finally:
+            conn.close()
+
+
+class AlertIngestor:
+    """
+    Pipeline de ingestão: os handlers HTTP apenas enfileiram os alertas em uma
+    fila limitada; uma thread escritora os grava em lotes no AlertStore,
+    quando o lote atinge flush_size ou quando flush_interval segundos se
+    passam desde o primeiro alerta do lote.
+
+    Um único processo grava em cada banco: os ids são atribuídos na chegada
+    a partir do maior id gravado, e dois processos regravariam os registros
+    um do outro (INSERT OR REPLACE). O construtor trava o banco (lock_writer)
+    e falha se outro processo já o usa.
+
+    Falhas do banco (sqlite3.OperationalError: travado, disco cheio) mantêm
+    o lote para nova tentativa. Qualquer outro erro é do próprio lote: ele é
+    regravado um alerta por vez e os alertas que ainda falham são
+    descartados e registrados no log, sem derrubar a thread escritora.
+    """
+
+    def __init__(self, store: AlertStore, queue_size: int = 10000,
+                 flush_size: int = 200, flush_interval: float = 0.5,
+                 on_flush: Optional[Callable[[int, float], None]] = None,
+                 on_drop: Optional[Callable[[int], None]] = None):
+        self.store = store
+        # Chamado após cada lote gravado com (alertas, segundos), para métricas
+        self.on_flush = on_flush
+        # Chamado com o número de alertas descartados por erro no próprio registro
+        self.on_drop = on_drop
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer_lock = lock_writer(store.path)
+        # Ids atribuídos na chegada: permitem referenciar o alerta antes de gravado
+        self._ids = itertools.count(store.max_id() + 1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="alert-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Interrompe a thread escritora após gravar o que estiver na fila
+        """
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._writer_lock.close()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, alerts: List[Dict]) -> int:
+        """
+        Enfileira os alertas em ordem e retorna quantos foram aceitos.
+        Se a fila encher, os alertas restantes são recusados (o cliente deve
+        reenviá-los mais tarde).
+        """
+        accepted = 0
+        for alert in alerts:
+            alert["id"] = next(self._ids)
+            try:
+                self._queue.put_nowait(alert)
+            except queue.Full:
+                break
+            accepted += 1
+        return accepted
+
+    def resubmit(self, alert: Dict) -> bool:
+        """
+        Enfileira a nova versão de um alerta já aceito (mesmo id): a gravação
+        substitui o registro existente. Retorna False com a fila cheia.
+        """
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            return False
+        return True
+
+    def _next_batch(self) -> List[Dict]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_each(self, conn: sqlite3.Connection, batch: List[Dict]) -> int:
+        """
+        Grava o lote um alerta por vez, descartando os que falham. Retorna
+        quantos foram gravados; falhas do banco sobem para nova tentativa.
+        """
+        written = 0
+        for alert in batch:
+            try:
+                self.store.write_batch(conn, [alert])
+            except sqlite3.OperationalError:
+                raise
+            except Exception as e:
+                logging.error(f"Alerta descartado (id={alert.get('id')!r}): {e!r}; payload: {alert!r}")
+                if self.on_drop:
+                    self.on_drop(1)
+                continue
+            written += 1
+        return written
+
+    def _run(self):
+        conn = self.store.connect()
+        backoff = 0.5
+        batch = []
+        try:
+            while not (self._stop.is_set() and self._queue.empty() and not batch):
+                try:
+                    if not batch:
+                        batch = self._next_batch()
+                        if not batch:
+                            continue
+                    started = time.perf_counter()
+                    try:
+                        self.store.write_batch(conn, batch)
+                        written = len(batch)
+                    except sqlite3.OperationalError:
+                        raise
+                    except Exception as e:
+                        logging.error(f"Lote de {len(batch)} alertas recusado ({e!r}); gravando um a um")
+                        written = self._write_each(conn, batch)
+                except sqlite3.OperationalError as e:
+                    # Mantém o lote e tenta de novo; enquanto isso a fila
+                    # limitada devolve 503 aos clientes (backpressure)
+                    logging.error(f"Falha ao gravar lote de {len(batch)} alertas: {e}")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 10.0)
+                    continue
+                except Exception:
+                    logging.exception(f"Erro inesperado na gravação; lote de {len(batch)} alertas descartado")
+                    if self.on_drop and batch:
+                        self.on_drop(len(batch))
+                    batch = []
+                    continue
+                batch = []
+                backoff = 0.5
+                if self.on_flush:
+                    try:
+                        self.on_flush(written, time.perf_counter() - started)
+                    except Exception:
+                        logging.exception("Falha ao registrar métricas do lote")
+                logging.info(f"[ALERTA] {written} alerta(s) gravado(s)")
+        finally:
+            conn.close()
@@ -0,0 +1,63 @@
+"""
+Utilitários dos testes.
+
+client/ e server/ são implantados separadamente e usam imports planos
+(`from metrics import ...`), com nomes repetidos entre os dois lados.
+load() importa um módulo de um dos lados isolando os módulos planos do
+outro, para que os testes dos dois convivam no mesmo processo.
+
+Rodar da raiz do projeto:
+    python -m unittest discover -s tests
+"""
+import importlib
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIDES = {name: os.path.join(ROOT, name) for name in ("client", "server", "benchmarks")}
+
+_loaded = {}
+
+
+def load(side: str, name: str):
+    key = (side, name)
+    if key in _loaded:
+        return _loaded[key]
+    directory = SIDES[side]
+    # Tira de sys.modules os módulos planos dos outros diretórios
+    hidden = {}
+    for module_name, module in list(sys.modules.items()):
+        module_dir = os.path.dirname(getattr(module, "__file__", None) or "")
+        if module_dir in SIDES.values() and module_dir != directory:
+            hidden[module_name] = sys.modules.pop(module_name)
+    saved_path = sys.path[:]
+    sys.path.insert(0, directory)
+    try:
+        module = importlib.import_module(name)
+    finally:
+        sys.path[:] = saved_path
+        # Os módulos deste lado saem de sys.modules: cada um já guarda
+        # referências ao que importou
+        for module_name, loaded in list(sys.modules.items()):
+            if os.path.dirname(getattr(loaded, "__file__", None) or "") == directory:
+                del sys.modules[module_name]
+        sys.modules.update(hidden)
+    _loaded[key] = module
+    return module
+
+
+def load_root(name: str):
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return importlib.import_module(name)
+
+
+def load_verifier():
+    """
+    Importa script_verification; fora do Windows, com os módulos win32
+    falsos das fixtures do benchmark (uma tela)
+    """
+    if "win32api" not in sys.modules and importlib.util.find_spec("win32api") is None:
+        load("benchmarks", "fixtures").install_fake_win32(monitors=1)
+    return load_root("script_verification")
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+from support import load_root
+
+aggregate_reports = load_root("aggregate_reports")
+
+
+def write_report(root, lab, name, risk_score, processes=(), monitors=1, mtime=None):
+    directory = os.path.join(root, lab)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"exam_security_report_{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "system_info": {"hostname": name},
+            "security_analysis": {"risk_score": risk_score,
+                                  "suspicious_processes": [{"name": p} for p in processes]},
+            "screen_verification": {"total_monitors": monitors, "has_secondary_screens": monitors > 1},
+        }, f)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+class IncrementalRerunTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.root = os.path.join(self.dir.name, "relatorios")
+        self.state = os.path.join(self.dir.name, "estado.json")
+        write_report(self.root, "lab01", "pc01", 10, ["anydesk.exe"], mtime=1_000_000_000)
+        write_report(self.root, "lab01", "pc02", 50, ["obs64.exe"], monitors=2, mtime=1_000_000_000)
+
+    def run_aggregate(self):
+        return aggregate_reports.aggregate(self.root, self.state, workers=1)
+
+    def test_unchanged_reports_are_skipped(self):
+        _, processed = self.run_aggregate()
+        self.assertEqual(processed, 2)
+        fleet, processed = self.run_aggregate()
+        self.assertEqual(processed, 0)
+        self.assertEqual(fleet.summary()["reports"], 2)
+
+    def test_rewritten_report_replaces_previous_contribution(self):
+        self.run_aggregate()
+        write_report(self.root, "lab01", "pc02", 5, ["teamviewer.exe"], mtime=2_000_000_000)
+        write_report(self.root, "lab02", "pc03", 20)
+
+        fleet, processed = self.run_aggregate()
+        self.assertEqual(processed, 2)
+        summary = fleet.summary()
+        self.assertEqual(summary["reports"], 3)
+        self.assertEqual(dict(summary["top_suspicious_processes"]), {"anydesk.exe": 1, "teamviewer.exe": 1})
+        self.assertEqual(summary["multi_monitor"]["reports"], 0)
+        self.assertEqual(summary["multi_monitor"]["monitors"], {"1": 3})
+        self.assertEqual(summary["risk_score"]["high_risk_reports"], 0)
+        self.assertEqual(summary["labs"]["lab01"]["reports"], 2)
+        self.assertEqual(summary["labs"]["lab01"]["mean_risk"], 7.5)
+
+        # O estado gravado reproduz o mesmo resultado sem reprocessar nada
+        fleet, processed = self.run_aggregate()
+        self.assertEqual(processed, 0)
+        self.assertEqual(fleet.summary(), summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
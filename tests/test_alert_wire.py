@@ -0,0 +1,73 @@
+import gzip
+import json
+import unittest
+
+from support import load
+
+alert_wire = load("server", "alert_wire")
+
+
+def alerts(count, class_id="3A"):
+    return [{
+        "student_id": "aluno123",
+        "class_id": class_id,
+        "timestamp": f"2026-10-17T10:00:{i:02d}",
+        "reason": "left_exam_context",
+        "extra": {"proc": "chrome.exe", "active_title": f"Questão {i} — prova", "url": f"https://ava.anchieta.br/q/{i}"},
+    } for i in range(count)]
+
+
+class RoundTripTest(unittest.TestCase):
+    def test_round_trip(self):
+        batch = alerts(20)
+        body = alert_wire.encode_batch(batch)
+        self.assertEqual(alert_wire.decode_batch(body, "gzip"), batch)
+        self.assertLess(len(body), len(json.dumps(batch).encode("utf-8")) / 3)
+
+    def test_common_fields_only_when_shared(self):
+        batch = alerts(2)
+        batch[1]["class_id"] = "3B"
+        del batch[0]["student_id"]
+        body = alert_wire.encode_batch(batch)
+        header = json.loads(gzip.decompress(body).splitlines()[0])
+        self.assertEqual(header, {"v": 1, "common": {}})
+        self.assertEqual(alert_wire.decode_batch(body, "gzip"), batch)
+
+    def test_identity_encoding(self):
+        body = gzip.decompress(alert_wire.encode_batch(alerts(3)))
+        self.assertEqual(alert_wire.decode_batch(body), alerts(3))
+        self.assertEqual(alert_wire.decode_batch(body, "identity"), alerts(3))
+
+
+class DecodeLimitsTest(unittest.TestCase):
+    def test_decompressed_size_cap(self):
+        header = b'{"v":1,"common":{}}\n'
+        bomb = gzip.compress(header + b" " * (4 * 1024 * 1024))
+        self.assertLess(len(bomb), 16 * 1024)
+        with self.assertRaises(ValueError):
+            alert_wire.decode_batch(bomb, "gzip", max_bytes=1024 * 1024)
+        body = alert_wire.encode_batch(alerts(5))
+        self.assertEqual(len(alert_wire.decode_batch(body, "gzip", max_bytes=64 * 1024)), 5)
+
+    def test_identity_size_cap(self):
+        body = gzip.decompress(alert_wire.encode_batch(alerts(5)))
+        with self.assertRaises(ValueError):
+            alert_wire.decode_batch(body, max_bytes=len(body) - 1)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(alert_wire.UnsupportedFormat):
+            alert_wire.decode_batch(alert_wire.encode_batch(alerts(1)), "br")
+        body = gzip.compress(b'{"v":2,"common":{}}\n{}')
+        with self.assertRaises(alert_wire.UnsupportedFormat):
+            alert_wire.decode_batch(body, "gzip")
+
+    def test_malformed_batches(self):
+        for body in (gzip.compress(b""), gzip.compress(b"[]\n{}"), gzip.compress(b'{"v":1}\n[1]'),
+                     b"nao e gzip"):
+            with self.subTest(body=body):
+                with self.assertRaises(ValueError):
+                    alert_wire.decode_batch(body, "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from support import load
+
+allowlist = load("client", "allowlist")
+
+
+class LookAlikeHostTest(unittest.TestCase):
+    def setUp(self):
+        self.allow = allowlist.ExamAllowList([
+            "https://ava.anchieta.br/",
+            "https://*.prova.edu.br/",
+            "https://sistema.anchieta.br/prova",
+        ])
+
+    def test_exact_host_allowed(self):
+        self.assertTrue(self.allow.url_is_allowed("https://ava.anchieta.br/curso/1"))
+        self.assertTrue(self.allow.url_is_allowed("https://AVA.Anchieta.BR./"))
+        self.assertTrue(self.allow.url_is_allowed("https://ava.anchieta.br:443/"))
+
+    def test_look_alike_hosts_rejected(self):
+        for url in (
+            "https://ava.anchieta.br.evil.com/",
+            "https://evilava.anchieta.br/",
+            "https://ava-anchieta.br/",
+            "https://anchieta.br/",
+            "https://x.ava.anchieta.br/",
+            "https://ava.anchieta.br@evil.com/",
+            "https://evil.com/?u=https://ava.anchieta.br/",
+            "https://evil.com/ava.anchieta.br/",
+        ):
+            with self.subTest(url=url):
+                self.assertFalse(self.allow.url_is_allowed(url))
+
+    def test_scheme_and_port_must_match(self):
+        self.assertFalse(self.allow.url_is_allowed("http://ava.anchieta.br/"))
+        self.assertFalse(self.allow.url_is_allowed("https://ava.anchieta.br:8443/"))
+
+    def test_wildcard_matches_strict_subdomains_only(self):
+        self.assertTrue(self.allow.url_is_allowed("https://turma1.prova.edu.br/"))
+        self.assertTrue(self.allow.url_is_allowed("https://a.b.prova.edu.br/"))
+        self.assertFalse(self.allow.url_is_allowed("https://prova.edu.br/"))
+        self.assertFalse(self.allow.url_is_allowed("https://turma1.prova.edu.br.evil.com/"))
+
+    def test_path_prefix_matches_on_segment_boundary(self):
+        self.assertTrue(self.allow.url_is_allowed("https://sistema.anchieta.br/prova"))
+        self.assertTrue(self.allow.url_is_allowed("https://sistema.anchieta.br/prova/q/2"))
+        self.assertFalse(self.allow.url_is_allowed("https://sistema.anchieta.br/provas"))
+        self.assertFalse(self.allow.url_is_allowed("https://sistema.anchieta.br/prova/../admin"))
+        self.assertFalse(self.allow.url_is_allowed("https://sistema.anchieta.br/"))
+
+    def test_urls_without_host_rejected(self):
+        for url in ("about:blank", "data:text/html,ava.anchieta.br", "", None):
+            with self.subTest(url=url):
+                self.assertFalse(self.allow.url_is_allowed(url))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import unittest
+
+from support import load
+
+metrics = load("server", "metrics")
+
+
+class ShardedCounterTest(unittest.TestCase):
+    def test_short_lived_threads_are_retired_without_losing_increments(self):
+        counter = metrics.Counter("c", "teste", ("reason",))
+        threads_per_round, rounds = 20, 10
+        for _ in range(rounds):
+            threads = [threading.Thread(target=lambda: [counter.inc("a") for _ in range(100)])
+                       for _ in range(threads_per_round)]
+            for thread in threads:
+                thread.start()
+            # Coleta concorrente com threads ainda rodando
+            counter._collect()
+            for thread in threads:
+                thread.join()
+        counter.inc("a")
+        self.assertEqual(counter._collect(), {("a",): rounds * threads_per_round * 100 + 1})
+
+    def test_finished_threads_are_retired_without_collection(self):
+        counter = metrics.Counter("c", "teste")
+        for _ in range(200):
+            thread = threading.Thread(target=counter.inc)
+            thread.start()
+            thread.join()
+        # Sem coleta: os shards das threads encerradas já foram somados ao acumulador
+        self.assertLessEqual(len(counter._shards), 1)
+        self.assertEqual(counter._retired, {(): 200 - len(counter._shards)})
+        self.assertEqual(counter._collect(), {(): 200})
+
+    def test_label_cap_is_per_label(self):
+        counter = metrics.Counter("c", "teste", ("endpoint", "reason"), max_label_values=3)
+        for i in range(10):
+            counter.inc("/alerta", f"r{i}")
+        counter.inc("/alertas", "r0")
+        totals = counter._collect()
+        self.assertEqual(totals[("/alerta", "other")], 7)
+        self.assertEqual(totals[("/alertas", "r0")], 1)
+        self.assertEqual(sorted(v for (_, v) in totals), ["other", "r0", "r0", "r1", "r2"])
+
+    def test_histogram_render(self):
+        histogram = metrics.Histogram("h", "teste", ("endpoint",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+        lines = histogram.render()
+        self.assertIn('h_bucket{endpoint="/a",le="0.1"} 1', lines)
+        self.assertIn('h_bucket{endpoint="/a",le="+Inf"} 3', lines)
+        self.assertIn('h_count{endpoint="/a"} 3', lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from support import load
+
+monitor = load("client", "monitor")
+cdp_tabs = load("client", "cdp_tabs")
+
+EXAM_URL = "https://ava.anchieta.br/prova"
+CONFIG = {
+    "student_id": "aluno123",
+    "exam_domains": ["https://ava.anchieta.br/"],
+    "recheck_interval_sec": 5.0,
+    "cdp_settle_sec": 0.5,
+}
+
+
+class FakeTracker:
+    def __init__(self):
+        self.tabs = {}
+
+    def find_urls(self, title):
+        url = self.tabs.get(cdp_tabs.strip_browser_suffix(title))
+        return [url] if url else []
+
+
+class FakeChrome:
+    connected = True
+
+    def __init__(self):
+        self.tracker = FakeTracker()
+
+    def resolve_active_tab(self, active_title):
+        urls = self.tracker.find_urls(active_title)
+        return bool(urls), urls
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.alerts = []
+
+    def enqueue(self, payload):
+        self.alerts.append(payload)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CdpSettleTest(unittest.TestCase):
+    def setUp(self):
+        self.chrome = FakeChrome()
+        self.outbox = FakeOutbox()
+        self.clock = FakeClock()
+        patcher = mock.patch.object(monitor.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.monitor = monitor.ExamMonitor(CONFIG, self.chrome, self.outbox)
+        self.chrome.tracker.tabs["Prova"] = EXAM_URL
+        self.assertTrue(self.monitor.check((1, "chrome.exe", "Prova - Google Chrome")))
+
+    def reasons(self):
+        return [a["reason"] for a in self.outbox.alerts]
+
+    def test_title_change_before_cdp_update_does_not_alert(self):
+        # A janela troca de título antes de o CDP informar o novo título da aba
+        self.assertTrue(self.monitor.check((1, "chrome.exe", "Questão 2 - Google Chrome")))
+        self.assertLess(self.monitor.next_timeout(5.0), 5.0)
+        self.clock.now += 0.1
+        self.chrome.tracker.tabs["Questão 2"] = EXAM_URL
+        self.assertTrue(self.monitor.check((1, "chrome.exe", "Questão 2 - Google Chrome")))
+        self.assertEqual(self.reasons(), [])
+        self.assertEqual(self.monitor.next_timeout(5.0), 5.0)
+
+    def test_unmatched_tab_alerts_after_settle(self):
+        window = (1, "chrome.exe", "Outro site - Google Chrome")
+        self.assertTrue(self.monitor.check(window))
+        self.clock.now += 0.2
+        self.assertTrue(self.monitor.check(window))
+        self.assertEqual(self.reasons(), [])
+        self.clock.now += 0.3
+        self.assertFalse(self.monitor.check(window))
+        self.assertEqual(self.reasons(), ["left_exam_context"])
+
+    def test_disallowed_url_alerts_immediately(self):
+        self.chrome.tracker.tabs["Outro site"] = "https://evil.com/"
+        self.assertFalse(self.monitor.check((1, "chrome.exe", "Outro site - Google Chrome")))
+        self.assertEqual(self.reasons(), ["left_exam_context"])
+
+
+class CdpConnectTest(unittest.TestCase):
+    def test_failed_setup_closes_socket_and_stays_disconnected(self):
+        ws = mock.Mock()
+        ws.send.side_effect = OSError("conexão encerrada")
+        fake_websocket = mock.Mock(create_connection=mock.Mock(return_value=ws))
+        tracker = cdp_tabs.CdpTabTracker("127.0.0.1:9222")
+        with mock.patch.dict("sys.modules", websocket=fake_websocket), \
+                mock.patch.object(tracker, "_browser_ws_url", return_value="ws://127.0.0.1:9222/x"):
+            with self.assertRaises(OSError):
+                tracker.connect()
+        self.assertFalse(tracker.connected)
+        ws.close.assert_called_once_with()
+        self.assertIsNone(tracker._ws)
+
+
+if __name__ == "__main__":
+    unittest.main()
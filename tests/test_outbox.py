@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from support import load
+
+outbox = load("client", "outbox")
+
+
+class SpoolRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.spool = os.path.join(self.dir.name, "spool.ndjson")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def make(self):
+        return outbox.AlertOutbox("http://127.0.0.1:5000/alerta", spool_path=self.spool, compact=False)
+
+    def test_truncated_last_line_is_cut_before_next_append(self):
+        box = self.make()
+        box.enqueue({"reason": "a"})
+        box.enqueue({"reason": "b"})
+        with open(self.spool, "ab") as f:
+            f.write(b'{"reason": "c')  # queda no meio da escrita
+
+        box = self.make()
+        self.assertEqual([p["reason"] for p in box._pending], ["a", "b"])
+        box.enqueue({"reason": "d"})
+        with open(self.spool, "rb") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line)["reason"] for line in lines], ["a", "b", "d"])
+
+    def test_ack_offset_survives_corrupt_line(self):
+        with open(self.spool, "w", encoding="utf-8") as f:
+            f.write('{"reason": "a"}\nlixo\n{"reason": "b"}\n{"reason": "c"}\n')
+        box = self.make()
+        self.assertEqual([p["reason"] for p in box._pending], ["a", "b", "c"])
+        box._ack(2)
+        box = self.make()
+        # A linha inválida não desloca o offset: só o alerta não confirmado volta
+        self.assertEqual([p["reason"] for p in box._pending], ["c"])
+
+    def test_all_acked_clears_spool(self):
+        box = self.make()
+        box.enqueue({"reason": "a"})
+        box._ack(1)
+        self.assertEqual(os.path.getsize(self.spool), 0)
+        self.assertEqual(self.make().pending_count(), 0)
+
+
+class FakeSession:
+    """Responde aos POSTs com as respostas dadas, em ordem (a última se repete)."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.posts = []
+
+    def post(self, url, json=None, data=None, timeout=None, headers=None):
+        self.posts.append((url, [a["reason"] for a in json] if isinstance(json, list) else [json["reason"]]))
+        status, body, headers = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        return mock.Mock(status_code=status, ok=status < 400, headers=headers,
+                         json=mock.Mock(return_value=body))
+
+
+def ok(accepted):
+    return 200, {"status": "ok", "accepted": accepted}, {}
+
+
+class SenderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.spool = os.path.join(self.dir.name, "spool.ndjson")
+        self.box = outbox.AlertOutbox("http://127.0.0.1:5000/alerta", spool_path=self.spool,
+                                      batch_size=2, compact=False)
+        self.waits = []
+        self.box._stop = mock.Mock(wraps=self.box._stop)
+        self.box._stop.wait.side_effect = self.waits.append
+
+    def deliver(self, session, *reasons):
+        for reason in reasons:
+            self.box.enqueue({"reason": reason})
+        with mock.patch("requests.Session", return_value=session):
+            self.box.start()
+            deadline = time.monotonic() + 5
+            while self.box.pending_count() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.box.stop()
+        self.assertEqual(self.box.pending_count(), 0)
+        return [reasons for _, reasons in session.posts]
+
+    def test_enqueue_never_touches_network(self):
+        with mock.patch("requests.Session") as session:
+            self.box.enqueue({"reason": "a"})
+        session.assert_not_called()
+        self.assertEqual(self.box.pending_count(), 1)
+
+    def test_alerts_are_sent_in_batches(self):
+        posts = self.deliver(FakeSession(ok(2), ok(2), ok(1)), "a", "b", "c", "d", "e")
+        self.assertEqual(posts, [["a", "b"], ["c", "d"], ["e"]])
+        self.assertEqual(self.box._session.posts[0][0], "http://127.0.0.1:5000/alertas")
+
+    def test_busy_server_gets_only_unaccepted_alerts_after_retry_after(self):
+        session = FakeSession(
+            (503, {"status": "busy", "accepted": 1}, {"Retry-After": "3"}),
+            (429, {"status": "rate_limited", "accepted": 0}, {"Retry-After": "2"}),
+            ok(1),
+        )
+        posts = self.deliver(session, "a", "b")
+        self.assertEqual(posts, [["a", "b"], ["b"], ["b"]])
+        self.assertEqual(self.waits, [3.0, 2.0])
+
+    def test_connection_failure_backs_off_exponentially(self):
+        session = FakeSession(ok(1))
+        failures = [IOError("sem conexão"), IOError("sem conexão")]
+
+        def post(*args, **kwargs):
+            if failures:
+                raise failures.pop(0)
+            return FakeSession.post(session, *args, **kwargs)
+
+        session.post = post
+        self.deliver(session, "a")
+        self.assertEqual(len(self.waits), 2)
+        self.assertLessEqual(self.waits[0], 1.0)
+        self.assertGreater(self.waits[1], 1.0)
+
+    def test_rejected_alert_is_isolated_and_quarantined(self):
+        rejected = (400, {"status": "error", "error": "student_id obrigatório"}, {})
+        session = FakeSession(rejected, ok(1), rejected, ok(1))
+        posts = self.deliver(session, "a", "b", "c")
+        # O lote [a, b] é dividido; só "b" vai para a quarentena
+        self.assertEqual(posts, [["a", "b"], ["a"], ["b"], ["c"]])
+        self.assertEqual(self.box.batch_size, 2)
+        with open(self.spool + ".rejected", encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["reason"] for line in f], ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
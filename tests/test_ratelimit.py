@@ -0,0 +1,98 @@
+import threading
+import unittest
+
+from support import load
+
+ratelimit = load("server", "ratelimit")
+
+
+def alert(n, reason="left_exam_context"):
+    return {
+        "id": f"a{n}",
+        "student_id": "aluno1",
+        "reason": reason,
+        "timestamp": f"2026-10-17T10:00:0{n}",
+        "_received_at": f"2026-10-17T10:00:0{n}Z",
+        "extra": {"url": f"https://site{n}.com/"},
+    }
+
+
+class Sink:
+    """Fila de gravação falsa: guarda os registros na ordem de entrega."""
+
+    def __init__(self):
+        self.records = []
+        self.accept = True
+        self.ids = iter(range(1, 1000))
+
+    def __call__(self, record, merged):
+        if not self.accept:
+            return False
+        if not merged:
+            record["id"] = next(self.ids)
+        self.records.append(record)
+        return True
+
+
+class CoalescerTest(unittest.TestCase):
+    def setUp(self):
+        self.coalescer = ratelimit.AlertCoalescer(window=60)
+        self.sink = Sink()
+
+    def add(self, alert):
+        return self.coalescer.add(alert, self.sink)
+
+    def test_merge_updates_latest_fields(self):
+        first = alert(1)
+        self.assertEqual(self.add(first), (first, False))
+        record, merged = self.add(alert(2))
+        self.assertTrue(merged)
+        self.assertEqual(record["id"], 1)
+        self.assertEqual(record["count"], 2)
+        self.assertEqual(record["first_timestamp"], "2026-10-17T10:00:01")
+        self.assertEqual(record["last_timestamp"], "2026-10-17T10:00:02")
+        self.assertEqual(record["extra"], {"url": "https://site2.com/"})
+        # received_at fica o do primeiro para a paginação continuar estável
+        self.assertEqual(record["_received_at"], "2026-10-17T10:00:01Z")
+        self.assertEqual(self.sink.records[-1], record)
+
+    def test_rejected_enqueue_leaves_group_unchanged(self):
+        self.add(alert(1))
+        self.add(alert(2))
+        self.sink.accept = False
+        self.assertEqual(self.add(alert(3)), (None, True))
+        self.sink.accept = True
+        record, merged = self.add(alert(4))
+        self.assertTrue(merged)
+        self.assertEqual(record["count"], 3)
+        self.assertEqual(record["extra"], {"url": "https://site4.com/"})
+
+    def test_rejected_original_opens_no_group(self):
+        self.sink.accept = False
+        self.assertEqual(self.add(alert(1)), (None, False))
+        self.sink.accept = True
+        second = alert(2)
+        self.assertEqual(self.add(second), (second, False))
+
+    def test_concurrent_merges_are_enqueued_in_count_order(self):
+        self.add(alert(1))
+        threads = [threading.Thread(target=lambda n=n: [self.add(alert(n)) for _ in range(50)])
+                   for n in range(2, 6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counts = [r.get("count", 1) for r in self.sink.records]
+        self.assertEqual(counts, list(range(1, 202)))
+        self.assertTrue(all(r["id"] == 1 for r in self.sink.records))
+
+    def test_informational_events_are_not_coalesced(self):
+        first = dict(alert(1, reason="verification_process_started"), extra={"name": "obs64.exe"})
+        second = dict(alert(2, reason="verification_process_started"), extra={"name": "Discord.exe"})
+        self.assertEqual(self.add(first), (first, False))
+        self.assertEqual(self.add(second), (second, False))
+        self.assertEqual([r["id"] for r in self.sink.records], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
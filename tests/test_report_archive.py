@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from support import load_root
+
+report_archive = load_root("report_archive")
+
+
+def report(hour, machine="lab-01"):
+    return {
+        "timestamp": f"2026-10-16T{hour:02d}:00:00",
+        "system_info": {"hostname": machine},
+        "security_analysis": {"risk_score": float(hour)},
+    }
+
+
+class CompactTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.archive = report_archive.ReportArchive(self.dir.name)
+        for hour in (9, 8, 10):
+            self.archive.append(report(hour))
+        # Trecho órfão: segmento gravado sem a linha do índice
+        with open(self.archive._segment_path("20261016"), "ab") as f:
+            f.write(b"\x1f\x8b lixo")
+
+    def timestamps(self):
+        return [r["timestamp"][11:13] for r in self.archive.iter_reports("20261016")]
+
+    def segments(self):
+        return sorted(name for name in os.listdir(self.dir.name) if name.endswith(".jsonl.gz"))
+
+    def test_compact_writes_new_generation(self):
+        result = self.archive.compact("20261016")
+        self.assertEqual(result["reports"], 3)
+        self.assertEqual(self.timestamps(), ["08", "09", "10"])
+        self.assertEqual(self.segments(), ["reports-20261016.g1.jsonl.gz"])
+
+        # Relatório atrasado volta ao segmento do dia; a próxima compactação junta os dois
+        self.archive.append(report(11))
+        self.assertEqual(self.timestamps(), ["08", "09", "10", "11"])
+        self.archive.compact("20261016")
+        self.assertEqual(self.timestamps(), ["08", "09", "10", "11"])
+        self.assertEqual(self.segments(), ["reports-20261016.g2.jsonl.gz"])
+
+    def test_crash_before_index_swap_keeps_old_archive(self):
+        with mock.patch.object(report_archive.os, "replace", side_effect=OSError("queda")):
+            with self.assertRaises(OSError):
+                self.archive.compact("20261016")
+        self.assertEqual(self.timestamps(), ["09", "08", "10"])
+        # A geração órfã é descartada pela compactação seguinte
+        self.archive.compact("20261016")
+        self.assertEqual(self.timestamps(), ["08", "09", "10"])
+        self.assertEqual(self.segments(), ["reports-20261016.g2.jsonl.gz"])
+
+    def test_crash_after_index_swap_reads_new_segment(self):
+        with mock.patch.object(report_archive.os, "remove", side_effect=OSError("queda")):
+            with self.assertRaises(OSError):
+                self.archive.compact("20261016")
+        self.assertEqual(self.timestamps(), ["08", "09", "10"])
+
+    def test_retention_removes_all_generations(self):
+        self.archive.compact("20261016")
+        self.archive.append(report(12))
+        removed = self.archive.apply_retention(0, today=report_archive.datetime(2026, 10, 18))
+        self.assertEqual(removed, ["20261016"])
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_get_resolves_offset_within_its_segment(self):
+        self.archive.compact("20261016")
+        late = self.archive.append(report(11))  # segmento do dia: offset 0 de novo
+        compacted = next(e for e in self.archive.entries("20261016") if e.get("segment") and e["offset"] == 0)
+        for entry, hour in ((late, "11"), (compacted, "08")):
+            found = self.archive.find(os.path.basename(self.archive.location(entry)))
+            self.assertEqual(self.archive.read(found)["timestamp"][11:13], hour)
+            self.assertEqual(self.archive.find(self.archive.location(entry)), found)
+
+        with mock.patch("builtins.print") as printed:
+            self.assertEqual(report_archive.main([self.dir.name, "get", "20261016", "0"]), 1)
+            self.assertEqual(report_archive.main([self.dir.name, "get", "reports-20261016.jsonl.gz#0"]), 0)
+        self.assertIn('"2026-10-16T11:00:00"', printed.call_args[0][0])
+        with self.assertRaises(ValueError):
+            self.archive.find("20261016 0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from support import load
+
+sessions = load("server", "sessions")
+
+
+class RecordAlertsTest(unittest.TestCase):
+    def setUp(self):
+        self.table = sessions.SessionTable()
+
+    def test_verification_events_only_update_liveness(self):
+        self.table.record_alerts([
+            {"student_id": "aluno1", "class_id": "3A", "reason": "verification_baseline"},
+            {"student_id": "aluno1", "reason": "verification_process_exited"},
+        ])
+        session = self.table.get("aluno1")
+        self.assertEqual(session["status"], sessions.STATUS_ONLINE)
+        self.assertEqual(session["violations"], 0)
+        self.assertIsNone(session["last_violation"])
+        self.assertEqual(session["class_id"], "3A")
+        self.assertIsNotNone(session["last_seen"])
+
+    def test_violation_counted(self):
+        self.table.record_alerts([
+            {"student_id": "aluno1", "reason": "verification_baseline"},
+            {"student_id": "aluno1", "reason": "left_exam_context", "timestamp": "2026-10-17T10:00:00"},
+        ])
+        session = self.table.get("aluno1")
+        self.assertEqual(session["status"], sessions.STATUS_VIOLATION)
+        self.assertEqual(session["violations"], 1)
+        self.assertEqual(session["last_violation"]["reason"], "left_exam_context")
+
+
+if __name__ == "__main__":
+    unittest.main()
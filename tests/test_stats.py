@@ -0,0 +1,92 @@
+import random
+import statistics
+import unittest
+
+from support import load
+
+stats = load("server", "stats")
+
+
+class RunningStatsTest(unittest.TestCase):
+    def assertMatchesBatch(self, running, values):
+        self.assertEqual(running.n, len(values))
+        self.assertAlmostEqual(running.mean, statistics.fmean(values), places=9)
+        self.assertAlmostEqual(running.variance, statistics.pvariance(values), places=6)
+
+    def test_add_remove_replace_match_batch(self):
+        rng = random.Random(7)
+        values = [float(rng.randint(0, 40)) for _ in range(200)]
+        running = stats.RunningStats()
+        for value in values:
+            running.add(value)
+        self.assertMatchesBatch(running, values)
+
+        for _ in range(1000):
+            index = rng.randrange(len(values))
+            new = values[index] + rng.choice((1.0, 1.0, 5.0, -1.0 if values[index] else 0.0))
+            running.replace(values[index], new)
+            values[index] = new
+        self.assertMatchesBatch(running, values)
+
+        for value in values[:150]:
+            running.remove(value)
+        self.assertMatchesBatch(running, values[150:])
+
+    def test_remove_last_value_resets(self):
+        running = stats.RunningStats()
+        running.add(3.0)
+        running.remove(3.0)
+        self.assertEqual((running.n, running.mean, running.variance), (0, 0.0, 0.0))
+
+
+class AlertStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = stats.AlertStatistics(burst_min=3)
+
+    def alerts(self, student_id, count, reason="left_exam_context"):
+        return [{"student_id": student_id, "class_id": "3A", "reason": reason}] * count
+
+    def test_verification_events_are_not_counted(self):
+        self.stats.record_alerts(self.alerts("aluno1", 4, reason="verification_baseline"))
+        result = self.stats.outliers("3A")
+        self.assertEqual(result["classes"][0]["students"], 1)
+        self.assertEqual(result["classes"][0]["window_alerts"], 0)
+        self.assertEqual(result["outliers"], [])
+
+    def test_rate_outlier_in_large_class(self):
+        for i in range(9):
+            self.stats.touch(f"aluno{i}", "3A")
+        self.stats.record_alerts(self.alerts("aluno0", 10))
+        result = self.stats.outliers("3A")
+        self.assertTrue(result["classes"][0]["rate_reachable"])
+        [outlier] = result["outliers"]
+        self.assertEqual(outlier["student_id"], "aluno0")
+        self.assertIn("rate", outlier["flags"])
+        self.assertIn("burst", outlier["flags"])
+
+    def test_small_class_limits_are_reported(self):
+        self.stats.touch("aluno1", "3A")
+        self.stats.record_alerts(self.alerts("aluno0", 10))
+        result = self.stats.outliers("3A")
+        summary = result["classes"][0]
+        self.assertFalse(summary["rate_reachable"])
+        self.assertFalse(summary["burst_reachable"])
+        self.assertEqual(result["outliers"], [])
+        self.assertAlmostEqual(stats.AlertStatistics.max_z_score(5), 4 / 5 ** 0.5)
+        self.assertLess(stats.AlertStatistics.max_z_score(5), 2)
+        self.assertGreaterEqual(stats.AlertStatistics.max_z_score(6), 2)
+
+    def test_unfiltered_query_covers_classless_students(self):
+        self.stats.touch("sem_turma")
+        for i in range(9):
+            self.stats.touch(f"aluno{i}", "3A")
+        self.stats.record_alerts(self.alerts("aluno0", 10))
+        result = self.stats.outliers()
+        self.assertEqual(sorted(str(c["class_id"]) for c in result["classes"]), ["3A", "None"])
+        self.assertEqual([o["student_id"] for o in result["outliers"]], ["aluno0"])
+        self.assertEqual(self.stats.outliers(class_id="")["outliers"], result["outliers"])
+        self.assertEqual(self.stats.outliers(class_id="3B")["classes"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+import unittest
+
+from support import load
+
+storage = load("server", "storage")
+
+
+def alert(student_id="aluno1"):
+    return {"student_id": student_id, "reason": "left_exam_context",
+            "_received_at": "2026-10-17T10:00:00Z"}
+
+
+class IngestorTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = storage.AlertStore(os.path.join(tmp.name, "alerts.db"))
+        self.dropped = []
+        self.ingestor = storage.AlertIngestor(self.store, flush_interval=0.05,
+                                              on_drop=self.dropped.append)
+        self.ingestor.start()
+        self.addCleanup(self.ingestor.stop)
+
+    def wait_until_written(self, count):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            rows = list(self.store.query())
+            if len(rows) >= count:
+                return rows
+            time.sleep(0.02)
+        self.fail(f"esperava {count} alertas gravados")
+
+    def test_bad_record_is_dropped_and_writer_keeps_running(self):
+        bad = alert()
+        bad["extra"] = {1j}  # não serializável em JSON
+        self.assertEqual(self.ingestor.submit([alert("a"), bad, alert("b")]), 3)
+        rows = self.wait_until_written(2)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(self.dropped, [1])
+        self.assertEqual(self.ingestor.submit([alert("c")]), 1)
+        self.assertEqual(len(self.wait_until_written(3)), 3)
+
+    def test_second_writer_on_same_database_is_refused(self):
+        with self.assertRaises(RuntimeError):
+            storage.AlertIngestor(self.store)
+
+    def test_ids_continue_after_restart(self):
+        self.ingestor.submit([alert("a"), alert("b")])
+        self.wait_until_written(2)
+        self.ingestor.stop()
+        restarted = storage.AlertIngestor(self.store)
+        self.addCleanup(restarted.stop)
+        record = alert("c")
+        restarted.submit([record])
+        self.assertEqual(record["id"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
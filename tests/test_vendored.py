@@ -0,0 +1,68 @@
+import filecmp
+import os
+import unittest
+
+from support import ROOT, load
+
+display_topology = load("client", "display_topology")
+
+# Módulos com uma cópia por lado implantado: (original, cópias)
+VENDORED = [
+    ("client/alert_wire.py", ["server/alert_wire.py"]),
+]
+
+
+class VendoredCopiesTest(unittest.TestCase):
+    def test_copies_are_identical(self):
+        for original, copies in VENDORED:
+            for copy in copies:
+                with self.subTest(copy=copy):
+                    self.assertTrue(filecmp.cmp(os.path.join(ROOT, original), os.path.join(ROOT, copy),
+                                                shallow=False), f"{copy} divergiu de {original}")
+
+
+class DisplayTopologyTest(unittest.TestCase):
+    def setUp(self):
+        self.source = display_topology.FakeDisplaySource(monitors=1)
+        self.topology = display_topology.DisplayTopology(self.source)
+
+    def test_enumerates_only_when_fingerprint_changes(self):
+        snapshot, changed = self.topology.refresh()
+        self.assertFalse(changed)  # primeira leitura: nada a comparar
+        self.assertFalse(snapshot.has_secondary_screens)
+        self.assertEqual(snapshot.total_monitors, 1)
+        for _ in range(5):
+            _, changed = self.topology.refresh()
+            self.assertFalse(changed)
+        self.assertEqual(self.source.enumerations, 1)
+
+    def test_monitor_connected_and_disconnected(self):
+        self.topology.refresh()
+        self.source.set_monitors(2)
+        snapshot, changed = self.topology.refresh()
+        self.assertTrue(changed)
+        self.assertTrue(snapshot.has_secondary_screens)
+        self.assertEqual(snapshot.total_monitors, 2)
+        self.assertEqual(self.source.enumerations, 2)
+
+        self.source.set_monitors(1)
+        snapshot, changed = self.topology.refresh()
+        self.assertTrue(changed)
+        self.assertFalse(snapshot.has_secondary_screens)
+        self.assertEqual(self.source.enumerations, 3)
+
+    def test_system_count_used_when_enumeration_has_no_active_monitor(self):
+        snapshot = display_topology.DisplaySnapshot((0, 0, 3840, 1080, 2, 1920, 1080),
+                                                    [{"device_name": "DISPLAY1", "width": 0}])
+        self.assertEqual(snapshot.total_monitors, 2)
+        self.assertTrue(snapshot.has_secondary_screens)
+
+    def test_force_refresh_enumerates(self):
+        self.topology.refresh()
+        _, changed = self.topology.refresh(force=True)
+        self.assertEqual(self.source.enumerations, 2)
+        self.assertFalse(changed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from support import load, load_verifier
+
+fixtures = load("benchmarks", "fixtures")
+script_verification = load_verifier()
+psutil = script_verification.psutil
+display_topology = load("client", "display_topology")
+
+
+def process(pid, name, exe, cmdline=()):
+    return fixtures.FakeProcess(pid, name, exe, list(cmdline), 50 * 1024 * 1024, 1000.0 + pid)
+
+
+def service(name, display_name):
+    return fixtures.FakeService(name, display_name, "running", "automatic")
+
+
+class FakePsutilMixin:
+    def use_tables(self, processes, services=()):
+        def process_iter(attrs=None, ad_value=None):
+            for proc in processes:
+                proc.info = {attr: proc._get(attr) for attr in attrs or ()}
+                yield proc
+        for name, func in (("process_iter", process_iter),
+                           ("win_service_iter", lambda: iter(services))):
+            patcher = mock.patch.object(psutil, name, func, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class ConcurrentReportTest(FakePsutilMixin, unittest.TestCase):
+    def setUp(self):
+        self.verifier = script_verification.ExamSecurityVerifier(
+            display_source=display_topology.FakeDisplaySource(monitors=1))
+        self.processes = [process(4, "svchost.exe", r"C:\Windows\System32\svchost.exe")]
+        self.use_tables(self.processes, [service("Dhcp", "DHCP Client")])
+
+    def generate(self, **kwargs):
+        with mock.patch("builtins.print"):
+            return self.verifier.generate_report(concurrent=True, **kwargs)
+
+    def test_clean_report_is_conclusive(self):
+        report = self.generate()
+        self.assertFalse(report["security_analysis"]["inconclusive"])
+        self.assertEqual(report["security_analysis"]["risk_score"], 0)
+        self.assertNotIn("phase_errors", report["execution"])
+
+    def test_failed_phase_marks_report_inconclusive(self):
+        with mock.patch.object(self.verifier, "get_running_services", side_effect=OSError("SCM indisponível")):
+            report = self.generate()
+        analysis = report["security_analysis"]
+        self.assertTrue(analysis["inconclusive"])
+        self.assertGreaterEqual(analysis["risk_score"], self.verifier.INCONCLUSIVE_RISK_FLOOR)
+        self.assertIn("services", report["execution"]["phase_errors"])
+
+    def test_abandoned_process_phase_does_not_touch_snapshot(self):
+        self.generate()
+        adopted = self.verifier.process_snapshot
+        release = threading.Event()
+        finished = threading.Event()
+
+        def slow_process_iter(attrs=None, ad_value=None):
+            release.wait(5)
+            late = process(99, "ChatGPT.exe", r"C:\Apps\ChatGPT.exe")
+            late.info = {attr: late._get(attr) for attr in attrs}
+            yield late
+            finished.set()
+
+        with mock.patch.object(psutil, "process_iter", slow_process_iter):
+            report = self.generate(phase_timeout=0.05)
+            self.assertIn("processes", report["execution"]["phase_errors"])
+            self.assertTrue(report["security_analysis"]["inconclusive"])
+            release.set()
+            self.assertTrue(finished.wait(5))
+        self.assertIs(self.verifier.process_snapshot, adopted)
+        self.assertEqual([p.name for p in adopted.processes], ["svchost.exe"])
+
+    def test_screens_checked_on_main_thread(self):
+        threads = []
+        original = self.verifier.detect_secondary_screens
+
+        def detect():
+            threads.append(threading.current_thread())
+            return original()
+
+        with mock.patch.object(self.verifier, "detect_secondary_screens", detect):
+            self.generate()
+        self.assertEqual(threads, [threading.main_thread()])
+
+
+class ProcessClassificationTest(FakePsutilMixin, unittest.TestCase):
+    def setUp(self):
+        self.verifier = script_verification.ExamSecurityVerifier(
+            display_source=display_topology.FakeDisplaySource(monitors=1))
+
+    def classify(self, *processes):
+        self.use_tables(list(processes))
+        records = self.verifier.get_running_processes()
+        return {r.pid: self.verifier.process_snapshot.classification(r) for r in records}
+
+    def test_renamed_binary_is_still_flagged(self):
+        result = self.classify(
+            process(10, "svchost.exe", r"C:\Users\aluno\AppData\Local\Programs\ChatGPT\svchost.exe"),
+            process(11, "svchost.exe", r"C:\Users\aluno\AppData\Local\Temp\svchost.exe",
+                    ["svchost.exe", "--connect", "teamviewer"]),
+        )
+        self.assertEqual(result[10], {"suspicious": ["chatgpt"], "ai": ["chatgpt"]})
+        self.assertEqual(result[11]["suspicious"], ["teamviewer"])
+
+    def test_system_process_skips_cmdline(self):
+        genuine = process(4, "svchost.exe", r"C:\Windows\System32\svchost.exe",
+                          ["svchost.exe", "-k", "teamviewer"])
+        with mock.patch.object(genuine, "cmdline", side_effect=AssertionError("cmdline lida")):
+            result = self.classify(genuine)
+        self.assertEqual(result[4], {"suspicious": [], "ai": []})
+
+    def test_suspicious_exe_under_system_root_is_flagged(self):
+        result = self.classify(process(12, "svchost.exe", r"C:\Windows\System32\anydesk\svchost.exe"))
+        self.assertEqual(result[12]["suspicious"], ["anydesk"])
+
+
+class BulkUrlTest(unittest.TestCase):
+    def test_single_alert_url_becomes_bulk(self):
+        self.assertEqual(script_verification.bulk_url_for("http://127.0.0.1:5000/alerta"),
+                         "http://127.0.0.1:5000/alertas")
+        self.assertEqual(script_verification.bulk_url_for("http://127.0.0.1:5000/alerta/"),
+                         "http://127.0.0.1:5000/alertas")
+
+    def test_bulk_and_server_urls(self):
+        self.assertEqual(script_verification.bulk_url_for("http://127.0.0.1:5000/alertas"),
+                         "http://127.0.0.1:5000/alertas")
+        self.assertEqual(script_verification.bulk_url_for("http://127.0.0.1:5000/"),
+                         "http://127.0.0.1:5000/alertas")
+
+
+class FakeSession:
+    def __init__(self):
+        self.release = threading.Event()
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None):
+        self.release.wait(5)
+        self.posts.append((url, json))
+        return mock.Mock(status_code=200)
+
+
+class WatcherSendTest(FakePsutilMixin, unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        verifier = script_verification.ExamSecurityVerifier(
+            display_source=display_topology.FakeDisplaySource(monitors=1))
+        self.use_tables([process(4, "svchost.exe", r"C:\Windows\System32\svchost.exe")])
+        self.watcher = script_verification.ExamWatcher(
+            verifier, os.path.join(self.dir.name, "events.ndjson"),
+            server_url="http://127.0.0.1:5000/alerta", student_id="aluno123")
+        self.session = FakeSession()
+        patcher = mock.patch("requests.Session", return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_check_does_not_wait_for_server(self):
+        started = time.monotonic()
+        events = self.watcher.check()
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual([e["type"] for e in events], ["baseline"])
+
+        self.session.release.set()
+        self.watcher.close()
+        [(url, alerts)] = self.session.posts
+        self.assertEqual(url, "http://127.0.0.1:5000/alertas")
+        self.assertEqual([a["reason"] for a in alerts], ["verification_baseline"])
+
+
+class ScriptedSession:
+    """Responde aos POSTs com as respostas dadas, em ordem (a última se repete);
+    uma exceção na lista é levantada no lugar da resposta."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None):
+        self.posts.append([a["reason"] for a in json])
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        status, body, headers = response
+        return mock.Mock(status_code=status, headers=headers, json=mock.Mock(return_value=body))
+
+
+class WatcherRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        verifier = script_verification.ExamSecurityVerifier(
+            display_source=display_topology.FakeDisplaySource(monitors=1))
+        self.watcher = script_verification.ExamWatcher(
+            verifier, os.path.join(self.dir.name, "events.ndjson"),
+            server_url="http://127.0.0.1:5000/alertas", student_id="aluno123")
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def send(self, session, *types, posts=0):
+        with mock.patch("requests.Session", return_value=session):
+            self.watcher._send([{"type": t, "ts": "2026-10-17T10:00:00"} for t in types])
+            deadline = time.monotonic() + 5
+            while len(session.posts) < posts and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.watcher.close(timeout=5)
+
+    def test_only_unaccepted_events_are_resent_after_retry_after(self):
+        session = ScriptedSession(
+            (429, {"status": "rate_limited", "accepted": 1}, {"Retry-After": "0"}),
+            (200, {"status": "ok", "accepted": 2}, {}),
+        )
+        self.send(session, "a", "b", "c")
+        self.assertEqual(session.posts, [
+            ["verification_a", "verification_b", "verification_c"],
+            ["verification_b", "verification_c"],
+        ])
+
+    def test_connection_failure_is_retried(self):
+        session = ScriptedSession(OSError("conexão recusada"), (200, {"status": "ok", "accepted": 1}, {}))
+        self.send(session, "a", posts=2)  # nova tentativa após 1 s de backoff
+        self.assertEqual(session.posts, [["verification_a"], ["verification_a"]])
+
+    def test_failed_scan_does_not_stop_watch_mode(self):
+        results = [OSError("WMI indisponível"), []]
+        with mock.patch.object(self.watcher, "check", side_effect=results) as check:
+            self.watcher.run(interval=0, duration=0)
+            self.watcher.run(interval=0, duration=0)
+        self.assertEqual(check.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()